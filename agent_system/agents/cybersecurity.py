@@ -27,6 +27,8 @@ class CybersecurityAgent(BaseAgent):
             "nikto_scan",
             # Enumeration (High-risk)
             "gobuster_scan",
+            # Concurrent nikto/gobuster runs over several targets (High-risk)
+            "parallel_scan",
             # Exploit Research
             "searchsploit_lookup",
             # Payload Generation (High-risk)
@@ -49,6 +51,7 @@ Your capabilities include:
 - Network scanning and host discovery using Nmap (`nmap_scan`). Requires sudo.
 - Web application vulnerability scanning using Nikto (`nikto_scan`) and sqlmap (`sqlmap_scan`).
 - Directory, DNS, and VHost enumeration using Gobuster (`gobuster_scan`).
+- Running the same nikto or gobuster scan against several targets concurrently (`parallel_scan`). For several Nmap targets, pass them all to one `nmap_scan` call instead.
 - Searching for known exploits using SearchSploit (`searchsploit_lookup`).
 - Generating payloads using Metasploit's msfvenom (`msfvenom_generate`).
 - Performing DNS lookups (`dig_command`) and SSL/TLS checks (`openssl_command`).
@@ -58,7 +61,7 @@ Your capabilities include:
 You focus ONLY on these scanning, enumeration, and research tasks. **You MUST delegate tasks** involving active exploitation (beyond sqlmap's `--batch`), complex coding/debugging, system administration, build processes, hardware interaction, or direct remote server management via SSH to the appropriate specialist agent (CodingAgent, DebuggingAgent, SysAdminAgent, BuildAgent, HardwareAgent, RemoteOpsAgent). Use the `delegate_task` function provided by the Controller for delegation.
 
 **EXTREME WARNING:**
-- The tools used by this agent (`nmap_scan`, `sqlmap_scan`, `nikto_scan`, `gobuster_scan`, `msfvenom_generate`) are POWERFUL and potentially DANGEROUS, ILLEGAL, or DISRUPTIVE if misused.
+- The tools used by this agent (`nmap_scan`, `sqlmap_scan`, `nikto_scan`, `gobuster_scan`, `parallel_scan`, `msfvenom_generate`) are POWERFUL and potentially DANGEROUS, ILLEGAL, or DISRUPTIVE if misused.
 - **ALWAYS ensure you have EXPLICIT, WRITTEN AUTHORIZATION** before scanning any target network or system you do not own. Unauthorized scanning is illegal and unethical.
 - Use these tools responsibly and ethically in controlled environments ONLY.
 - All high-risk tools require confirmation by default.
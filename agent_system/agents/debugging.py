@@ -24,6 +24,7 @@ class DebuggingAgent(BaseAgent):
             # Process Inspection/Management (kill is High-risk)
             "list_processes",
             "kill_process",
+            "kill_processes",
             # File Inspection
             "read_file",
             "grep_files", # Useful for searching logs or code
@@ -38,7 +39,7 @@ class DebuggingAgent(BaseAgent):
 Your capabilities include:
 - Interacting with the GNU Debugger (GDB) using MI commands (`gdb_mi_command`). This allows setting breakpoints, inspecting variables, stepping through code, etc. on ANY executable.
 - Inspecting running processes (`list_processes`).
-- Terminating processes using `kill_process`.
+- Terminating processes using `kill_process` (or `kill_processes` for several PIDs at once).
 - Reading file contents (`read_file`), especially source code, configuration files, or logs.
 - Searching within files for patterns using `grep_files`.
 - Gathering basic system information (`get_system_info`) for context.
@@ -47,7 +48,7 @@ You focus ONLY on debugging running processes or analyzing code/logs for errors.
 
 IMPORTANT SAFETY WARNINGS:
 - `gdb_mi_command` is HIGH RISK and requires confirmation. It allows interaction with ANY executable file and can potentially crash processes or the system. Use precise commands.
-- `kill_process` is HIGH RISK and requires confirmation. Terminating the wrong process can cause instability or data loss.
+- `kill_process` and `kill_processes` are HIGH RISK and require confirmation. Terminating the wrong process can cause instability or data loss.
 - File reading (`read_file`, `grep_files`) has NO path restrictions.
 """
         super().__init__(
@@ -21,7 +21,9 @@ class RemoteOpsAgent(BaseAgent):
         default_tools = [
             # Remote Execution/Transfer (High-risk)
             "ssh_command",
+            "ssh_commands", # Several commands in one SSH session
             "scp_command",
+            "ssh_mux_exit", # Close shared SSH master connections
             # SSH Key Management
             "ssh_agent_command",
             "ssh_add_command",
@@ -37,8 +39,9 @@ class RemoteOpsAgent(BaseAgent):
 
         system_prompt = f"""You are a specialist Remote Operations Agent.
 Your capabilities include:
-- Executing commands remotely on servers using `ssh_command` (key authentication only).
+- Executing commands remotely on servers using `ssh_command` (key authentication only). Use `ssh_commands` to run several commands on the same host in one session.
 - Transferring files/directories to and from remote servers using `scp_command` (key authentication only).
+- Repeated `ssh_command`/`scp_command` calls to the same host share one master connection; close it early with `ssh_mux_exit` when done with a host.
 - Managing local SSH keys in the ssh-agent using `ssh_agent_command` (list keys only) and `ssh_add_command`.
 - Performing network diagnostics relevant to remote connectivity (`ping_command`, `dig_command`).
 - Checking remote server ports or certificates using `openssl_command`.
@@ -47,7 +50,7 @@ Your capabilities include:
 You focus ONLY on remote interactions via SSH/SCP and related diagnostics. **You MUST delegate tasks** involving local system administration (package management, services), coding, debugging, complex builds, hardware interaction, or security scanning to the appropriate specialist agent (SysAdminAgent, CodingAgent, DebuggingAgent, BuildAgent, HardwareAgent, CybersecurityAgent). Use the `delegate_task` function provided by the Controller for delegation.
 
 IMPORTANT SAFETY WARNINGS:
-- `ssh_command` and `scp_command` are HIGH RISK and require confirmation. They operate without path safety restrictions on both local and remote systems. Ensure target host, commands, and paths are correct.
+- `ssh_command`, `ssh_commands` and `scp_command` are HIGH RISK and require confirmation. They operate without path safety restrictions on both local and remote systems. Ensure target host, commands, and paths are correct.
 - These tools use non-interactive modes (`BatchMode=yes`, `StrictHostKeyChecking=no`), which bypass some security prompts but require correct key setup. Password authentication is disabled.
 """
         super().__init__(
@@ -31,6 +31,7 @@ class SysAdminAgent(BaseAgent):
             # Process Management (kill is High-risk)
             "list_processes",
             "kill_process",
+            "kill_processes",
             # System Info
             "get_system_info",
             # Networking (Core)
@@ -57,7 +58,7 @@ Your capabilities include:
 - Executing general shell commands (`run_shell_command`) and commands requiring root privileges (`run_sudo_command`). Use these with EXTREME CAUTION.
 - Managing system packages using apt (`apt_command`) and yum/dnf (`yum_command`). These require sudo.
 - Managing system services using systemd (`systemctl_command`). This may require sudo for state changes or enabling/disabling.
-- Inspecting and managing running processes (`list_processes`, `kill_process`). Killing processes can be disruptive.
+- Inspecting and managing running processes (`list_processes`, `kill_process`, `kill_processes` for several PIDs at once). Killing processes can be disruptive.
 - Gathering system information (`get_system_info`).
 - Configuring network interfaces and inspecting connections (`ip_command`, `netstat_command`). Netstat may require sudo for full process info.
 - Creating and extracting archives (`tar_command`, `zip_command`, `unzip_command`).
@@ -67,7 +68,7 @@ Your capabilities include:
 You focus on system-level tasks on the *local* machine. **You MUST delegate tasks** involving complex software development/debugging, direct hardware interaction (serial, JTAG), complex builds (Makefiles, multi-language), security scanning, or remote server management via SSH/SCP to the appropriate specialist agent (CodingAgent, HardwareAgent, BuildAgent, CybersecurityAgent, RemoteOpsAgent). Use the `delegate_task` function provided by the Controller for delegation.
 
 IMPORTANT SAFETY WARNINGS:
-- `run_shell_command`, `run_sudo_command`, `apt_command`, `yum_command`, `systemctl_command` (with sudo), `kill_process`, and `edit_file` are HIGH RISK and require confirmation by default.
+- `run_shell_command`, `run_sudo_command`, `apt_command`, `yum_command`, `systemctl_command` (with sudo), `kill_process`, `kill_processes`, and `edit_file` are HIGH RISK and require confirmation by default.
 - Filesystem operations have NO path restrictions.
 - Be extremely careful when modifying system state, installing/removing packages, or managing services. Understand the consequences before acting.
 """
@@ -2,7 +2,7 @@ import os
 import logging
 import json
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, FrozenSet, Optional, Union
 
 from dotenv import load_dotenv
 
@@ -10,12 +10,18 @@ from dotenv import load_dotenv
 PROJECT_ROOT = Path(__file__).parent.parent.parent.resolve()
 DOTENV_PATH = PROJECT_ROOT / ".env"
 DEFAULT_COMMAND_TIMEOUT: int = 120
+DEFAULT_MAX_CONCURRENT_SUBPROCS: int = 32 # Cap on tool subprocesses alive at once (per event loop)
+DEFAULT_MAX_PARALLEL_TOOLS: int = 8 # Tool calls from one LLM turn executed at once (per agent run)
+DEFAULT_MAX_TOOL_OUTPUT_BYTES: int = 256 * 1024 # Per-stream cap on command output decoded into a tool result (0 = no cap)
+DEFAULT_SSH_MULTIPLEX_ENABLED: bool = True # Reuse one SSH master connection per host (ControlMaster)
+DEFAULT_SCP_COMPRESSION: bool = False # scp -C: helps compressible data on slow links, costs CPU on fast ones
+DEFAULT_PYTHON_SCRIPT_RUNNER_ENABLED: bool = True # python_run_script forks scripts from a warm interpreter (POSIX)
 DEFAULT_HIGH_RISK_TOOLS: List[str] = [
     "run_shell_command", "run_sudo_command", "apt_command", "yum_command",
-    "systemctl_command", "kill_process", "edit_file", "esptool_command",
-    "openocd_command", "ssh_command", "scp_command", "gdb_mi_command",
+    "systemctl_command", "kill_process", "kill_processes", "edit_file", "esptool_command",
+    "openocd_command", "ssh_command", "ssh_commands", "scp_command", "gdb_mi_command",
     "nmap_scan", "sqlmap_scan", "nikto_scan", "msfvenom_generate",
-    "gobuster_scan", "make_command", "gcc_compile",
+    "gobuster_scan", "parallel_scan", "make_command", "gcc_compile",
 ]
 DEFAULT_AGENT_LLM_CONFIG: Dict[str, Dict[str, Any]] = {
     "ControllerAgent": {"provider": "gemini", "model": "gemini-1.5-flash-latest"},
@@ -32,15 +38,24 @@ DEFAULT_AGENT_STATE_DIR_STR: str = str(PROJECT_ROOT / "agent_state")
 DEFAULT_LOG_LEVEL_STR: str = "INFO" # Default log level string
 DEFAULT_MAX_GLOBAL_TOKENS: int = 1_000_000
 DEFAULT_WARN_TOKEN_THRESHOLD: int = 800_000
+DEFAULT_SESSION_LRU_CAP: int = 100 # Web sessions whose agent controllers stay in memory (least recently used dropped first)
 
 # --- Placeholder Variables ---
 COMMAND_TIMEOUT: int = DEFAULT_COMMAND_TIMEOUT
+MAX_CONCURRENT_SUBPROCS: int = DEFAULT_MAX_CONCURRENT_SUBPROCS
+MAX_PARALLEL_TOOLS: int = DEFAULT_MAX_PARALLEL_TOOLS
+MAX_TOOL_OUTPUT_BYTES: int = DEFAULT_MAX_TOOL_OUTPUT_BYTES
+SSH_MULTIPLEX_ENABLED: bool = DEFAULT_SSH_MULTIPLEX_ENABLED
+SCP_COMPRESSION: bool = DEFAULT_SCP_COMPRESSION
+PYTHON_SCRIPT_RUNNER_ENABLED: bool = DEFAULT_PYTHON_SCRIPT_RUNNER_ENABLED
 HIGH_RISK_TOOLS: List[str] = DEFAULT_HIGH_RISK_TOOLS
+HIGH_RISK_TOOLS_SET: FrozenSet[str] = frozenset(DEFAULT_HIGH_RISK_TOOLS) # O(1) lookups on every tool call; kept in sync below
 AGENT_LLM_CONFIG: Dict[str, Dict[str, Any]] = DEFAULT_AGENT_LLM_CONFIG
 AGENT_STATE_DIR: Path = Path(DEFAULT_AGENT_STATE_DIR_STR)
 LOG_LEVEL: int = logging.INFO # Initialize with a default
 MAX_GLOBAL_TOKENS: int = DEFAULT_MAX_GLOBAL_TOKENS
 WARN_TOKEN_THRESHOLD: int = DEFAULT_WARN_TOKEN_THRESHOLD
+SESSION_LRU_CAP: int = DEFAULT_SESSION_LRU_CAP
 
 # --- Initialization Function ---
 _settings_initialized = False
@@ -48,8 +63,8 @@ _settings_initialized = False
 def initialize_settings():
     """Loads .env, calculates final settings values, and configures logging."""
     global _settings_initialized
-    global COMMAND_TIMEOUT, HIGH_RISK_TOOLS, AGENT_LLM_CONFIG, AGENT_STATE_DIR
-    global LOG_LEVEL, MAX_GLOBAL_TOKENS, WARN_TOKEN_THRESHOLD
+    global COMMAND_TIMEOUT, MAX_CONCURRENT_SUBPROCS, MAX_PARALLEL_TOOLS, MAX_TOOL_OUTPUT_BYTES, SSH_MULTIPLEX_ENABLED, SCP_COMPRESSION, PYTHON_SCRIPT_RUNNER_ENABLED, HIGH_RISK_TOOLS, HIGH_RISK_TOOLS_SET, AGENT_LLM_CONFIG, AGENT_STATE_DIR
+    global LOG_LEVEL, MAX_GLOBAL_TOKENS, WARN_TOKEN_THRESHOLD, SESSION_LRU_CAP
 
     if _settings_initialized:
         # Prevent re-initialization which could reset logging handlers etc.
@@ -80,7 +95,14 @@ def initialize_settings():
     # --- Calculate Final Settings ---
     # (Logic unchanged)
     COMMAND_TIMEOUT = get_env_var_local("DEFAULT_COMMAND_TIMEOUT", DEFAULT_COMMAND_TIMEOUT, int)
+    MAX_CONCURRENT_SUBPROCS = max(1, get_env_var_local("MAX_CONCURRENT_SUBPROCS", DEFAULT_MAX_CONCURRENT_SUBPROCS, int))
+    MAX_PARALLEL_TOOLS = max(1, get_env_var_local("MAX_PARALLEL_TOOLS", DEFAULT_MAX_PARALLEL_TOOLS, int))
+    MAX_TOOL_OUTPUT_BYTES = max(0, get_env_var_local("MAX_TOOL_OUTPUT_BYTES", DEFAULT_MAX_TOOL_OUTPUT_BYTES, int))
+    SSH_MULTIPLEX_ENABLED = get_env_var_local("SSH_MULTIPLEX_ENABLED", DEFAULT_SSH_MULTIPLEX_ENABLED, bool)
+    SCP_COMPRESSION = get_env_var_local("SCP_COMPRESSION", DEFAULT_SCP_COMPRESSION, bool)
+    PYTHON_SCRIPT_RUNNER_ENABLED = get_env_var_local("PYTHON_SCRIPT_RUNNER_ENABLED", DEFAULT_PYTHON_SCRIPT_RUNNER_ENABLED, bool)
     HIGH_RISK_TOOLS = get_env_var_local("HIGH_RISK_TOOLS", DEFAULT_HIGH_RISK_TOOLS, list)
+    HIGH_RISK_TOOLS_SET = frozenset(HIGH_RISK_TOOLS)
     AGENT_LLM_CONFIG = DEFAULT_AGENT_LLM_CONFIG.copy()
     for name in AGENT_LLM_CONFIG.keys():
         m = get_env_var_local(f"{name.upper()}_MODEL", None, str); p = get_env_var_local(f"{name.upper()}_PROVIDER", None, str); b = get_env_var_local(f"{name.upper()}_BASE_URL", None, str)
@@ -100,6 +122,7 @@ def initialize_settings():
             if "model" not in conf or not conf["model"]: raise ValueError(f"Ollama agent '{name}' needs model defined.")
     MAX_GLOBAL_TOKENS = get_env_var_local("MAX_GLOBAL_TOKENS", DEFAULT_MAX_GLOBAL_TOKENS, int)
     WARN_TOKEN_THRESHOLD = get_env_var_local("WARN_TOKEN_THRESHOLD", DEFAULT_WARN_TOKEN_THRESHOLD, int)
+    SESSION_LRU_CAP = max(1, get_env_var_local("SESSION_LRU_CAP", DEFAULT_SESSION_LRU_CAP, int))
     AGENT_STATE_DIR_STR = get_env_var_local("AGENT_STATE_DIR", DEFAULT_AGENT_STATE_DIR_STR, str)
     AGENT_STATE_DIR = Path(AGENT_STATE_DIR_STR).resolve()
     try: AGENT_STATE_DIR.mkdir(parents=True, exist_ok=True)
@@ -126,8 +149,15 @@ def initialize_settings():
     logging.info(f".env Path: {DOTENV_PATH} (Loaded: {DOTENV_PATH.exists()})")
     logging.info(f"Effective Log Level: {logging.getLevelName(LOG_LEVEL)}") # Log the level actually being used
     logging.info(f"Command Timeout: {COMMAND_TIMEOUT}s")
+    logging.info(f"Max Concurrent Subprocesses: {MAX_CONCURRENT_SUBPROCS}")
+    logging.info(f"Max Parallel Tool Calls: {MAX_PARALLEL_TOOLS}")
+    logging.info(f"Max Tool Output: {f'{MAX_TOOL_OUTPUT_BYTES} bytes per stream' if MAX_TOOL_OUTPUT_BYTES > 0 else 'Unlimited'}")
+    logging.info(f"SSH Multiplexing: {'Enabled' if SSH_MULTIPLEX_ENABLED else 'Disabled'}")
+    logging.info(f"SCP Compression: {'Enabled' if SCP_COMPRESSION else 'Disabled'}")
+    logging.info(f"Python Script Runner: {'Enabled' if PYTHON_SCRIPT_RUNNER_ENABLED else 'Disabled'}")
     logging.info(f"High-Risk Tools: {HIGH_RISK_TOOLS if HIGH_RISK_TOOLS else 'NONE'}")
     logging.info(f"Agent State Directory: {AGENT_STATE_DIR}")
+    logging.info(f"Web Session Cache: {SESSION_LRU_CAP} controllers")
     logging.info(f"Token Quota - Max Global: {MAX_GLOBAL_TOKENS if MAX_GLOBAL_TOKENS > 0 else 'Disabled'}")
     logging.info(f"Token Quota - Warn Threshold: {WARN_TOKEN_THRESHOLD if WARN_TOKEN_THRESHOLD > 0 and MAX_GLOBAL_TOKENS > 0 else 'Disabled'}")
     logging.debug(f"Agent LLM Config (Final):\n{json.dumps(AGENT_LLM_CONFIG, indent=2)}") # This will only show if LOG_LEVEL=DEBUG
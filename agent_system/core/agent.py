@@ -192,7 +192,7 @@ class BaseAgent:
             else: error = f"Tool '{tool_name}' not available or not allowed for {agent_id_log}."
             is_error = True; logging.error(error)
         else:
-            if tool_name in settings.HIGH_RISK_TOOLS:
+            if tool_name in settings.HIGH_RISK_TOOLS_SET:
                  if not await ask_confirmation_async(tool_name, args):
                      result = f"Operation cancelled by user for tool: {tool_name}."; is_error = False
                      logging.warning(f"Execution of '{tool_name}' cancelled by user for {agent_id_log}.")
@@ -236,6 +236,10 @@ class BaseAgent:
             )
         except Exception as start_err: return f"[Error: Failed to start chat session: {start_err}]"
         current_prompt_parts: List[Union[str, ToolResult]] = [user_prompt]
+        # Bounds this run's concurrent tool calls; per run, so delegated sub-agent runs never wait on their caller's slots
+        tool_slots = asyncio.Semaphore(max(1, settings.MAX_PARALLEL_TOOLS))
+        async def execute_bounded(tc: ToolCall) -> ToolResult:
+            async with tool_slots: return await self._execute_tool(tc)
         while tool_round < max_tool_rounds:
             tool_round += 1; logging.info(f"--- {agent_id_log} | LLM Turn {tool_round}/{max_tool_rounds} ---")
             current_total_tokens = self.total_prompt_tokens + self.total_completion_tokens
@@ -257,7 +261,7 @@ class BaseAgent:
                 else: final_response = text_response if text_response is not None else "[Error: LLM provided no response content.]"; logging.warning(f"{agent_id_log}: LLM provided no response content."); break
                 if not tool_calls: final_response = text_response if text_response is not None else "[Agent finished without final text response]"; logging.info(f"--- {agent_id_log} Final Response ---"); break
                 logging.info(f"{agent_id_log}: Processing {len(tool_calls)} tool call(s) concurrently...")
-                tool_tasks = [asyncio.create_task(self._execute_tool(tc)) for tc in tool_calls]
+                tool_tasks = [asyncio.create_task(execute_bounded(tc)) for tc in tool_calls]
                 tool_results: List[ToolResult] = await asyncio.gather(*tool_tasks)
                 if tool_results: self.history.append(ChatMessage(role="tool", parts=tool_results))
                 current_prompt_parts = tool_results
@@ -6,9 +6,14 @@ from typing import List, Dict, Any, Optional, Tuple, Union
 
 # Import the registration decorator and utility functions/settings
 from . import register_tool
-from .tool_utils import run_tool_command_async, ask_confirmation_async
+from .tool_utils import run_tool_command_async, ask_confirmation_async, validate_tool_options, _UNSAFE_CHARS_RE
 from agent_system.config import settings
 
+# gcc_compile option screening: accepted flag prefixes and exact flags, and prefixes that are always refused
+_GCC_SAFE_PREFIXES = ('-I', '-L', '-D', '-U', '-l', '-W', '-O', '-g', '-std=', '-march=', '-mtune=', '-m')
+_GCC_SAFE_FLAGS = frozenset({'-c', '-S', '-E', '-shared', '-static', '-pie', '-fPIC', '-pthread'})
+_GCC_RISKY_PREFIXES = ('-fplugin=', '-specs=', '-wrapper', '-imacros', '-include')
+
 @register_tool
 async def make_command(
     target: Optional[str] = None,
@@ -48,17 +53,10 @@ async def make_command(
         command = ["make"]
 
         # Validate and add options
-        safe_options = []
-        if options:
-             if not isinstance(options, list): return "Error: 'options' argument must be a list of strings."
-             for opt in options:
-                 opt_str = str(opt)
-                 # Allow simple flags (-j4) or assignments (VAR=val), block complex chars
-                 if (opt_str.startswith('-') or '=' in opt_str) and not any(c in opt_str for c in ';|&`$()<>'):
-                     safe_options.append(opt_str)
-                 else:
-                     logging.warning(f"Skipping potentially unsafe or invalid make option: {opt_str}")
-             command.extend(safe_options)
+        # Allow simple flags (-j4) or assignments (VAR=val), block complex chars
+        safe_options, error = validate_tool_options(options, "make", lambda o: o.startswith('-') or '=' in o)
+        if error: return error
+        command.extend(safe_options)
 
         # Validate and add target
         safe_target = None
@@ -145,13 +143,11 @@ async def cmake_configure(
              if not isinstance(options, list): return "Error: 'options' argument must be a list of strings."
              for opt in options:
                  opt_str = str(opt)
-                 # Allow -DVAR=VALUE, -G "Generator Name", etc. Block complex chars.
+                 # Allow -DVAR=VALUE, -G "Generator Name", etc. Block complex chars (one regex search per option).
                  # Be cautious with quotes within options, shlex might handle them?
-                 if opt_str.startswith('-') and not any(c in opt_str for c in ';|&`$()<>'):
+                 # Generator names following -G may contain spaces
+                 if not _UNSAFE_CHARS_RE.search(opt_str) and (opt_str.startswith('-') or (safe_options and safe_options[-1] == "-G")):
                      safe_options.append(opt_str)
-                 # Allow generator names which might contain spaces
-                 elif safe_options and safe_options[-1] == "-G" and not any(c in opt_str for c in ';|&`$()<>'):
-                      safe_options.append(opt_str)
                  else:
                      logging.warning(f"Skipping potentially unsafe or invalid cmake option: {opt_str}")
              command.extend(safe_options)
@@ -256,18 +252,17 @@ async def gcc_compile(
                  # Allow common flags (-Wall, -O2, -lm, -I/path, -L/path, -o, -c, -g, -shared, -std=...)
                  # Be cautious with flags like -fplugin=, -specs=, @file
                  # Basic check: starts with '-' or is a linker script (-T file.ld), block obvious risks.
-                 is_potentially_safe = False
-                 if opt_str.startswith(('-I', '-L', '-D', '-U', '-l', '-W', '-O', '-g', '-std=', '-march=', '-mtune=', '-m')): is_potentially_safe = True
-                 elif opt_str in ['-c', '-S', '-E', '-shared', '-static', '-pie', '-fPIC', '-pthread']: is_potentially_safe = True
-                 elif opt_str.startswith('-T') and len(opt_str) > 2 : is_potentially_safe = True # Linker script
+                 is_potentially_safe = (
+                     opt_str.startswith(_GCC_SAFE_PREFIXES) or opt_str in _GCC_SAFE_FLAGS
+                     or (opt_str.startswith('-T') and len(opt_str) > 2) # Linker script
+                 )
                  # Disallow flags known to be risky for arbitrary execution if possible
-                 known_risky = ['-fplugin=', '-specs=', '-wrapper', '-imacros', '-include']
-                 if any(opt_str.startswith(risky) for risky in known_risky):
+                 if opt_str.startswith(_GCC_RISKY_PREFIXES):
                       logging.error(f"BLOCKING potentially dangerous gcc option: {opt_str}")
                       return f"Error: Potentially dangerous gcc option blocked: {opt_str}"
 
                  # General check for suspicious characters if not specifically allowed above
-                 if is_potentially_safe and not any(c in opt_str for c in ';|&`$()<>'):
+                 if is_potentially_safe and not _UNSAFE_CHARS_RE.search(opt_str):
                      safe_options.append(opt_str)
                  elif not is_potentially_safe and opt_str.startswith('-'): # Unrecognized flag
                      logging.warning(f"Skipping potentially unsafe or unrecognized gcc option: {opt_str}")
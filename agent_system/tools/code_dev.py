@@ -129,7 +129,6 @@ async def run_pytest(path: str = ".") -> str:
     return await run_tool_command_async(
         tool_name="run_pytest",
         command=command,
-        cwd=Path.cwd(), # Run from script CWD for potentially better module discovery
         timeout=600, # Allow time for tests to run
         success_rc=[0, 5],
         failure_notes={
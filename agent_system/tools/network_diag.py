@@ -7,9 +7,17 @@ from typing import List, Dict, Any, Optional, Tuple, Union
 
 # Import the registration decorator and utility functions/settings
 from . import register_tool
-from .tool_utils import run_tool_command_async, run_tool_command_sync, ask_confirmation_async
+from .tool_utils import _run_command_async, run_tool_command_async, run_tool_command_sync, ask_confirmation_async
 from agent_system.config import settings
 
+# Argv prefix for privileged execution ("--" stops sudo option parsing)
+_SUDO_PREFIX = ("sudo", "--")
+# Encodings for decoding command output (fixed for the process lifetime)
+_STDOUT_ENC = sys.stdout.encoding or 'utf-8'
+_STDERR_ENC = sys.stderr.encoding or 'utf-8'
+# Stderr markers that make netstat_command retry via sudo; matched against the raw bytes (ASCII lower())
+_PERMISSION_ERROR_MARKERS = (b"permission denied", b"operation not permitted")
+
 @register_tool
 async def ip_command(args: List[str]) -> str:
     """
@@ -52,15 +60,15 @@ async def netstat_command(options: List[str] = ["-tulnp"]) -> str:
     try:
         # Use internal helper directly to check stderr before formatting output
         success, stdout_bytes, stderr_bytes, rc = await _run_command_async(cmd)
-        stdout = stdout_bytes.decode(sys.stdout.encoding or 'utf-8', errors='replace')
-        stderr = stderr_bytes.decode(sys.stderr.encoding or 'utf-8', errors='replace')
+        stdout = stdout_bytes.decode(_STDOUT_ENC, errors='replace')
 
         if success:
             return f"Netstat successful (no sudo):\nOptions: {' '.join(safe_options)}\nOutput:\n```\n{stdout}\n```"
         else:
+            stderr = stderr_bytes.decode(_STDERR_ENC, errors='replace')
             # --- Check if permission denied, then try sudo ---
-            permission_errors = ["permission denied", "operation not permitted"]
-            if rc != 0 and any(p_err in stderr.lower() for p_err in permission_errors):
+            stderr_lower = stderr_bytes.lower()
+            if rc != 0 and any(p_err in stderr_lower for p_err in _PERMISSION_ERROR_MARKERS):
                 logging.warning(f"netstat failed without sudo (RC={rc}, Stderr: {stderr}). Attempting with sudo.")
                 # Confirmation for run_sudo_command itself is handled by agent if it's high risk
                 # Ask confirmation *specifically* for escalating netstat via sudo:
@@ -69,7 +77,7 @@ async def netstat_command(options: List[str] = ["-tulnp"]) -> str:
                      # Directly call run_tool_command_async for sudo execution
                      sudo_result = await run_tool_command_async(
                           tool_name="run_sudo_command (for netstat)",
-                          command=["sudo", "--"] + cmd,
+                          command=[*_SUDO_PREFIX, *cmd],
                           timeout=60 # Reasonable timeout for sudo netstat
                      )
                      return f"Attempted 'sudo netstat' after permission error.\nSudo Result:\n{sudo_result}"
@@ -77,7 +85,7 @@ async def netstat_command(options: List[str] = ["-tulnp"]) -> str:
                      return f"Standard 'netstat' failed with permission error (RC={rc}, Stderr: {stderr}). User cancelled sudo attempt."
             else:
                 # Failed for other reasons, format using standard wrapper logic
-                cmd_display = ' '.join(shlex.quote(str(c)) for c in cmd)
+                cmd_display = shlex.join(cmd)
                 status_msg = 'Success (non-zero RC)' if stdout else 'Failed' # Consider it success if there's output?
                 result_str = f"Tool 'netstat_command' finished (RC={rc}). Command: `{cmd_display}`\nStatus: {status_msg}\n"
                 if stdout: result_str += f"Stdout:\n```\n{stdout}\n```\n"
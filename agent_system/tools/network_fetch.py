@@ -10,6 +10,9 @@ from . import register_tool
 from .tool_utils import run_tool_command_async, ask_confirmation_async
 from agent_system.config import settings
 
+# Fixed curl prefix: silent (-s) but show errors (-S), follow redirects (-L)
+_CURL_BASE = ("curl", "-sS", "-L")
+
 # Note: These tools execute external commands (curl, wget).
 # For purely async Python HTTP requests, consider using httpx or aiohttp directly
 # within tool implementations if preferred over subprocess calls.
@@ -49,12 +52,8 @@ async def curl_command(
     logging.info(f"Preparing curl request: {safe_method} {url}")
 
     # Build command list safely
-    command: List[str] = [
-        "curl",
-        "-sS", # Silent (-s) but show errors (-S)
-        "-L", # Follow redirects
-        "-X", safe_method
-    ]
+    command: List[str] = list(_CURL_BASE)
+    command.extend(["-X", safe_method])
 
     # Add headers safely
     if headers:
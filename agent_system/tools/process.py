@@ -1,17 +1,154 @@
+import functools
+import json
 import logging
+import re
 import shlex
 import sys
 import signal
+import socket
 import asyncio
+import tempfile
+import weakref
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple, Union
 import os # Needed for access check
 
 # Import the registration decorator and utility functions/settings
 from . import register_tool
-from .tool_utils import run_tool_command_async, run_tool_command_sync, ask_confirmation_async
+from .tool_utils import _run_command_async, _get_subprocess_semaphore, format_tool_result, run_tool_command_async, run_tool_command_sync, ask_confirmation_async, resolve_regular_file_async, run_blocking, is_fixed_string, c_locale_env
 from agent_system.config import settings
 
+# Encodings for decoding subprocess output, looked up once rather than per decode
+_STDOUT_ENC = sys.stdout.encoding or 'utf-8'
+_STDERR_ENC = sys.stderr.encoding or 'utf-8'
+
+# Signal sets used to sanity-check kill requests (computed once at import)
+_VALID_SIGS = frozenset(range(1, signal.NSIG))
+_COMMON_SIGS = frozenset({signal.SIGTERM, signal.SIGKILL, signal.SIGHUP, signal.SIGINT})
+
+# Fixed command shapes, built once (copied with list(...) where a mutable command is needed)
+_PS_AUX_CMD = ("ps", "aux")
+_SUDO_PREFIX = ("sudo", "--")
+# list_processes column selection ('ps -eo'): 'narrow' drops the per-process argv, which dominates 'ps aux' output
+_PS_NARROW_COLUMNS = "user,pid,pcpu,pmem,comm"
+_PS_COLUMNS_RE = re.compile(r"[a-z0-9_]+(,[a-z0-9_]+)*")
+_PS_AUX_HEADER = b"USER PID %CPU %MEM VSZ RSS TTY STAT START TIME COMMAND" # Fallback if ps printed no header
+# list_processes filters in Python up to this many bytes of ps output, and falls back to grep -E beyond it
+# (and for patterns using ERE-only syntax or repeated groups, as grep_files does)
+_INPROC_FILTER_MAX_BYTES = 4 * 1024 * 1024
+# get_system_info: single-purpose commands, plus (where the platform allows it) one batched
+# command whose output is split back into several sections. Batching replaces a spawn per field.
+_INFO_BATCH_SEP = "--T5000-SECTION--"
+_INFO_BATCH: Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]] = None # (command, section names)
+if sys.platform.startswith("linux"):
+    _INFO_CMDS: Dict[str, Tuple[str, ...]] = {
+        "OS": ("uname", "-a"), "Hostname": ("hostname",), "Uptime": ("uptime",),
+        "CPU Info": ("lscpu",), "Memory Info": ("free", "-h"),
+    }
+elif sys.platform == "darwin":
+    _INFO_CMDS = {"OS": ("sw_vers",), "Hostname": ("hostname",), "Uptime": ("uptime",)}
+    # sysctl -n prints one value per line, in argument order
+    _INFO_BATCH = (("sysctl", "-n", "machdep.cpu.brand_string", "hw.memsize"),
+                   ("CPU Info", "Memory Info (RAM Bytes)"))
+elif sys.platform == "win32":
+    _INFO_CMDS = {"Hostname": ("hostname",)}
+    # One PowerShell process instead of three wmic spawns; sections are separated by marker lines
+    _INFO_BATCH = (("powershell", "-NoProfile", "-NonInteractive", "-Command",
+                    "(Get-CimInstance Win32_OperatingSystem | Format-List Caption,Version,OSArchitecture | Out-String).Trim(); "
+                    f"'{_INFO_BATCH_SEP}'; "
+                    "(Get-CimInstance Win32_Processor | Format-List Name,NumberOfCores,NumberOfLogicalProcessors | Out-String).Trim(); "
+                    f"'{_INFO_BATCH_SEP}'; "
+                    "(Get-CimInstance Win32_ComputerSystem).TotalPhysicalMemory"),
+                   ("OS", "CPU Info", "Memory Info (Bytes)"))
+else:
+    _INFO_CMDS = {"OS": ("uname", "-a"), "Hostname": ("hostname",), "Uptime": ("uptime",)}
+_INFO_SECTIONS: Tuple[str, ...] = tuple(_INFO_CMDS) + (_INFO_BATCH[1] if _INFO_BATCH else ())
+# Sections that cannot change while this process runs; successful results are cached after the first call.
+# Uptime and 'free -h' memory usage are time-varying and always re-run.
+_STATIC_INFO_KEYS = frozenset({"OS", "Hostname", "CPU Info", "Memory Info (RAM Bytes)", "Memory Info (Bytes)"})
+_static_info_cache: Dict[str, str] = {}
+
+@functools.lru_cache(maxsize=64)
+def _compile_filter(filter_pattern: str) -> Optional["re.Pattern[bytes]"]:
+    """
+    Compiles a fixed-string list_processes filter against raw ps bytes, or returns None for a regex,
+    which goes to 'grep -E'. Cached for repeated (monitoring) calls.
+    """
+    if not is_fixed_string(filter_pattern):
+        return None
+    return re.compile(re.escape(filter_pattern.encode(_STDOUT_ENC, 'replace')))
+
+def _filter_lines(pattern: "re.Pattern[bytes]", body: bytes) -> List[bytes]:
+    """Lines of `body` that `pattern` matches (run in the tool I/O pool: up to a few MB of ps output)."""
+    return [line for line in body.splitlines() if pattern.search(line)]
+
+def _format_kib(kib: int) -> str:
+    """Formats a /proc/meminfo kB value like 'free -h' (binary units)."""
+    if kib <= 0: return "0B"
+    value = float(kib)
+    for unit in ("Ki", "Mi", "Gi"):
+        if value < 1024: return f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}Ti"
+
+def _read_linux_info() -> Dict[str, str]:
+    """
+    Builds get_system_info sections straight from uname(2) and /proc (no fork/exec).
+    Returns only the sections it could produce; the caller runs the command for any missing one.
+    Blocking file reads - call via asyncio.to_thread.
+    """
+    info: Dict[str, str] = {}
+    u = os.uname()
+    info["OS"] = f"{u.sysname} {u.nodename} {u.release} {u.version} {u.machine}"
+    info["Hostname"] = socket.gethostname()
+    try:
+        with open("/proc/uptime", "rb") as f: up_seconds = int(float(f.read().split()[0]))
+        days, rem = divmod(up_seconds, 86400)
+        hours, minutes = rem // 3600, (rem % 3600) // 60
+        up = f"up {days} day{'s' if days != 1 else ''}, {hours:02d}:{minutes:02d}" if days else f"up {hours:02d}:{minutes:02d}"
+        load = ", ".join(f"{x:.2f}" for x in os.getloadavg())
+        info["Uptime"] = f"{up}, load average: {load}"
+    except (OSError, ValueError, IndexError) as e: logging.debug(f"/proc/uptime unavailable: {e}")
+    try:
+        model: Optional[str] = None
+        n_cpus = 0
+        with open("/proc/cpuinfo", "rb") as f:
+            for line in f:
+                if line.startswith(b"processor"): n_cpus += 1
+                elif model is None and line.startswith(b"model name"):
+                    model = line.partition(b":")[2].strip().decode('utf-8', errors='replace')
+        # Some architectures (e.g. many ARM kernels) have no 'model name'; lscpu handles those
+        if model and n_cpus: info["CPU Info"] = f"Model name: {model}\nCPU(s): {n_cpus}"
+    except OSError as e: logging.debug(f"/proc/cpuinfo unavailable: {e}")
+    try:
+        mem: Dict[bytes, int] = {}
+        with open("/proc/meminfo", "rb") as f:
+            for line in f:
+                key, _, rest = line.partition(b":")
+                if key in (b"MemTotal", b"MemFree", b"MemAvailable", b"SwapTotal", b"SwapFree"):
+                    mem[key] = int(rest.split()[0])
+        if b"MemTotal" in mem and b"MemFree" in mem:
+            info["Memory Info"] = (
+                f"Mem: total {_format_kib(mem[b'MemTotal'])}, free {_format_kib(mem[b'MemFree'])}, "
+                f"available {_format_kib(mem.get(b'MemAvailable', mem[b'MemFree']))}\n"
+                f"Swap: total {_format_kib(mem.get(b'SwapTotal', 0))}, free {_format_kib(mem.get(b'SwapFree', 0))}"
+            )
+    except (OSError, ValueError, IndexError) as e: logging.debug(f"/proc/meminfo unavailable: {e}")
+    return info
+
+def _split_info_batch(output: str, names: Tuple[str, ...]) -> Dict[str, str]:
+    """Splits batched get_system_info output into per-section strings (marker lines, else one line each)."""
+    lines = output.splitlines()
+    if any(line.strip() == _INFO_BATCH_SEP for line in lines):
+        chunks: List[List[str]] = [[]]
+        for line in lines:
+            if line.strip() == _INFO_BATCH_SEP: chunks.append([])
+            else: chunks[-1].append(line)
+        parts = ["\n".join(chunk).strip() for chunk in chunks]
+    else:
+        parts = [line.strip() for line in lines]
+    return {name: part for name, part in zip(names, parts) if part}
+
 # --- Process Management Tools ---
 
 @register_tool
@@ -50,11 +187,12 @@ async def run_sudo_command(command_args: List[str]) -> str:
     # Confirmation is handled by the agent before calling this tool
     if not command_args:
         return "Error: No command provided to run_sudo_command."
-    # Ensure all args are strings
-    safe_args = [str(arg) for arg in command_args]
+    # Ensure all args are strings (they normally already are; only coerce when needed)
+    safe_args = command_args if all(type(arg) is str for arg in command_args) else [str(arg) for arg in command_args]
     logging.critical(f"Executing sudo command: {' '.join(safe_args)}")
     # Use -- to prevent sudo parsing args after it, even if command starts with '-'
-    command = ["sudo", "--"] + safe_args
+    # (_run_command_async requires a list, so build one in a single step rather than list + list)
+    command = [*_SUDO_PREFIX, *safe_args]
     return await run_tool_command_async(
         tool_name="run_sudo_command",
         command=command,
@@ -62,55 +200,76 @@ async def run_sudo_command(command_args: List[str]) -> str:
     )
 
 @register_tool
-async def list_processes(filter_pattern: Optional[str] = None) -> str:
+async def list_processes(filter_pattern: Optional[str] = None, columns: Optional[str] = None) -> str:
     """
-    Lists running processes using 'ps aux'. Optionally filters the output using 'grep -E'.
+    Lists running processes using 'ps aux'. Optionally filters the output with an ERE regex
+    (piped through 'grep -E'; plain strings on listings up to a few MB are matched in-process).
 
     Args:
-        filter_pattern: Optional regex pattern to filter processes (passed to grep -E).
+        filter_pattern: Optional regex pattern to filter processes (header line is always kept).
+        columns: Optional column selection for smaller output: 'narrow' (user,pid,pcpu,pmem,comm -
+                 command name only, no arguments) or a comma-separated list of ps -o keywords
+                 (e.g. 'pid,rss,args'). Default: full 'ps aux' output.
 
     Returns:
         Formatted string listing processes or an error message.
     """
-    ps_command = ["ps", "aux"]
+    if columns is None:
+        ps_command = list(_PS_AUX_CMD)
+    else:
+        cols = _PS_NARROW_COLUMNS if columns == "narrow" else columns.replace(" ", "")
+        if not _PS_COLUMNS_RE.fullmatch(cols):
+            return f"Error: Invalid columns '{columns}'. Use 'narrow' or comma-separated ps keywords (e.g. 'pid,rss,args')."
+        ps_command = ["ps", "-eo", cols]
     try:
-        # Run ps aux first
-        ps_success, ps_stdout_bytes, ps_stderr_bytes, ps_rc = await _run_command_async(ps_command)
+        # Run ps first
+        ps_success, ps_stdout_bytes, ps_stderr_bytes, ps_rc = await _run_command_async(ps_command, env=c_locale_env())
 
         if not ps_success:
-             ps_stderr = ps_stderr_bytes.decode(sys.stderr.encoding or 'utf-8', errors='replace')
-             ps_stdout = ps_stdout_bytes.decode(sys.stdout.encoding or 'utf-8', errors='replace')
-             return f"Failed to list processes using 'ps aux' (RC={ps_rc}):\nStderr: {ps_stderr}\nStdout: {ps_stdout}"
-
-        ps_output_str = ps_stdout_bytes.decode(sys.stdout.encoding or 'utf-8', errors='replace')
+             ps_stderr = ps_stderr_bytes.decode(_STDERR_ENC, 'replace')
+             ps_stdout = ps_stdout_bytes.decode(_STDOUT_ENC, 'replace')
+             return f"Failed to list processes using '{' '.join(ps_command)}' (RC={ps_rc}):\nStderr: {ps_stderr}\nStdout: {ps_stdout}"
 
         if not filter_pattern:
-             # Return all processes if no filter
-             num_lines = len(ps_output_str.splitlines())
-             header = "All running processes" if num_lines <=1 else f"All running processes ({num_lines -1} processes found)" # Corrected line count
+             # Return all processes if no filter (only this branch needs the full decoded listing)
+             ps_output_str = ps_stdout_bytes.decode(_STDOUT_ENC, 'replace')
+             # Count body lines only (header excluded) without materializing a list of lines
+             _, _, body = ps_output_str.partition('\n')
+             num_procs = body.count('\n') + (1 if body and not body.endswith('\n') else 0)
+             header = "All running processes" if num_procs == 0 else f"All running processes ({num_procs} processes found)"
              return f"{header}:\n```\n{ps_output_str}\n```"
+        pattern = _compile_filter(filter_pattern) if len(ps_stdout_bytes) <= _INPROC_FILTER_MAX_BYTES else None
+        if pattern is not None:
+            # Filter in-process: no second fork, no pipe round-trip, decode only the matched lines
+            logging.info(f"Filtering process list in-process with pattern: '{filter_pattern}'")
+            header_bytes, _, body_bytes = ps_stdout_bytes.partition(b'\n')
+            matched = await run_blocking(_filter_lines, pattern, body_bytes)
+            if not matched: return f"No processes found matching pattern: '{filter_pattern}'"
+            # Single decode of header + matched rows
+            filtered = b"\n".join([header_bytes or _PS_AUX_HEADER, *matched]).decode(_STDOUT_ENC, 'replace')
+            return f"Filtered processes matching '{filter_pattern}':\n```\n{filtered}\n```"
         else:
-            # Use grep for filtering - run grep asynchronously as well
+            # Regexes and very large listings: stream through grep -E instead of scanning in Python
             grep_command = ["grep", "-E", "--", filter_pattern]
             logging.info(f"Filtering process list with grep pattern: '{filter_pattern}'")
 
             grep_success, grep_stdout_bytes, grep_stderr_bytes, grep_rc = await _run_command_async(
                 grep_command,
-                input_data=ps_stdout_bytes # Pipe ps output bytes directly to grep input
+                input_data=ps_stdout_bytes, # Pipe ps output bytes directly to grep input
+                env=c_locale_env()
             )
 
-            grep_stdout = grep_stdout_bytes.decode(sys.stdout.encoding or 'utf-8', errors='replace')
-            grep_stderr = grep_stderr_bytes.decode(sys.stderr.encoding or 'utf-8', errors='replace')
-
             # grep rc 0=found, 1=not found, >1=error
             if grep_rc == 0:
-                 filtered_lines = [line for line in grep_stdout.splitlines() if ' grep -E -- ' not in line]
-                 if not filtered_lines: return f"No processes found matching pattern: '{filter_pattern}' (excluding grep itself)."
-                 header = ps_output_str.splitlines()[0] if ps_output_str.splitlines() else "USER PID %CPU %MEM VSZ RSS TTY STAT START TIME COMMAND"
-                 return f"Filtered processes matching '{filter_pattern}':\n```\n" + header + "\n" + "\n".join(filtered_lines) + "\n```"
+                 # Header comes from ps, rows from grep; join the bytes and decode once
+                 header_bytes = ps_stdout_bytes.partition(b'\n')[0] or _PS_AUX_HEADER
+                 filtered = (header_bytes + b"\n" + grep_stdout_bytes.rstrip(b"\n")).decode(_STDOUT_ENC, 'replace')
+                 return f"Filtered processes matching '{filter_pattern}':\n```\n{filtered}\n```"
             elif grep_rc == 1:
                  return f"No processes found matching pattern: '{filter_pattern}'"
             else:
+                 grep_stdout = grep_stdout_bytes.decode(_STDOUT_ENC, 'replace')
+                 grep_stderr = grep_stderr_bytes.decode(_STDERR_ENC, 'replace')
                  return f"Error filtering processes with grep (RC={grep_rc}):\nStderr: {grep_stderr}\nStdout: {grep_stdout}"
 
     except FileNotFoundError: # If ps or grep not found
@@ -120,16 +279,64 @@ async def list_processes(filter_pattern: Optional[str] = None) -> str:
          return f"An unexpected error occurred while listing processes: {e}"
 
 
+def _try_kill(pid: int, sig: int) -> Optional[str]:
+    """Sends a signal via os.kill. Returns None on success, otherwise a short error description."""
+    try:
+        os.kill(pid, sig)
+        return None
+    except ProcessLookupError: return "No such process"
+    except PermissionError: return "Operation not permitted"
+    except OSError as e: return e.strerror or str(e)
+
+def _sudo_may_help() -> bool:
+    """
+    EPERM from os.kill is authoritative (unlike parsing kill's stderr), so the only open question
+    is whether escalating can change the outcome: as root it cannot, so don't prompt for sudo.
+    """
+    return hasattr(os, "geteuid") and os.geteuid() != 0
+
+async def _wait_pid_exit(pid: int, timeout: float) -> bool:
+    """
+    Waits up to `timeout` seconds for a process to exit. Returns True if it is gone.
+    Uses a pidfd registered with the event loop where available (Linux 5.3+), which is
+    event-driven; otherwise polls with os.kill(pid, 0).
+    """
+    loop = asyncio.get_running_loop()
+    pidfd: Optional[int] = None
+    if hasattr(os, "pidfd_open"):
+        try: pidfd = os.pidfd_open(pid)
+        except ProcessLookupError: return True
+        except OSError: pidfd = None # e.g. ENOSYS on older kernels - fall back to polling
+    if pidfd is not None:
+        exited = loop.create_future()
+        try:
+            loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(True))
+            await asyncio.wait_for(exited, timeout)
+            return True
+        except asyncio.TimeoutError: return False
+        finally:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+
+    deadline = loop.time() + timeout
+    while True:
+        try: os.kill(pid, 0)
+        except ProcessLookupError: return True
+        except PermissionError: pass # Exists but owned by someone else
+        if loop.time() >= deadline: return False
+        await asyncio.sleep(0.05)
+
 @register_tool
-async def kill_process(pid: int, signal_num: int = signal.SIGTERM) -> str:
+async def kill_process(pid: int, signal_num: int = signal.SIGTERM, wait_seconds: int = 0) -> str:
     """
-    Sends a signal (default 15/SIGTERM) to the specified process ID using 'kill'.
+    Sends a signal (default 15/SIGTERM) to the specified process ID (direct os.kill, no subprocess).
     May attempt to use 'sudo kill' if the initial attempt fails due to permissions.
     HIGH RISK. Requires confirmation by default.
 
     Args:
         pid: Process ID (PID) to send the signal to.
         signal_num: Signal number to send (e.g., 9 for KILL/SIGKILL, 15 for TERM/SIGTERM). Default is SIGTERM.
+        wait_seconds: Optionally wait up to this many seconds for the process to exit. Default 0 (don't wait).
 
     Returns:
         Formatted string indicating success or failure.
@@ -139,97 +346,281 @@ async def kill_process(pid: int, signal_num: int = signal.SIGTERM) -> str:
     try:
         pid_int = int(pid)
         sig_int = int(signal_num)
+        wait_float = float(wait_seconds or 0)
         if pid_int <= 0: return "Error: Invalid PID provided."
-        if sig_int not in range(1, signal.NSIG):
+        if sig_int not in _VALID_SIGS:
              logging.warning(f"Signal number {sig_int} might be invalid on this system (Valid range 1-{signal.NSIG-1}).")
-        common_signals = {signal.SIGTERM, signal.SIGKILL, signal.SIGHUP, signal.SIGINT}
-        if sig_int not in common_signals: logging.warning(f"Using less common signal number: {sig_int}")
-    except ValueError: return "Error: PID and signal number must be valid integers."
+        if sig_int not in _COMMON_SIGS: logging.warning(f"Using less common signal number: {sig_int}")
+    except ValueError: return "Error: PID, signal number and wait_seconds must be valid numbers."
     except Exception as e: return f"Error validating kill parameters: {e}"
 
-    kill_command = ["kill", f"-{sig_int}", str(pid_int)]
     try:
-         success, stdout_bytes, stderr_bytes, rc = await _run_command_async(kill_command)
-         stdout = stdout_bytes.decode(sys.stdout.encoding or 'utf-8', errors='replace')
-         stderr = stderr_bytes.decode(sys.stderr.encoding or 'utf-8', errors='replace')
-
-         if success:
-             return f"Signal {sig_int} sent successfully to PID {pid_int} (using standard 'kill'). Stdout: {stdout} Stderr: {stderr}".strip()
-         else:
-             permission_errors = ["operation not permitted", "permission denied", "eperm"]
-             if rc == 1 and any(p_err in stderr.lower() for p_err in permission_errors):
-                 logging.warning(f"'kill' failed without sudo (RC={rc}, Stderr: {stderr}). Attempting with sudo.")
-                 sudo_command_args = ["kill", f"-{sig_int}", str(pid_int)]
-                 # Ask confirmation specifically for sudo escalation here
-                 if await ask_confirmation_async("kill_process_sudo", {"command_args": sudo_command_args}):
-                      sudo_result = await run_tool_command_async(
-                           tool_name="run_sudo_command (for kill)",
-                           command=["sudo", "--"] + sudo_command_args,
-                           timeout=60
-                      )
-                      return f"Attempted 'sudo kill' after permission error.\nSudo Result:\n{sudo_result}"
-                 else:
-                      return f"Standard 'kill' failed with permission error (RC={rc}, Stderr: {stderr}). User cancelled sudo attempt."
+         err = _try_kill(pid_int, sig_int)
+         if err is None:
+             result = f"Signal {sig_int} sent successfully to PID {pid_int}."
+             if wait_float > 0:
+                 exited = await _wait_pid_exit(pid_int, wait_float)
+                 result += " Process exited." if exited else f" Process still running after {wait_float:g}s."
+             return result
+         elif err == "Operation not permitted" and _sudo_may_help():
+             logging.warning(f"os.kill failed without sudo ({err}). Attempting with sudo.")
+             sudo_command_args = ["kill", f"-{sig_int}", str(pid_int)]
+             # Ask confirmation specifically for sudo escalation here
+             if await ask_confirmation_async("kill_process_sudo", {"command_args": sudo_command_args}):
+                  sudo_result = await run_tool_command_async(
+                       tool_name="run_sudo_command (for kill)",
+                       command=[*_SUDO_PREFIX, *sudo_command_args],
+                       timeout=60
+                  )
+                  return f"Attempted 'sudo kill' after permission error.\nSudo Result:\n{sudo_result}"
              else:
-                 cmd_display = ' '.join(shlex.quote(str(c)) for c in kill_command)
-                 return f"Tool 'kill_process' failed (RC={rc}). Command: `{cmd_display}`\nStatus: Failed\nStderr:\n```\n{stderr}\n```\nStdout:\n```\n{stdout}\n```"
+                  return f"Sending signal {sig_int} to PID {pid_int} failed with permission error ({err}). User cancelled sudo attempt."
+         else:
+             # Only integers go into the display, so no shell quoting is needed
+             return f"Tool 'kill_process' failed. Equivalent command: `kill -{sig_int} {pid_int}`\nStatus: Failed\nError: {err}"
 
-    except FileNotFoundError: return "Error: 'kill' command not found in PATH."
     except Exception as e:
          logging.exception(f"Unexpected error in kill_process tool for PID {pid}: {e}")
          return f"An unexpected error occurred trying to kill PID {pid}: {e}"
 
 @register_tool
-async def get_system_info() -> str:
+async def kill_processes(pids: List[int], signal_num: int = signal.SIGTERM) -> str:
     """
-    Retrieves basic system information (OS, Hostname, Uptime, CPU, Memory)
-    by running common command-line tools asynchronously.
+    Sends a signal (default 15/SIGTERM) to several process IDs at once using os.kill (no subprocess per PID).
+    PIDs that fail with a permission error can be retried together in a single 'sudo kill' call.
+    HIGH RISK. Requires confirmation by default.
+
+    Args:
+        pids: List of process IDs (PIDs) to send the signal to.
+        signal_num: Signal number to send (e.g., 9 for KILL/SIGKILL, 15 for TERM/SIGTERM). Default is SIGTERM.
+
+    Returns:
+        Formatted string summarizing the result for each PID.
     """
-    # (Implementation remains the same as previous version)
-    info_commands = { # Default Linux commands
-        "OS": ["uname", "-a"], "Hostname": ["hostname"], "Uptime": ["uptime"],
-        "CPU Info": ["lscpu"], "Memory Info": ["free", "-h"],
-    }
-    platform_cmds = {}
-    if sys.platform.startswith("linux"): platform_cmds = info_commands
-    elif sys.platform == "darwin":
-         platform_cmds = {
-             "OS": ["sw_vers"], "Hostname": ["hostname"], "Uptime": ["uptime"],
-             "CPU Info": ["sysctl", "-n", "machdep.cpu.brand_string"],
-             "Memory Info (RAM Bytes)": ["sysctl", "-n", "hw.memsize"]
-         }
-    elif sys.platform == "win32":
-         platform_cmds = {
-              "OS": ["wmic", "os", "get", "Caption,Version,OSArchitecture", "/value"],
-              "Hostname": ["hostname"],
-              "CPU Info": ["wmic", "cpu", "get", "Name,NumberOfCores,NumberOfLogicalProcessors", "/value"],
-              "Memory Info (Bytes)": ["wmic", "ComputerSystem", "get", "TotalPhysicalMemory", "/value"],
-         }
-    else: platform_cmds = {"OS": ["uname", "-a"], "Hostname": ["hostname"], "Uptime": ["uptime"]}
+    # Confirmation is handled by the agent before calling this tool
+    if not pids or not isinstance(pids, list): return "Error: 'pids' must be a non-empty list of integers."
+    logging.warning(f"Preparing batch kill: signal={signal_num}, PIDs={pids}")
+    try:
+        pid_ints = list(dict.fromkeys(int(p) for p in pids)) # De-duplicate, keep order
+        sig_int = int(signal_num)
+        if any(p <= 0 for p in pid_ints): return "Error: Invalid PID provided (PIDs must be positive)."
+        if sig_int not in _VALID_SIGS:
+             logging.warning(f"Signal number {sig_int} might be invalid on this system (Valid range 1-{signal.NSIG-1}).")
+    except (TypeError, ValueError): return "Error: PIDs and signal number must be valid integers."
+
+    # os.kill is a plain syscall per PID - no fork/exec needed
+    results = [(p, _try_kill(p, sig_int)) for p in pid_ints]
+    sent = [p for p, err in results if err is None]
+    denied = [p for p, err in results if err == "Operation not permitted"] if _sudo_may_help() else []
+    failed = [(p, err) for p, err in results if err is not None and p not in denied]
+
+    lines = [f"Signal {sig_int} sent to {len(sent)}/{len(pid_ints)} PID(s)."]
+    if sent: lines.append(f"Succeeded: {', '.join(map(str, sent))}")
+    for p, err in failed: lines.append(f"Failed PID {p}: {err}")
+
+    if denied:
+        logging.warning(f"os.kill denied for PIDs {denied}. Attempting a single sudo kill for all of them.")
+        sudo_command_args = ["kill", f"-{sig_int}"] + [str(p) for p in denied]
+        if await ask_confirmation_async("kill_process_sudo", {"command_args": sudo_command_args}):
+             sudo_result = await run_tool_command_async(
+                  tool_name="run_sudo_command (for kill)",
+                  command=[*_SUDO_PREFIX, *sudo_command_args],
+                  timeout=60
+             )
+             lines.append(f"Attempted 'sudo kill' for PIDs {', '.join(map(str, denied))} after permission error.\nSudo Result:\n{sudo_result}")
+        else:
+             lines.append(f"Permission denied for PIDs {', '.join(map(str, denied))}. User cancelled sudo attempt.")
+    return "\n".join(lines)
 
+@register_tool
+async def get_system_info() -> str:
+    """
+    Retrieves basic system information (OS, Hostname, Uptime, CPU, Memory).
+    On Linux this reads uname(2) and /proc directly; elsewhere (or as a fallback)
+    it runs common command-line tools asynchronously.
+    """
     results = {}
     tasks = []
-    async def run_info_cmd(name: str, cmd: List[str]):
-        # (run_info_cmd inner function remains the same)
+    async def run_info_cmd(name: str, cmd: Tuple[str, ...]):
+        if name in _static_info_cache:
+             results[name] = _static_info_cache[name]; return
         try:
-             success, stdout_bytes, stderr_bytes, rc = await _run_command_async(cmd, timeout=10)
-             stdout = stdout_bytes.decode(sys.stdout.encoding or 'utf-8', errors='replace').strip()
-             stderr = stderr_bytes.decode(sys.stderr.encoding or 'utf-8', errors='replace').strip()
-             if success and stdout: results[name] = stdout
+             success, stdout_bytes, stderr_bytes, rc = await _run_command_async(list(cmd), timeout=10, env=c_locale_env())
+             stdout = stdout_bytes.decode(_STDOUT_ENC, 'replace').strip()
+             stderr = stderr_bytes.decode(_STDERR_ENC, 'replace').strip()
+             if success and stdout:
+                 results[name] = stdout
+                 if name in _STATIC_INFO_KEYS: _static_info_cache[name] = stdout
              elif stdout: results[name] = f"{stdout}\n(Command finished with RC={rc})"
              elif stderr: results[name] = f"Error (RC={rc}): {stderr}"
              else: results[name] = f"Error (RC={rc}): No output"
         except FileNotFoundError: results[name] = f"Error: Command '{cmd[0]}' not found."
         except Exception as e: results[name] = f"Failed to execute: {e}"
 
-    for name, cmd in platform_cmds.items(): tasks.append(asyncio.create_task(run_info_cmd(name, cmd)))
+    async def run_info_batch(cmd: Tuple[str, ...], names: Tuple[str, ...]):
+        if all(name in _static_info_cache for name in names):
+             for name in names: results[name] = _static_info_cache[name]
+             return
+        try:
+             success, stdout_bytes, stderr_bytes, rc = await _run_command_async(list(cmd), timeout=10, env=c_locale_env())
+             stdout = stdout_bytes.decode(_STDOUT_ENC, 'replace')
+             stderr = stderr_bytes.decode(_STDERR_ENC, 'replace').strip()
+             sections = _split_info_batch(stdout, names) if stdout else {}
+             for name in names:
+                 if name in sections:
+                     results[name] = sections[name] if success else f"{sections[name]}\n(Command finished with RC={rc})"
+                     if success and name in _STATIC_INFO_KEYS: _static_info_cache[name] = sections[name]
+                 elif stderr: results[name] = f"Error (RC={rc}): {stderr}"
+                 else: results[name] = f"Error (RC={rc}): No output"
+        except FileNotFoundError:
+             for name in names: results[name] = f"Error: Command '{cmd[0]}' not found."
+        except Exception as e:
+             for name in names: results[name] = f"Failed to execute: {e}"
+
+    if sys.platform.startswith("linux"):
+        # uname(2) + /proc replace all the Linux info commands; any section that can't be read falls back to its command
+        try: results.update(await asyncio.to_thread(_read_linux_info))
+        except Exception as e: logging.warning(f"Reading system info from /proc failed, using commands: {e}")
+    for name, cmd in _INFO_CMDS.items():
+        if name not in results: tasks.append(asyncio.create_task(run_info_cmd(name, cmd)))
+    if _INFO_BATCH: tasks.append(asyncio.create_task(run_info_batch(*_INFO_BATCH)))
     await asyncio.gather(*tasks)
 
     output = "System Information:\n```\n"
-    for name in platform_cmds: output += f"--- {name} ---\n{results.get(name, 'Error retrieving data.')}\n\n"
+    for name in _INFO_SECTIONS: output += f"--- {name} ---\n{results.get(name, 'Error retrieving data.')}\n\n"
     output = output.strip() + "\n```"
     return output
 
+# --- Python Script Runner ---
+# A long-lived interpreter that forks a child per script: each script still gets a fresh process
+# (own CWD, argv, globals, exit code), but skips interpreter startup (site, .pth files, stdlib init).
+# Protocol: one JSON request line in; one {"pid": ...} line back once forked, then one {"rc": ...} line.
+# Script stdout/stderr go to temp files named in the request, so they never mix with the protocol pipe.
+
+_RUNNER_SRC = r"""
+import json, os, runpy, sys
+def _run(req):
+    for target_fd, path in ((1, req["out"]), (2, req["err"])):
+        fd = os.open(path, os.O_WRONLY | os.O_TRUNC); os.dup2(fd, target_fd); os.close(fd)
+    null_fd = os.open(os.devnull, os.O_RDONLY); os.dup2(null_fd, 0); os.close(null_fd)
+    sys.stdin = open(0, closefd=False)
+    os.chdir(req["cwd"])
+    sys.argv = [req["path"], *req["args"]]
+    sys.path[0] = os.path.dirname(req["path"])
+    try:
+        runpy.run_path(req["path"], run_name="__main__")
+    except SystemExit:
+        raise
+    except BaseException as e:
+        # Report like 'python script.py' would: drop the runner/runpy frames from the traceback
+        import traceback
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != req["path"]: tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb or e.__traceback__)
+        sys.exit(1)
+for line in sys.stdin:
+    req = json.loads(line)
+    pid = os.fork()
+    if pid == 0:
+        _run(req)
+        sys.exit(0) # Leave the loop via normal interpreter shutdown (atexit, thread joins, flush)
+    sys.stdout.write(json.dumps({"pid": pid}) + "\n"); sys.stdout.flush()
+    _, status = os.waitpid(pid, 0)
+    sys.stdout.write(json.dumps({"rc": os.waitstatus_to_exitcode(status)}) + "\n"); sys.stdout.flush()
+"""
+
+class _ScriptRunnerState:
+    """Per-event-loop runner process (asyncio subprocess transports are bound to their loop)."""
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.process: Optional[asyncio.subprocess.Process] = None
+
+_SCRIPT_RUNNERS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _ScriptRunnerState]" = weakref.WeakKeyDictionary()
+
+def _read_bytes(path: str) -> bytes:
+    """Reads a runner output file (blocking - call via asyncio.to_thread)."""
+    with open(path, "rb") as f: return f.read()
+
+def _make_output_files() -> Tuple[str, str]:
+    """Creates the stdout/stderr temp files for one runner request (blocking - call via asyncio.to_thread)."""
+    paths = []
+    for prefix in ("t5000-py-out-", "t5000-py-err-"):
+        fd, path = tempfile.mkstemp(prefix=prefix); os.close(fd)
+        paths.append(path)
+    return paths[0], paths[1]
+
+async def _run_python_via_runner(script_path: str, args: List[str], cwd: str, timeout: float) -> Optional[Tuple[bool, bytes, bytes, int]]:
+    """
+    Runs a script through the warm runner. Returns (success, stdout, stderr, rc) like _run_command_async,
+    or None if the runner can't take the request (disabled, no fork, busy, failed to start) and the
+    caller should spawn the interpreter normally.
+    """
+    if not settings.PYTHON_SCRIPT_RUNNER_ENABLED or not hasattr(os, "fork") or not sys.executable: return None
+    loop = asyncio.get_running_loop()
+    state = _SCRIPT_RUNNERS.get(loop)
+    if state is None: state = _SCRIPT_RUNNERS[loop] = _ScriptRunnerState()
+    if state.lock.locked(): return None # One script at a time per runner; don't serialize concurrent calls
+
+    async with state.lock, _get_subprocess_semaphore():
+        if state.process is None or state.process.returncode is not None:
+            try:
+                state.process = await asyncio.create_subprocess_exec(
+                    sys.executable, "-u", "-c", _RUNNER_SRC,
+                    stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+                )
+            except OSError as e:
+                logging.warning(f"Could not start Python script runner, spawning per call: {e}")
+                state.process = None
+                return None
+        runner = state.process
+        assert runner.stdin is not None and runner.stdout is not None
+
+        out_path, err_path = await asyncio.to_thread(_make_output_files)
+        try:
+            request = {"path": script_path, "args": args, "cwd": cwd, "out": out_path, "err": err_path}
+            child_pid: List[int] = []
+
+            async def exchange() -> bytes:
+                runner.stdin.write(json.dumps(request).encode() + b"\n")
+                await runner.stdin.drain()
+                child_pid.append(int(json.loads(await runner.stdout.readline())["pid"]))
+                return await runner.stdout.readline()
+
+            # The whole exchange runs under the timeout; on any exit other than a full reply (timeout,
+            # runner failure, cancellation) the script is killed and the runner discarded, since its
+            # protocol pipe may still hold an unread reply.
+            finished = timed_out = False
+            try:
+                line = await asyncio.wait_for(exchange(), timeout)
+                finished = True
+            except asyncio.TimeoutError:
+                timed_out = True
+                logging.error(f"Python script timed out after {timeout} seconds: {script_path}")
+            except (OSError, ValueError, KeyError) as e: # Runner died or is unusable - start over next time
+                if not child_pid:
+                    logging.warning(f"Python script runner failed before starting the script, spawning per call: {e}")
+                    return None
+                line = b""
+            finally:
+                if not finished:
+                    if child_pid: _try_kill(child_pid[0], signal.SIGKILL)
+                    if runner.returncode is None: runner.kill()
+                    state.process = None
+            stdout_bytes = await asyncio.to_thread(_read_bytes, out_path)
+            stderr_bytes = await asyncio.to_thread(_read_bytes, err_path)
+            if timed_out:
+                timeout_msg = f"Error: Command timed out after {timeout} seconds.".encode()
+                return False, stdout_bytes, (stderr_bytes + b"\n" + timeout_msg) if stderr_bytes else timeout_msg, -1
+            try: rc = int(json.loads(line)["rc"])
+            except (ValueError, KeyError):
+                state.process = None
+                return False, stdout_bytes, stderr_bytes + b"\nError: Python script runner exited unexpectedly.", -1
+            return rc == 0, stdout_bytes, stderr_bytes, rc
+        finally:
+            for path in (out_path, err_path):
+                try: os.unlink(path)
+                except OSError: pass
+
 # --- Script Execution Tools (Added Here) ---
 
 @register_tool
@@ -246,12 +637,20 @@ async def python_run_script(script_path: str, args: Optional[List[str]] = None)
         Formatted string result including status, stdout, and stderr.
     """
     try:
-        script_target_path = Path(script_path).resolve()
-        if not script_target_path.is_file(): return f"Error: Python script not found: {script_path}"
-        if not os.access(script_target_path, os.R_OK): return f"Error: Python script not readable: {script_path}"
+        # Resolve, stat and access-check in a worker thread rather than on the event loop
+        try: resolved_script = await resolve_regular_file_async(script_path, require_readable=True)
+        except PermissionError: return f"Error: Python script not readable: {script_path}"
+        if resolved_script is None: return f"Error: Python script not found: {script_path}"
+        script_target_path = Path(resolved_script)
 
         logging.warning(f"Executing Python script: {script_target_path} with args: {args}")
-        command = [sys.executable or "python", str(script_target_path)] + ([str(a) for a in args] if args else [])
+        str_args = [str(a) for a in args] if args else []
+        command = [sys.executable or "python", str(script_target_path)] + str_args
+        # Fast path: fork from the warm runner interpreter; None means spawn normally
+        runner_result = await _run_python_via_runner(str(script_target_path), str_args, str(script_target_path.parent), settings.COMMAND_TIMEOUT)
+        if runner_result is not None:
+            _, stdout_bytes, stderr_bytes, rc = runner_result
+            return format_tool_result("python_run_script", "async", shlex.join(command), rc, stdout_bytes, stderr_bytes)
         return await run_tool_command_async(
             tool_name="python_run_script", command=command,
             cwd=script_target_path.parent, success_rc=0
@@ -275,9 +674,11 @@ async def node_run_script(script_path: str, args: Optional[List[str]] = None) ->
         Formatted string result including status, stdout, and stderr.
     """
     try:
-        script_target_path = Path(script_path).resolve()
-        if not script_target_path.is_file(): return f"Error: Node.js script not found: {script_path}"
-        if not os.access(script_target_path, os.R_OK): return f"Error: Node.js script not readable: {script_path}"
+        # Resolve, stat and access-check in a worker thread rather than on the event loop
+        try: resolved_script = await resolve_regular_file_async(script_path, require_readable=True)
+        except PermissionError: return f"Error: Node.js script not readable: {script_path}"
+        if resolved_script is None: return f"Error: Node.js script not found: {script_path}"
+        script_target_path = Path(resolved_script)
 
         logging.warning(f"Executing Node.js script: {script_target_path} with args: {args}")
         command = ["node", str(script_target_path)] + ([str(a) for a in args] if args else [])
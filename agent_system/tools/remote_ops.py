@@ -1,47 +1,88 @@
 import asyncio
 import logging
+import os
+import re
 import shlex
+import stat
+import sys
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple, Union
 
 # Import the registration decorator and utility functions/settings
 from . import register_tool
-from .tool_utils import run_tool_command_async, ask_confirmation_async
+from .tool_utils import _run_command_async, run_tool_command_async, ask_confirmation_async, resolve_regular_file_async
 from agent_system.config import settings
 
-@register_tool
-async def ssh_command(host: str, command: str, user: Optional[str] = None, key_path: Optional[str] = None) -> str:
-    """
-    Executes a command string on a remote host via SSH using key-based authentication only.
-    Uses BatchMode=yes and StrictHostKeyChecking=no for non-interactive execution (less secure).
-    EXTREME RISK. Requires confirmation by default.
+_STDOUT_ENC = sys.stdout.encoding or 'utf-8'
+_STDERR_ENC = sys.stderr.encoding or 'utf-8'
 
-    Args:
-        host: Hostname or IP address of the remote server.
-        command: The command string to execute remotely.
-        user: Optional username for SSH connection.
-        key_path: Optional path to the private SSH key file (~/.ssh/id_* defaults used if omitted).
+# ssh_commands: marker line printed after each batched command, followed by its exit code
+_SSH_BATCH_SEP = "##T5000-SSH-RC##"
+_SSH_BATCH_SEP_RE = re.compile(rb"\n?" + re.escape(_SSH_BATCH_SEP.encode()) + rb" (\d+)\n")
 
-    Returns:
-        Formatted string result including status, stdout, and stderr from the remote command.
+# ssh_agent_command: the only accepted command strings and the argv each maps to
+_VALID_AGENT_CMDS: Dict[str, Tuple[str, ...]] = {"ssh-add -l": ("ssh-add", "-l"), "ssh-add -L": ("ssh-add", "-L")}
+
+# Connection multiplexing: %C expands to a hash of local host, remote host, port and user,
+# so each user@host gets its own master socket without parsing scp's host:path arguments.
+_SSH_MUX_PERSIST = "60s"
+# Control sockets are Unix sockets, whose paths must fit in sun_path (108 bytes with the NUL). The master
+# binds "<dir>/<40-char %C hash>.<16 hex digits>" before renaming it, so that is the length checked. The
+# directory lives under /tmp rather than AGENT_STATE_DIR, which is inside the checkout and may be deep.
+_SSH_MUX_SUN_PATH_MAX = 107
+_SSH_MUX_EXPANDED_SUFFIX_LEN = 1 + 40 + 17 # "/" + %C hash + ".<16 hex>"
+_ssh_mux_dir: Optional[Path] = None
+
+def _ssh_mux_control_path() -> Optional[str]:
+    """Returns the ControlPath template for multiplexed connections, or None if unavailable."""
+    global _ssh_mux_dir
+    if _ssh_mux_dir is None:
+        if not hasattr(os, "getuid"): return None
+        mux_dir = Path("/tmp") / f"t5000-mux-{os.getuid()}"
+        try:
+            # Control sockets grant access to live sessions: the directory must be ours and private
+            mux_dir.mkdir(mode=0o700, exist_ok=True)
+            st = os.lstat(mux_dir)
+            if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+                raise OSError(f"not a private directory owned by uid {os.getuid()}")
+        except OSError as e:
+            logging.warning(f"SSH multiplexing disabled, cannot use control dir '{mux_dir}': {e}")
+            return None
+        _ssh_mux_dir = mux_dir
+    if len(os.fsencode(_ssh_mux_dir)) + _SSH_MUX_EXPANDED_SUFFIX_LEN > _SSH_MUX_SUN_PATH_MAX:
+        logging.warning(f"SSH multiplexing disabled, control dir '{_ssh_mux_dir}' is too long for a socket path.")
+        return None
+    return str(_ssh_mux_dir / "%C")
+
+def _ssh_mux_options() -> List[str]:
+    """SSH -o options enabling ControlMaster reuse, or an empty list if multiplexing is off."""
+    if not settings.SSH_MULTIPLEX_ENABLED:
+        return []
+    control_path = _ssh_mux_control_path()
+    if control_path is None:
+        return []
+    return [
+        "-o", "ControlMaster=auto",
+        "-o", f"ControlPath={control_path}",
+        "-o", f"ControlPersist={_SSH_MUX_PERSIST}",
+    ]
+
+async def _build_ssh_command(target: str, key_path: Optional[str]) -> Union[List[str], str]:
+    """
+    Builds the non-interactive ssh client command up to and including the target.
+    Returns the command list, or an error message string if the key path is invalid.
     """
-    # Confirmation is handled by the agent before calling this tool
-    target = f"{user}@{host}" if user else host
-    logging.warning(f"Preparing SSH command for {target}: '{command}'")
     ssh_cmd_list = ["ssh"]
 
     # Handle key path
-    resolved_key_path_str: Optional[str] = None
     if key_path:
          if not isinstance(key_path, str): return "Error: ssh key_path must be a string."
          try:
-             # Resolve path synchronously (low block risk)
-             resolved_key_path = Path(key_path).expanduser().resolve(strict=True) # Check existence
-             if not resolved_key_path.is_file(): return f"Error: SSH key file not found or not a file: {key_path}"
-             resolved_key_path_str = str(resolved_key_path)
+             # Resolve and stat off the event loop (slow/network filesystems would otherwise stall it)
+             resolved_key_path_str = await resolve_regular_file_async(key_path)
+             if resolved_key_path_str is None: return f"Error: SSH key file not found or not a file: {key_path}"
              ssh_cmd_list.extend(["-i", resolved_key_path_str])
              logging.info(f"Using SSH key: {resolved_key_path_str}")
-         except FileNotFoundError: return f"Error: SSH key file not found: {key_path}"
          except Exception as e: return f"Error resolving SSH key path '{key_path}': {e}"
 
     # Add options for non-interactive execution
@@ -51,10 +92,46 @@ async def ssh_command(host: str, command: str, user: Optional[str] = None, key_p
         "-o", "PasswordAuthentication=no", # Ensure password auth is disabled
         "-o", "StrictHostKeyChecking=no", # DANGEROUS: Auto-accept new host keys (avoids prompt)
         # Consider adding "-o UserKnownHostsFile=/dev/null" for extreme isolation, but very risky.
+        *_ssh_mux_options(), # Reuse an existing master connection to this host if one is open
         "--", # Prevent misinterpretation of host/command as options
         target,
-        command # The command to execute remotely
     ])
+    return ssh_cmd_list
+
+def _build_ssh_batch_script(commands: List[str], stop_on_error: bool) -> str:
+    """
+    Builds the remote shell script for ssh_commands. Each command runs in its own subshell
+    (so an 'exit' only ends that command; stderr merged into stdout), followed by a marker
+    line with its exit code.
+    """
+    script_parts = []
+    for command in commands:
+        script_parts.append(f"(\n{command}\n) 2>&1\n__rc=$?; printf '\\n{_SSH_BATCH_SEP} %d\\n' \"$__rc\"")
+        if stop_on_error: script_parts.append('[ "$__rc" -eq 0 ] || exit "$__rc"')
+    return "\n".join(script_parts)
+
+@register_tool
+async def ssh_command(host: str, command: str, user: Optional[str] = None, key_path: Optional[str] = None) -> str:
+    """
+    Executes a command string on a remote host via SSH using key-based authentication only.
+    Uses BatchMode=yes and StrictHostKeyChecking=no for non-interactive execution (less secure).
+    EXTREME RISK. Requires confirmation by default.
+
+    Args:
+        host: Hostname or IP address of the remote server.
+        command: The command string to execute remotely.
+        user: Optional username for SSH connection.
+        key_path: Optional path to the private SSH key file (~/.ssh/id_* defaults used if omitted).
+
+    Returns:
+        Formatted string result including status, stdout, and stderr from the remote command.
+    """
+    # Confirmation is handled by the agent before calling this tool
+    target = f"{user}@{host}" if user else host
+    logging.warning(f"Preparing SSH command for {target}: '{command}'")
+    ssh_cmd_list = await _build_ssh_command(target, key_path)
+    if isinstance(ssh_cmd_list, str): return ssh_cmd_list # Error message
+    ssh_cmd_list.append(command) # The command to execute remotely
 
     return await run_tool_command_async(
         tool_name="ssh_command",
@@ -75,11 +152,74 @@ async def ssh_command(host: str, command: str, user: Optional[str] = None, key_p
     )
 
 
+@register_tool
+async def ssh_commands(host: str, commands: List[str], user: Optional[str] = None,
+                       key_path: Optional[str] = None, stop_on_error: bool = True) -> str:
+    """
+    Executes several command strings on a remote host in ONE SSH session (one connection
+    setup instead of one per command), reporting output and exit code per command.
+    Each command runs in its own subshell (cd/variables do not carry over; chain with
+    '&&' inside one command for that) and its stderr is merged into its output.
+    Uses the same non-interactive options as ssh_command.
+    EXTREME RISK. Requires confirmation by default.
+
+    Args:
+        host: Hostname or IP address of the remote server.
+        commands: List of command strings to execute remotely, in order.
+        user: Optional username for SSH connection.
+        key_path: Optional path to the private SSH key file (~/.ssh/id_* defaults used if omitted).
+        stop_on_error: If True (default), commands after the first failing one are not run.
+
+    Returns:
+        Formatted string with a summary line and a section per command (RC and output).
+    """
+    # Confirmation is handled by the agent before calling this tool
+    if not commands or not isinstance(commands, list) or not all(isinstance(c, str) and c.strip() for c in commands):
+        return "Error: 'commands' must be a non-empty list of non-empty command strings."
+    target = f"{user}@{host}" if user else host
+    logging.warning(f"Preparing batched SSH commands for {target}: {commands}")
+    ssh_cmd_list = await _build_ssh_command(target, key_path)
+    if isinstance(ssh_cmd_list, str): return ssh_cmd_list # Error message
+
+    # Run under sh explicitly so the script works whatever the remote login shell is (csh, fish...)
+    ssh_cmd_list.append("sh -c " + shlex.quote(_build_ssh_batch_script(commands, stop_on_error)))
+
+    try:
+        success, stdout_bytes, stderr_bytes, rc = await _run_command_async(ssh_cmd_list, timeout=300)
+    except FileNotFoundError: return "Error: 'ssh' command not found in PATH."
+    except Exception as e:
+        logging.exception(f"Error running batched SSH commands on {target}: {e}")
+        return f"An unexpected error occurred running batched SSH commands on {target}: {e}"
+
+    # re.split with one group yields [out1, rc1, out2, rc2, ..., trailing]
+    pieces = _SSH_BATCH_SEP_RE.split(stdout_bytes)
+    outputs, rcs = pieces[0:-1:2], [int(x) for x in pieces[1::2]]
+    sections = []
+    for i, command in enumerate(commands):
+        if i < len(rcs):
+            out = outputs[i].decode(_STDOUT_ENC, 'replace').strip()
+            sections.append(f"--- [{i + 1}] `{command}` (RC={rcs[i]}) ---\n{out or '(no output)'}")
+        else:
+            sections.append(f"--- [{i + 1}] `{command}` (not run) ---")
+
+    n_ok = sum(1 for x in rcs if x == 0)
+    lines = [f"SSH batch on {target}: {n_ok}/{len(commands)} command(s) succeeded."]
+    if not rcs and rc == 255:
+        lines.append("SSH connection error (e.g., connection refused/timed out, permission denied/auth failed, host key verification failed).")
+    lines.extend(sections)
+    trailing = pieces[-1].decode(_STDOUT_ENC, 'replace').strip()
+    if trailing: lines.append(f"--- Unterminated output ---\n{trailing}")
+    stderr = stderr_bytes.decode(_STDERR_ENC, 'replace').strip()
+    if stderr: lines.append(f"--- SSH stderr ---\n{stderr}")
+    return "\n".join(lines)
+
+
 @register_tool
 async def scp_command(source: str, destination: str, key_path: Optional[str] = None) -> str:
     """
     Copies files/directories via SCP using key-based authentication only.
     Uses BatchMode=yes and StrictHostKeyChecking=no. Recursive copy enabled (-r).
+    Compression is enabled by the SCP_COMPRESSION setting (helps text over slow links); otherwise ssh_config decides.
     EXTREME RISK. Requires confirmation by default.
     WARNING: No path restrictions for local or remote paths!
 
@@ -103,12 +243,10 @@ async def scp_command(source: str, destination: str, key_path: Optional[str] = N
     if key_path:
          if not isinstance(key_path, str): return "Error: scp key_path must be a string."
          try:
-             resolved_key_path = Path(key_path).expanduser().resolve(strict=True)
-             if not resolved_key_path.is_file(): return f"Error: SSH key file not found or not a file: {key_path}"
-             resolved_key_path_str = str(resolved_key_path)
+             resolved_key_path_str = await resolve_regular_file_async(key_path)
+             if resolved_key_path_str is None: return f"Error: SSH key file not found or not a file: {key_path}"
              scp_cmd_list.extend(["-i", resolved_key_path_str])
              logging.info(f"Using SSH key: {resolved_key_path_str}")
-         except FileNotFoundError: return f"Error: SSH key file not found: {key_path}"
          except Exception as e: return f"Error resolving SSH key path '{key_path}': {e}"
 
     # Add options for non-interactive, recursive copy
@@ -118,6 +256,9 @@ async def scp_command(source: str, destination: str, key_path: Optional[str] = N
         "-o", "ConnectTimeout=15",
         "-o", "PasswordAuthentication=no",
         "-o", "StrictHostKeyChecking=no", # DANGEROUS
+        # SCP_COMPRESSION only ever turns compression on; when off, ssh_config decides (default: no)
+        *(("-o", "Compression=yes") if settings.SCP_COMPRESSION else ()),
+        *_ssh_mux_options(),
         "--", # Prevent misinterpretation of source/dest as options
         source,
         destination
@@ -134,6 +275,39 @@ async def scp_command(source: str, destination: str, key_path: Optional[str] = N
         }
     )
 
+@register_tool
+async def ssh_mux_exit(host: str, user: Optional[str] = None) -> str:
+    """
+    Closes the shared SSH master connection (ControlMaster) kept open for a host by
+    ssh_command/scp_command. Idle masters also close on their own after a short time.
+
+    Args:
+        host: Hostname or IP address of the remote server.
+        user: Optional username used for the connection.
+
+    Returns:
+        Formatted string result including status, stdout, and stderr.
+    """
+    if not isinstance(host, str) or not host or host.startswith('-'):
+        return f"Error: Invalid host provided: '{host}'"
+    if not settings.SSH_MULTIPLEX_ENABLED:
+        return "SSH multiplexing is disabled (SSH_MULTIPLEX_ENABLED=false). No master connections to close."
+    control_path = _ssh_mux_control_path()
+    if control_path is None:
+        return "Error: SSH multiplexing control directory is unavailable."
+
+    target = f"{user}@{host}" if user else host
+    logging.info(f"Closing SSH master connection for {target}")
+    return await run_tool_command_async(
+        tool_name="ssh_mux_exit",
+        command=["ssh", "-o", f"ControlPath={control_path}", "-O", "exit", "--", target],
+        timeout=15,
+        success_rc=0,
+        failure_notes={
+            255: "No master connection is running for this host (nothing to close)."
+        }
+    )
+
 @register_tool
 async def ssh_agent_command(command_string: str) -> str:
     """
@@ -146,24 +320,18 @@ async def ssh_agent_command(command_string: str) -> str:
         Formatted string result including status, stdout (key list), and stderr.
     """
     logging.info(f"Running ssh-agent command request: '{command_string}'")
-    try:
-        # Basic parsing, avoid complex shell features
-        cmd_parts = shlex.split(command_string.strip())
-    except ValueError as e:
-        return f"Error parsing agent command string: {e}"
-
-    # Validate command structure
-    if not cmd_parts or cmd_parts[0] != "ssh-add":
-        return f"Error: Unsupported agent command base: '{cmd_parts[0] if cmd_parts else ''}'. Only 'ssh-add' is supported."
-
-    allowed_args = {"-l", "-L"}
-    if len(cmd_parts) != 2 or cmd_parts[1] not in allowed_args:
-         return f"Error: Unsupported or invalid arguments for ssh-add. Only '-l' or '-L' (list keys) are allowed by this tool. Received: '{command_string}'"
+    if not isinstance(command_string, str): return "Error: ssh-agent command must be a string."
+    # Only two inputs are valid, so a dict lookup replaces tokenizing with shlex (whitespace runs are collapsed)
+    cmd_parts = _VALID_AGENT_CMDS.get(" ".join(command_string.split()))
+    if cmd_parts is None:
+        if not command_string.lstrip().startswith("ssh-add"):
+            return f"Error: Unsupported agent command base: '{command_string.strip()}'. Only 'ssh-add' is supported."
+        return f"Error: Unsupported or invalid arguments for ssh-add. Only '-l' or '-L' (list keys) are allowed by this tool. Received: '{command_string}'"
 
     # Execute the validated command
     return await run_tool_command_async(
         tool_name="ssh_agent_command",
-        command=cmd_parts, # Pass the validated list ['ssh-add', '-l' or '-L']
+        command=list(cmd_parts), # The validated command ['ssh-add', '-l' or '-L']
         timeout=15, # Short timeout for listing keys
         success_rc=[0, 1], # RC 0 = keys listed, RC 1 = agent running but no keys (treat as success)
         failure_notes={
@@ -191,13 +359,10 @@ async def ssh_add_command(key_path: Optional[str] = None) -> str:
     if key_path:
          if not isinstance(key_path, str): return "Error: ssh_add key_path must be a string."
          try:
-             # Resolve path synchronously (low block risk)
-             resolved_key_path = Path(key_path).expanduser().resolve(strict=True)
-             if not resolved_key_path.is_file(): return f"Error: SSH key file not found or not a file: {key_path}"
-             resolved_key_path_str = str(resolved_key_path)
+             resolved_key_path_str = await resolve_regular_file_async(key_path)
+             if resolved_key_path_str is None: return f"Error: SSH key file not found or not a file: {key_path}"
              command.append(resolved_key_path_str)
              logging.info(f"Targeting SSH key: {resolved_key_path_str}")
-         except FileNotFoundError: return f"Error: SSH key file not found: {key_path}"
          except Exception as e: return f"Error resolving SSH key path '{key_path}': {e}"
     else:
          logging.info("Attempting to add default SSH keys.")
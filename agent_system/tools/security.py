@@ -1,15 +1,54 @@
 import asyncio
 import logging
+import re
 import shlex
+import shutil
+import string
 import sys
+import tempfile
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple, Union
 
 # Import the registration decorator and utility functions/settings
 from . import register_tool
-from .tool_utils import run_tool_command_async, ask_confirmation_async
+from .tool_utils import run_tool_command_async, ask_confirmation_async, validate_tool_options, validate_flag_options, resolve_regular_file_async, _UNSAFE_CHARS_RE
 from agent_system.config import settings
 
+# Argv prefix for privileged execution ("--" stops sudo option parsing)
+_SUDO_PREFIX = ("sudo", "--")
+# Whitespace, quotes or backslashes in nmap's scan_type need shlex splitting; a lone flag is used as-is
+_SHLEX_SPECIAL_RE = re.compile(r"[\s'\"\\]")
+# msfvenom: payload names (alphanumeric, '/', '_', '-', '.'), and VAR=value options (ASCII identifier names;
+# values may contain more, minus the characters in _MSF_VAL_UNSAFE_CHARS)
+_MSF_PAYLOAD_RE = re.compile(r"[A-Za-z0-9/_.\-]+")
+_MSF_VAL_UNSAFE_CHARS = ';|"`$()<>'
+_MSF_OPT_RE = re.compile(rf"[A-Za-z0-9_]+=[^{re.escape(_MSF_VAL_UNSAFE_CHARS)}]*")
+# msfvenom output formats (ASCII alphanumeric) and LHOST values (IPs and hostnames), checked with one issuperset call
+_MSF_FORMAT_CHARS = frozenset(string.ascii_letters + string.digits)
+_MSF_LHOST_CHARS = _MSF_FORMAT_CHARS | frozenset(".-")
+# sqlmap options that are always refused (matched as prefixes, e.g. --os-shell=...)
+_SQLMAP_BLOCKED_OPTIONS = ("--os-shell", "--sql-shell", "--eval", "--file-write", "--file-read")
+# gobuster modes accepted (limited for simplicity/safety) and the flag each takes its target with (vhost uses -u for the base URL)
+_GOBUSTER_MODES = {"dir": "-u", "dns": "-d", "vhost": "-u"}
+# searchsploit option prefixes known to be safe
+_SEARCHSPLOIT_ALLOWED_PREFIXES = ("-j", "--json", "-w", "--www", "-t", "--title", "--id", "-c", "--case", "--nmap", "--exclude=", "--include=", "--ignore", "--overflow")
+
+# parallel_scan: scanners it can fan out, and the cap on concurrent scans
+_PARALLEL_SCANNERS = ("nikto", "gobuster")
+_PARALLEL_SCAN_MAX_CONCURRENCY = 16
+# nmap_scan passes up to this many targets on the command line; more are written to a file for '-iL'
+_NMAP_MAX_ARGV_TARGETS = 64
+# nmap_scan checks only for sudo up front (while the confirmation is pending): nmap itself is resolved
+# through sudo's secure_path, which the agent's own PATH says nothing about
+
+
+def _write_nmap_target_list(targets: List[str]) -> str:
+    """Writes nmap targets one per line to a temporary file and returns its path (caller removes it)."""
+    with tempfile.NamedTemporaryFile("w", prefix="nmap_targets_", suffix=".txt", delete=False) as f:
+        f.write("\n".join(targets) + "\n")
+    return f.name
+
+
 # WARNING: These tools interact with potentially sensitive security scanning software.
 # Ensure you have authorization and are operating in a legal and ethical manner.
 # High-risk tools require confirmation by default.
@@ -22,59 +61,73 @@ async def nmap_scan(target: str, scan_type: str = "-sV", options: Optional[List[
     HIGH RISK. Requires confirmation by default (for both the tool and the sudo execution).
 
     Args:
-        target: Target specification (IP address, hostname, network range).
+        target: Target specification (IP address, hostname, network range). Several targets may be given
+                whitespace-separated (or as a list from Python callers); they are scanned by a single nmap process.
         scan_type: Nmap scan type flag(s) (e.g., '-sV' for version detection, '-sS' for SYN scan, '-A' for aggressive). Default is '-sV'.
+                   Several flags may be given space-separated ("-sS -O") or, from Python callers, as a list.
         options: Optional list of additional nmap flags (e.g., ['-p-', '-T4', '--script=vuln']).
 
     Returns:
         Formatted string result including status, stdout (scan results), and stderr.
     """
     # Confirmation for 'nmap_scan' itself is handled by the agent.
-    logging.warning(f"Preparing nmap scan: Type='{scan_type}', Target='{target}', Options='{options or []}'")
+    logging.warning("Preparing nmap scan: Type='%s', Target='%s', Options='%s'", scan_type, target, options or [])
 
-    # Basic sanitation/validation of target and options
-    if not target or target.startswith('-'):
+    # Basic sanitation/validation of target(s) and options
+    targets = [str(t) for t in target] if isinstance(target, (list, tuple)) else str(target or "").split()
+    if not targets or any(t.startswith('-') for t in targets):
         return f"Error: Invalid target specified for nmap: '{target}'"
+    # scan_type is normally a single flag string; a pre-split list of flags is also accepted (skips tokenizing)
+    scan_flags = [str(f) for f in scan_type] if isinstance(scan_type, (list, tuple)) else [str(scan_type)]
     # Allow scan_type to have flags, but check for obvious command injection chars
-    if any(c in scan_type for c in ';|&`$()<>'):
+    if any(_UNSAFE_CHARS_RE.search(f) for f in scan_flags):
         return f"Error: Invalid characters detected in scan_type: '{scan_type}'"
 
-    command = ["nmap"]
-    # Split scan_type in case multiple flags are passed together (e.g., "-sS -O")
-    command.extend(shlex.split(scan_type))
-
-    safe_options = []
-    if options:
-        if not isinstance(options, list): return "Error: 'options' argument must be a list of strings."
-        for opt in options:
-             opt_str = str(opt)
-             # Allow flags and simple key=value assignments (e.g., --script=default), block complex chars
-             if opt_str.startswith('-') and not any(c in opt_str for c in ';|&`$()<>'):
-                 safe_options.append(opt_str)
-             # Allow script arguments like 'http-title.useHEAD=true' if they look safe-ish
-             elif '=' in opt_str and not any(c in opt_str for c in ';|&`$()<>'):
-                  safe_options.append(opt_str)
-             else:
-                  logging.warning(f"Skipping potentially unsafe or invalid nmap option: {opt_str}")
-        command.extend(safe_options)
-
-    # Add target last
-    command.append(target)
-
-    # Nmap often requires root. Execute via sudo.
-    # Confirmation for run_sudo_command will be triggered if it's in HIGH_RISK_TOOLS.
-    logging.info("Nmap scan typically requires root privileges, preparing to execute via sudo.")
-    sudo_args = {"command_args": command}
-    if await ask_confirmation_async("nmap_scan_sudo", sudo_args):
-         # Directly call run_tool_command_async for sudo execution
-         return await run_tool_command_async(
-              tool_name="run_sudo_command (for nmap)",
-              command=["sudo", "--"] + command,
-              timeout=1800 # Nmap scans can take a very long time
-              # Nmap success codes vary, 0 is typical success. Wrapper handles output.
-         )
+    if isinstance(scan_type, (list, tuple)) or not _SHLEX_SPECIAL_RE.search(scan_flags[0]):
+        scan_args = scan_flags
+    else:
+        # Split scan_type in case multiple flags are passed together (e.g., "-sS -O")
+        scan_args = shlex.split(scan_flags[0])
+
+    # Allow flags (e.g., --script=default) and script arguments like 'http-title.useHEAD=true'
+    safe_options, error = validate_tool_options(options, "nmap", lambda o: o.startswith('-') or '=' in o)
+    if error: return error
+
+    # Target(s) go last; large target sets go through an input list file (-iL) to stay clear of argv limits
+    target_list_path = None
+    if len(targets) > _NMAP_MAX_ARGV_TARGETS:
+        try:
+            target_list_path = await asyncio.to_thread(_write_nmap_target_list, targets)
+        except OSError as e:
+            return f"Error: Could not write nmap target list file: {e}"
+        target_args = ("-iL", target_list_path)
     else:
-         return f"Nmap scan requires sudo privileges. User cancelled sudo attempt for command: {' '.join(command)}"
+        target_args = targets
+
+    command = ["nmap", *scan_args, *safe_options, *target_args]
+
+    try:
+        # Nmap often requires root. Execute via sudo.
+        # Confirmation for run_sudo_command will be triggered if it's in HIGH_RISK_TOOLS.
+        logging.info("Nmap scan typically requires root privileges, preparing to execute via sudo.")
+        # Look up sudo while the user is answering the prompt rather than after
+        preflight = asyncio.ensure_future(asyncio.to_thread(shutil.which, _SUDO_PREFIX[0]))
+        sudo_args = {"command_args": command}
+        if await ask_confirmation_async("nmap_scan_sudo", sudo_args):
+             if not await preflight:
+                 return f"Error: Required executable(s) not found in PATH: {_SUDO_PREFIX[0]}"
+             # Directly call run_tool_command_async for sudo execution
+             return await run_tool_command_async(
+                  tool_name="run_sudo_command (for nmap)",
+                  command=[*_SUDO_PREFIX, *command],
+                  timeout=1800 # Nmap scans can take a very long time
+                  # Nmap success codes vary, 0 is typical success. Wrapper handles output.
+             )
+        else:
+             return f"Nmap scan requires sudo privileges. User cancelled sudo attempt for command: {' '.join(command)}"
+    finally:
+        if target_list_path:
+            await asyncio.to_thread(Path(target_list_path).unlink, missing_ok=True)
 
 @register_tool
 async def sqlmap_scan(url: str, level: int = 1, risk: int = 1, options: Optional[List[str]] = None) -> str:
@@ -93,7 +146,7 @@ async def sqlmap_scan(url: str, level: int = 1, risk: int = 1, options: Optional
         Formatted string result including status, stdout (scan findings), and stderr.
     """
     # Confirmation handled by the agent.
-    logging.critical(f"Preparing sqlmap scan: URL='{url}', Level={level}, Risk={risk}, Options='{options or []}'")
+    logging.critical("Preparing sqlmap scan: URL='%s', Level=%s, Risk=%s, Options='%s'", url, level, risk, options or [])
     try:
         level_int = int(level)
         risk_int = int(risk)
@@ -105,26 +158,18 @@ async def sqlmap_scan(url: str, level: int = 1, risk: int = 1, options: Optional
     if not isinstance(url, str) or not url or url.startswith('-'):
          return f"Error: Invalid URL provided for sqlmap: {url}"
 
+    # Block extremely dangerous options explicitly (see _SQLMAP_BLOCKED_OPTIONS)
+    # Allow flags and simple key=value, block complex chars
+    safe_options, error = validate_flag_options(options, "sqlmap")
+    if error: return error
+    # Check against blocked options (check if the option *starts* with a blocked one, e.g., --os-shell=...)
+    blocked = next((o for o in map(str, options or ()) if o.startswith(_SQLMAP_BLOCKED_OPTIONS)), None)
+    if blocked is not None:
+        logging.error("DANGEROUS sqlmap option BLOCKED: %s", blocked)
+        return f"Error: Dangerous sqlmap option blocked: {blocked}. Blocked list: {', '.join(_SQLMAP_BLOCKED_OPTIONS)}"
+
     # Build command, always include --batch
-    command = ["sqlmap", "-u", url, f"--level={level_int}", f"--risk={risk_int}", "--batch"]
-
-    # Block extremely dangerous options explicitly
-    blocked_options = ["--os-shell", "--sql-shell", "--eval", "--file-write", "--file-read"]
-    safe_options = []
-    if options:
-        if not isinstance(options, list): return "Error: 'options' argument must be a list of strings."
-        for opt in options:
-             opt_str = str(opt)
-             # Check against blocked options (check if the option *starts* with a blocked one, e.g., --os-shell=...)
-             if any(opt_str.startswith(blocked) for blocked in blocked_options):
-                 logging.error(f"DANGEROUS sqlmap option BLOCKED: {opt_str}")
-                 return f"Error: Dangerous sqlmap option blocked: {opt_str}. Blocked list: {blocked_options}"
-             # Allow flags and simple key=value, block complex chars
-             if opt_str.startswith('-') and not any(c in opt_str for c in ';|&`$()<>'):
-                 safe_options.append(opt_str)
-             else:
-                 logging.warning(f"Skipping potentially unsafe or invalid sqlmap option: {opt_str}")
-        command.extend(safe_options)
+    command = ["sqlmap", "-u", url, f"--level={level_int}", f"--risk={risk_int}", "--batch", *safe_options]
 
     # sqlmap usually doesn't need sudo
     return await run_tool_command_async(
@@ -149,26 +194,15 @@ async def nikto_scan(host: str, options: Optional[List[str]] = None) -> str:
         Formatted string result including status, stdout (scan findings), and stderr.
     """
     # Confirmation handled by the agent.
-    logging.warning(f"Preparing nikto scan: Host='{host}', Options='{options or []}'")
+    logging.warning("Preparing nikto scan: Host='%s', Options='%s'", host, options or [])
     if not isinstance(host, str) or not host or host.startswith('-'):
         return f"Error: Invalid host specified for nikto: '{host}'"
 
-    command = ["nikto", "-h", host] # Use -h for host specification
-
-    safe_options = []
-    if options:
-         if not isinstance(options, list): return "Error: 'options' argument must be a list of strings."
-         for opt in options:
-             opt_str = str(opt)
-             # Allow flags (e.g., -p, -Tuning) and simple values, block complex chars
-             if opt_str.startswith('-') and not any(c in opt_str for c in ';|&`$()<>'):
-                 safe_options.append(opt_str)
-             # Allow simple non-flag args like port numbers or tuning options if they look safe
-             elif not opt_str.startswith('-') and not any(c in opt_str for c in ';|&`$()<>'):
-                  safe_options.append(opt_str)
-             else:
-                 logging.warning(f"Skipping potentially unsafe or invalid nikto option: {opt_str}")
-         command.extend(safe_options)
+    # Flags (e.g., -p, -Tuning) and their simple values (port numbers, tuning options)
+    safe_options, error = validate_tool_options(options, "nikto")
+    if error: return error
+
+    command = ["nikto", "-h", host, *safe_options] # Use -h for host specification
 
     # Nikto doesn't usually need sudo
     return await run_tool_command_async(
@@ -203,59 +237,46 @@ async def msfvenom_generate(
         Formatted string result indicating success or failure, including output file path.
     """
     # Confirmation handled by the agent.
-    logging.critical(f"Preparing msfvenom: Payload='{payload}', Format='{format}', Output='{output_file}', LHOST={lhost}, LPORT={lport}, Options='{options or []}'")
+    logging.critical("Preparing msfvenom: Payload='%s', Format='%s', Output='%s', LHOST=%s, LPORT=%s, Options='%s'", payload, format, output_file, lhost, lport, options or [])
 
-    # Resolve output path and ensure parent exists (sync OK for path ops)
+    # Resolve output path and ensure parent exists (mkdir runs in a thread, like the cleanup unlink below)
     try:
         resolved_output_path = Path(output_file).resolve()
-        resolved_output_path.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(resolved_output_path.parent.mkdir, parents=True, exist_ok=True)
     except PermissionError:
         return f"Error: Permission denied creating directory for msfvenom output file '{resolved_output_path.parent}'."
     except Exception as mkdir_e:
         return f"Error creating directory for msfvenom output file '{resolved_output_path.parent}': {mkdir_e}"
 
     # Basic validation of payload/format names (alphanumeric, /, _, -, .)
-    safe_chars = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789/_-.')
-    if not isinstance(payload, str) or not all(c in safe_chars for c in payload):
+    if not isinstance(payload, str) or not _MSF_PAYLOAD_RE.fullmatch(payload):
         return f"Error: Invalid characters in payload name ('{payload}'). Use alphanumeric, '/', '_', '-', '.' only."
-    if not isinstance(format, str) or not all(c.isalnum() for c in format): # Format usually simpler
+    if not isinstance(format, str) or not _MSF_FORMAT_CHARS.issuperset(format): # Format usually simpler
         return f"Error: Invalid characters in format ('{format}'). Use alphanumeric only."
 
-    command = ["msfvenom", "-p", payload, "-f", format, "-o", str(resolved_output_path)]
-
-    # Validate and add LHOST/LPORT if provided
+    # Validate LHOST/LPORT if provided
+    payload_vars = []
     if lhost:
-        if not isinstance(lhost, str) or not all(c.isalnum() or c in '.-' for c in lhost): # Allow IPs and hostnames
+        if not isinstance(lhost, str) or not _MSF_LHOST_CHARS.issuperset(lhost): # Allow IPs and hostnames
             return f"Error: Invalid characters in LHOST: {lhost}"
-        command.append(f"LHOST={lhost}")
+        payload_vars.append(f"LHOST={lhost}")
     if lport:
         try:
             port_int = int(lport)
             if not (1 <= port_int <= 65535): raise ValueError("Port out of range")
-            command.append(f"LPORT={port_int}")
+            payload_vars.append(f"LPORT={port_int}")
         except ValueError:
             return f"Error: Invalid LPORT value: {lport}. Must be an integer between 1 and 65535."
 
-    # Validate and add options (expect VAR=VAL format)
-    if options:
-        if not isinstance(options, list): return "Error: 'options' argument must be a list of strings."
-        for opt in options:
-             opt_str = str(opt)
-             if '=' not in opt_str:
-                 logging.warning(f"Skipping invalid msfvenom option (missing '='): {opt_str}")
-                 continue
-             var, val = opt_str.split('=', 1)
-             # Basic validation for var/val - allow reasonably safe characters
-             var_safe_chars = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
-             # Allow more characters in value, but block highly problematic ones
-             val_unsafe_chars = set(';|"`$()<>')
-             if not var.isalnum() or not all(c in var_safe_chars for c in var):
-                  logging.warning(f"Skipping potentially unsafe msfvenom option variable name: {var}")
-                  continue
-             if any(c in val for c in val_unsafe_chars):
-                  logging.warning(f"Skipping potentially unsafe msfvenom option value: Contains unsafe characters {val_unsafe_chars}")
-                  continue
-             command.append(opt_str) # Add validated VAR=VAL string
+    # Validate options (expect VAR=VAL format; one regex match each)
+    if options and not isinstance(options, list): return "Error: 'options' argument must be a list of strings."
+    opts = [str(o) for o in options or ()]
+    valid_opts = [o for o in opts if _MSF_OPT_RE.fullmatch(o)]
+    if len(valid_opts) != len(opts) and logging.getLogger().isEnabledFor(logging.WARNING):
+        logging.warning("Skipping invalid or potentially unsafe msfvenom option(s) (expected VAR=value, value without %s): %s",
+                        _MSF_VAL_UNSAFE_CHARS, [o for o in opts if not _MSF_OPT_RE.fullmatch(o)])
+
+    command = ["msfvenom", "-p", payload, "-f", format, "-o", str(resolved_output_path), *payload_vars, *valid_opts]
 
     # Execute msfvenom
     result_str = await run_tool_command_async(
@@ -272,10 +293,10 @@ async def msfvenom_generate(
         # Try removing the potentially incomplete output file
         try:
             await asyncio.to_thread(resolved_output_path.unlink, missing_ok=True)
-            logging.info(f"Removed potentially incomplete msfvenom output file: {resolved_output_path}")
+            logging.info("Removed potentially incomplete msfvenom output file: %s", resolved_output_path)
             return f"msfvenom failed. Incomplete output file '{resolved_output_path}' removed (if it existed).\n---\n{result_str}"
         except OSError as unlink_err:
-            logging.warning(f"Could not remove potentially incomplete msfvenom output file '{resolved_output_path}': {unlink_err}")
+            logging.warning("Could not remove potentially incomplete msfvenom output file '%s': %s", resolved_output_path, unlink_err)
             return f"msfvenom failed. Could not remove incomplete output file '{resolved_output_path}'.\n---\n{result_str}"
 
 
@@ -301,54 +322,32 @@ async def gobuster_scan(
         Formatted string result including status, stdout (findings), and stderr.
     """
     # Confirmation handled by the agent.
-    logging.warning(f"Preparing gobuster: Mode='{mode}', Target='{target}', Wordlist='{wordlist_path}', Options='{options or []}'")
+    logging.warning("Preparing gobuster: Mode='%s', Target='%s', Wordlist='%s', Options='%s'", mode, target, wordlist_path, options or [])
 
     # Validate mode
     safe_mode = mode.lower() if isinstance(mode, str) else "dir"
-    allowed_modes = ["dir", "dns", "vhost"] # Limit modes for simplicity/safety initially
-    if safe_mode not in allowed_modes:
-        return f"Error: Unsupported gobuster mode: {mode}. Allowed: {', '.join(allowed_modes)}."
+    if safe_mode not in _GOBUSTER_MODES:
+        return f"Error: Unsupported gobuster mode: {mode}. Allowed: {', '.join(_GOBUSTER_MODES)}."
 
     # Validate target
     if not isinstance(target, str) or not target or target.startswith('-'):
          return f"Error: Invalid URL/domain target specified for gobuster: '{target}'"
 
-    # Validate and resolve wordlist path (sync OK for path ops)
+    # Validate and resolve wordlist path (in a worker thread; per call, so relative paths follow the current CWD)
     if not isinstance(wordlist_path, str): return "Error: wordlist_path must be a string."
     try:
-        resolved_wordlist_path = Path(wordlist_path).expanduser().resolve(strict=True)
-        if not resolved_wordlist_path.is_file(): return f"Error: Wordlist file not found or not a file: {wordlist_path}"
-        resolved_wordlist_path_str = str(resolved_wordlist_path)
-        logging.info(f"Using wordlist: {resolved_wordlist_path_str}")
-    except FileNotFoundError: return f"Error: Wordlist file not found: {wordlist_path}"
+        resolved_wordlist_path_str = await resolve_regular_file_async(wordlist_path)
+        if resolved_wordlist_path_str is None: return f"Error: Wordlist file not found or not a file: {wordlist_path}"
+        logging.info("Using wordlist: %s", resolved_wordlist_path_str)
     except Exception as e: return f"Error resolving wordlist path '{wordlist_path}': {e}"
 
 
-    command = ["gobuster", safe_mode]
-
-    # Mode specific required flags (target specification)
-    if safe_mode == "dir": command.extend(["-u", target])
-    elif safe_mode == "dns": command.extend(["-d", target])
-    elif safe_mode == "vhost": command.extend(["-u", target]) # Vhost also uses -u for base URL
-
-    # Add wordlist flag
-    command.extend(["-w", resolved_wordlist_path_str])
-
-    # Validate and add options
-    safe_options = []
-    if options:
-         if not isinstance(options, list): return "Error: 'options' argument must be a list of strings."
-         for opt in options:
-             opt_str = str(opt)
-             # Allow flags and simple values, block complex chars
-             if opt_str.startswith('-') and not any(c in opt_str for c in ';|&`$()<>'):
-                 safe_options.append(opt_str)
-             # Allow simple non-flag args like extensions or thread counts if they look safe
-             elif not opt_str.startswith('-') and not any(c in opt_str for c in ';|&`$()<>'):
-                  safe_options.append(opt_str)
-             else:
-                 logging.warning(f"Skipping potentially unsafe or invalid gobuster option: {opt_str}")
-         command.extend(safe_options)
+    # Validate options: flags and simple values like extensions or thread counts
+    safe_options, error = validate_tool_options(options, "gobuster")
+    if error: return error
+
+    # Mode, its target flag, wordlist, then options
+    command = ["gobuster", safe_mode, _GOBUSTER_MODES[safe_mode], target, "-w", resolved_wordlist_path_str, *safe_options]
 
     # Gobuster doesn't usually need sudo
     return await run_tool_command_async(
@@ -358,6 +357,65 @@ async def gobuster_scan(
         success_rc=0 # Gobuster usually returns 0 on completion. Findings are in stdout.
     )
 
+async def _bounded(sem: asyncio.Semaphore, coro) -> str:
+    """Awaits coro while holding sem (limits how many scans of a parallel_scan run at once)."""
+    async with sem:
+        return await coro
+
+@register_tool
+async def parallel_scan(
+    scanner: str,
+    targets: List[str],
+    options: Optional[List[str]] = None,
+    wordlist_path: Optional[str] = None,
+    mode: str = "dir",
+    max_concurrent: int = 4
+) -> str:
+    """
+    Runs the same nikto or gobuster scan against several targets concurrently (bounded).
+    The scans are network-bound, so running them side by side takes roughly as long as the slowest one.
+    For several nmap targets use nmap_scan directly; nmap scans them all in one process.
+    HIGH RISK. Requires confirmation by default.
+
+    Args:
+        scanner: Scanner to run per target: 'nikto' or 'gobuster'.
+        targets: List of hosts (nikto) or URLs/domains (gobuster).
+        options: Optional list of additional flags, passed to every scan.
+        wordlist_path: Wordlist file (required for gobuster).
+        mode: Gobuster mode ('dir', 'dns', 'vhost'). Default is 'dir'. Ignored for nikto.
+        max_concurrent: Maximum number of scans running at once (1-16). Default is 4.
+
+    Returns:
+        The result of each scan, one section per target.
+    """
+    logging.warning("Preparing parallel %s scan: Targets=%s, Options='%s', MaxConcurrent=%s", scanner, targets, options or [], max_concurrent)
+    if scanner not in _PARALLEL_SCANNERS:
+        return f"Error: Unsupported scanner for parallel_scan: '{scanner}'. Allowed: {', '.join(_PARALLEL_SCANNERS)}."
+    if not isinstance(targets, list) or not targets:
+        return "Error: 'targets' must be a non-empty list."
+    if scanner == "gobuster" and not wordlist_path:
+        return "Error: wordlist_path is required for gobuster."
+    try:
+        limit = min(max(1, int(max_concurrent)), _PARALLEL_SCAN_MAX_CONCURRENCY)
+    except (TypeError, ValueError):
+        return f"Error: max_concurrent must be an integer, got '{max_concurrent}'."
+
+    targets = [str(t) for t in targets]
+    if scanner == "nikto":
+        coros = [nikto_scan(t, options) for t in targets]
+    else:
+        coros = [gobuster_scan(t, wordlist_path, mode, options) for t in targets]
+    sem = asyncio.Semaphore(limit)
+    results = await asyncio.gather(*(_bounded(sem, c) for c in coros), return_exceptions=True)
+
+    sections = []
+    for target, result in zip(targets, results):
+        if isinstance(result, BaseException):
+            logging.error("parallel_scan: %s against '%s' raised: %r", scanner, target, result)
+            result = f"Error: {scanner} scan raised {type(result).__name__}: {result}"
+        sections.append(f"=== {scanner} {target} ===\n{result}")
+    return "\n\n".join(sections)
+
 @register_tool
 async def searchsploit_lookup(term: str, options: Optional[List[str]] = None) -> str:
     """
@@ -370,7 +428,7 @@ async def searchsploit_lookup(term: str, options: Optional[List[str]] = None) ->
     Returns:
         Formatted string result including status, stdout (search results), and stderr.
     """
-    logging.info(f"Running searchsploit lookup: Term='{term}', Options='{options or []}'")
+    logging.info("Running searchsploit lookup: Term='%s', Options='%s'", term, options or [])
     if not isinstance(term, str) or not term:
         return "Error: Search term cannot be empty."
 
@@ -380,33 +438,19 @@ async def searchsploit_lookup(term: str, options: Optional[List[str]] = None) ->
     safe_term = term
     if term.startswith('-') and not options:
          # Use '--' to signal end of options if term looks like a flag but no options were intended
-         logging.warning(f"Search term '{term}' starts with '-'. Using '--' prefix for safety.")
+         logging.warning("Search term '%s' starts with '-'. Using '--' prefix for safety.", term)
          safe_term = "-- " + term
 
     command = ["searchsploit"]
 
     # Validate and add allowed/safe options
-    safe_options = []
-    if options:
-         if not isinstance(options, list): return "Error: 'options' argument must be a list of strings."
-         # Allow common/safe options explicitly, filter others cautiously
-         allowed_opts_prefixes = ['-j', '--json', '-w', '--www', '-t', '--title', '--id', '-c', '--case', '--nmap', '--exclude=', '--include=', '--ignore', '--overflow']
-         for opt in options:
-             opt_str = str(opt)
-             is_safe = False
-             # Check against known safe prefixes
-             if any(opt_str.startswith(safe_prefix) for safe_prefix in allowed_opts_prefixes):
-                 is_safe = True
-             # Allow simple single-letter flags
-             elif opt_str.startswith('-') and len(opt_str) == 2 and opt_str[1].isalpha():
-                  is_safe = True
-
-             # Final check for problematic characters
-             if is_safe and not any(c in opt_str for c in ';|&`$()<>'):
-                 safe_options.append(opt_str)
-             else:
-                 logging.warning(f"Skipping potentially unsafe or complex searchsploit option: {opt_str}")
-         command.extend(safe_options)
+    # Allow known safe prefixes and simple single-letter flags, filter others cautiously
+    safe_options, error = validate_tool_options(
+        options, "searchsploit",
+        lambda o: o.startswith(_SEARCHSPLOIT_ALLOWED_PREFIXES) or (len(o) == 2 and o[0] == '-' and o[1].isalpha())
+    )
+    if error: return error
+    command.extend(safe_options)
 
     # Add the search term(s)
     command.append(safe_term) # Add the (potentially prefixed) term
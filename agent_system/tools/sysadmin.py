@@ -6,9 +6,22 @@ from typing import List, Dict, Any, Optional, Tuple, Union
 
 # Import the registration decorator and utility functions/settings
 from . import register_tool
-from .tool_utils import run_tool_command_async, ask_confirmation_async
+from .tool_utils import run_tool_command_async, ask_confirmation_async, validate_flag_options, _UNSAFE_CHARS_RE
 from agent_system.config import settings
 
+# Argv prefix for privileged execution ("--" stops sudo option parsing)
+_SUDO_PREFIX = ("sudo", "--")
+# RPM package manager used by yum_command (dnf where installed); fixed for the process lifetime
+_PKG_MGR = "dnf" if Path("/usr/bin/dnf").exists() else "yum"
+# Package-manager subcommands that take a package argument
+_APT_NEEDS_PKG = frozenset({"install", "remove", "purge", "reinstall", "show", "download", "source", "depends", "rdepends", "policy"})
+_YUM_NEEDS_PKG = frozenset({"install", "remove", "reinstall", "downgrade", "mark", "erase", "info", "provides", "repoquery", "list", "search"})
+_YUM_PKG_OPTIONAL = frozenset({"list", "search", "info"})
+# systemctl actions accepted (tuple keeps the order for error messages), and those that take no unit
+_SYSTEMCTL_ACTIONS = ("status", "start", "stop", "restart", "reload", "enable", "disable", "is-active", "is-enabled", "show", "list-units", "list-unit-files", "daemon-reload")
+_SYSTEMCTL_NO_SERVICE = frozenset({"list-units", "list-unit-files", "daemon-reload"})
+_SYSTEMCTL_QUERY_ACTIONS = frozenset({"status", "is-active", "is-enabled"})
+
 # --- SysAdmin Specific Tools ---
 
 @register_tool
@@ -26,22 +39,16 @@ async def apt_command(subcommand: str, package: Optional[str] = None, options: O
         Formatted string result including status, stdout, and stderr.
     """
     # (Implementation remains the same as corrected version)
-    logging.warning(f"Preparing apt command: {subcommand} {package or ''} {' '.join(options or [])}")
-    needs_pkg = ["install", "remove", "purge", "reinstall", "show", "download", "source", "depends", "rdepends", "policy"]
-    if subcommand in needs_pkg and not package: return f"Error: Package name is required for apt {subcommand}."
+    logging.warning("Preparing apt command: %s %s %s", subcommand, package or '', options or [])
+    if subcommand in _APT_NEEDS_PKG and not package: return f"Error: Package name is required for apt {subcommand}."
     base_command = ["apt", subcommand]
     if package: base_command.append(str(package))
-    safe_options = []
-    if options:
-        if not isinstance(options, list): return "Error: apt 'options' must be a list of strings."
-        for opt in options:
-            opt_str = str(opt)
-            if opt_str.startswith('-') and not any(c in opt_str for c in ';|&`$()<>'): safe_options.append(opt_str)
-            else: logging.warning(f"Skipping potentially unsafe apt option: {opt_str}")
-        base_command.extend(safe_options)
+    safe_options, error = validate_flag_options(options, "apt")
+    if error: return error
+    base_command.extend(safe_options)
     logging.info("apt command requires root privileges, preparing execute via sudo.")
     return await run_tool_command_async(
-         tool_name="run_sudo_command (for apt)", command=["sudo", "--"] + base_command, timeout=600
+         tool_name="run_sudo_command (for apt)", command=[*_SUDO_PREFIX, *base_command], timeout=600
     )
 
 @register_tool
@@ -59,23 +66,17 @@ async def yum_command(subcommand: str, package: Optional[str] = None, options: O
         Formatted string result including status, stdout, and stderr.
     """
     # (Implementation remains the same as corrected version)
-    cmd_base = "dnf" if Path("/usr/bin/dnf").exists() else "yum"
-    logging.warning(f"Preparing {cmd_base} command: {subcommand} {package or ''} {' '.join(options or [])}")
-    needs_pkg = ["install", "remove", "reinstall", "downgrade", "mark", "erase", "info", "provides", "repoquery", "list", "search"]
-    if subcommand in needs_pkg and not package and subcommand not in ["list", "search", "info"]: return f"Error: Package name may be required for {cmd_base} {subcommand}."
+    cmd_base = _PKG_MGR
+    logging.warning("Preparing %s command: %s %s %s", cmd_base, subcommand, package or '', options or [])
+    if subcommand in _YUM_NEEDS_PKG and not package and subcommand not in _YUM_PKG_OPTIONAL: return f"Error: Package name may be required for {cmd_base} {subcommand}."
     base_command = [cmd_base, subcommand]
     if package: base_command.append(str(package))
-    safe_options = []
-    if options:
-        if not isinstance(options, list): return f"Error: {cmd_base} 'options' must be a list of strings."
-        for opt in options:
-            opt_str = str(opt)
-            if opt_str.startswith('-') and not any(c in opt_str for c in ';|&`$()<>'): safe_options.append(opt_str)
-            else: logging.warning(f"Skipping potentially unsafe {cmd_base} option: {opt_str}")
-        base_command.extend(safe_options)
-    logging.info(f"{cmd_base} command requires root privileges, preparing execute via sudo.")
+    safe_options, error = validate_flag_options(options, cmd_base)
+    if error: return error
+    base_command.extend(safe_options)
+    logging.info("%s command requires root privileges, preparing execute via sudo.", cmd_base)
     return await run_tool_command_async(
-         tool_name=f"run_sudo_command (for {cmd_base})", command=["sudo", "--"] + base_command, timeout=600
+         tool_name=f"run_sudo_command (for {cmd_base})", command=[*_SUDO_PREFIX, *base_command], timeout=600
     )
 
 @register_tool
@@ -94,25 +95,23 @@ async def systemctl_command(action: str, service: str, use_sudo: bool = True) ->
         Formatted string result including status, stdout, and stderr.
     """
     # (Implementation remains the same as corrected version, slight adjustment for service optionality)
-    logging.info(f"Preparing systemctl command: Action='{action}', Service='{service or 'N/A'}', Sudo={use_sudo}")
-    allowed_actions = ["status", "start", "stop", "restart", "reload", "enable", "disable", "is-active", "is-enabled", "show", "list-units", "list-unit-files", "daemon-reload"]
-    if action not in allowed_actions: return f"Error: Invalid systemctl action '{action}'. Allowed: {', '.join(allowed_actions)}"
-    actions_without_service = ["list-units", "list-unit-files", "daemon-reload"]
+    logging.info("Preparing systemctl command: Action='%s', Service='%s', Sudo=%s", action, service or 'N/A', use_sudo)
+    if action not in _SYSTEMCTL_ACTIONS: return f"Error: Invalid systemctl action '{action}'. Allowed: {', '.join(_SYSTEMCTL_ACTIONS)}"
     base_command = ["systemctl", action]
-    if action not in actions_without_service:
-         if not service or not isinstance(service, str) or any(c in service for c in ';|&`$()<>'): return f"Error: Invalid or missing service name for action '{action}'."
+    if action not in _SYSTEMCTL_NO_SERVICE:
+         if not service or not isinstance(service, str) or _UNSAFE_CHARS_RE.search(service): return f"Error: Invalid or missing service name for action '{action}'."
          base_command.append(service)
 
     if use_sudo:
-        logging.info(f"systemctl {action} requires privileges, preparing execute via sudo.")
+        logging.info("systemctl %s requires privileges, preparing execute via sudo.", action)
         return await run_tool_command_async(
-            tool_name=f"run_sudo_command (for systemctl {action})", command=["sudo", "--"] + base_command, timeout=60
+            tool_name=f"run_sudo_command (for systemctl {action})", command=[*_SUDO_PREFIX, *base_command], timeout=60
         )
     else:
-        logging.info(f"Running systemctl without sudo: {' '.join(base_command)}")
+        logging.info("Running systemctl without sudo: %s", base_command)
         success_codes = [0]
-        if action in ["status", "is-active", "is-enabled"]: success_codes.extend([1, 3, 4])
-        failure_notes={ 1: f"Service not found or other error.", 3: f"Service inactive or disabled.", 4: f"Service enabling/disabling failed/not found.", 5: f"Invalid arguments or operation.", 6: f"Service not installed or masked."} if action not in actions_without_service else None
+        if action in _SYSTEMCTL_QUERY_ACTIONS: success_codes.extend([1, 3, 4])
+        failure_notes={ 1: f"Service not found or other error.", 3: f"Service inactive or disabled.", 4: f"Service enabling/disabling failed/not found.", 5: f"Invalid arguments or operation.", 6: f"Service not installed or masked."} if action not in _SYSTEMCTL_NO_SERVICE else None
         return await run_tool_command_async(
             tool_name="systemctl_command (no-sudo)", command=base_command, success_rc=success_codes, failure_notes=failure_notes
         )
@@ -1,14 +1,216 @@
 import asyncio
+import fnmatch
+import functools
 import logging
+import os
+import re
 import shlex
-from pathlib import Path
+import stat
+import sys
 from typing import List, Dict, Any, Optional, Tuple, Union
 
 # Import the registration decorator and utility functions/settings
 from . import register_tool
-from .tool_utils import run_tool_command_async, ask_confirmation_async
+from .tool_utils import run_tool_command_async, ask_confirmation_async, format_tool_result, resolve_dir_async, run_blocking, is_fixed_string
 from agent_system.config import settings
 
+_STDOUT_ENC = sys.stdout.encoding or 'utf-8'
+# 'grep -I': a NUL byte in the first block marks a file as binary. So does a first block that is mostly
+# C0 control bytes (other than whitespace/backspace/ESC): what is left after deleting _GREP_TEXT_BYTES.
+# High-bit bytes count as text so UTF-8 and legacy-encoded text files are still searched.
+_GREP_BINARY_SNIFF_BYTES = 8192
+_GREP_TEXT_BYTES = bytes(b for b in range(256) if b >= 0x20 or b in b'\t\n\r\f\b\v\x1b')
+_GREP_MAX_CONTROL_RATIO = 0.3
+# Files up to this size are read whole and pre-screened with one search; larger ones are scanned line by line
+_GREP_WHOLE_FILE_MAX_BYTES = 8 * 1024 * 1024
+# Files per in-process search task, and how many tasks may occupy the shared tool I/O pool at once
+_GREP_FILES_PER_TASK = 32
+_GREP_MAX_CONCURRENCY = 8
+# find_files: maximum depth, and name patterns left to find(1) (backslash escapes and POSIX classes differ in fnmatch)
+_FIND_MAX_DEPTH = 5
+_FIND_GLOB_ONLY_RE = re.compile(r"\\|\[\[[:=.]")
+# sed_command: single substitute / delete scripts (with '/' delimiters) that can run in-process on input_text
+_SED_SUBST_RE = re.compile(r"s/((?:[^/\\\n]|\\[^\n])*)/((?:[^/\\\n]|\\[^\n])*)/([gIi]*)")
+_SED_DELETE_RE = re.compile(r"/((?:[^/\\\n]|\\[^\n])+)/d")
+# Larger input_text is handed to sed so a long regex run cannot stall the event loop
+_SED_INPROC_MAX_CHARS = 256 * 1024
+
+
+# --- Pattern Compilation (cached: agent sessions repeat the same patterns across calls) ---
+
+@functools.lru_cache(maxsize=256)
+def _compile_fixed(pattern: str) -> Optional["re.Pattern[bytes]"]:
+    """Compiles a fixed-string grep_files pattern for the in-process search, or None for a regex (left to grep)."""
+    if not is_fixed_string(pattern):
+        return None
+    return re.compile(re.escape(pattern.encode('utf-8')))
+
+@functools.lru_cache(maxsize=256)
+def _compile_glob(pattern: str):
+    """Returns a match predicate for a find_files name pattern, or None if it needs find's fnmatch dialect."""
+    if _FIND_GLOB_ONLY_RE.search(pattern):
+        return None
+    return re.compile(fnmatch.translate(pattern)).match
+
+
+def _read_small_file(fd: int, size: int) -> bytes:
+    """Reads a whole file of (st_size) `size` from fd: one read() in the common case, more only if it grew."""
+    chunks = [os.read(fd, size + 1)]
+    if len(chunks[0]) > size:
+        while True:
+            chunk = os.read(fd, _GREP_BINARY_SNIFF_BYTES)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+
+def _looks_binary(head: bytes) -> bool:
+    """Binary sniff on a file's first block: any NUL, or more than _GREP_MAX_CONTROL_RATIO control bytes."""
+    if b'\0' in head:
+        return True
+    return len(head.translate(None, _GREP_TEXT_BYTES)) > _GREP_MAX_CONTROL_RATIO * len(head)
+
+
+def _grep_lines(pattern: "re.Pattern[bytes]", prefix: bytes, lines, out: List[bytes]) -> int:
+    """Appends 'prefix + lineno:line' for each matching line and returns the bytes added (with newlines)."""
+    added = 0
+    for lineno, line in enumerate(lines, 1):
+        if pattern.search(line):
+            hit = prefix + str(lineno).encode() + b':' + line
+            out.append(hit)
+            added += len(hit) + 1
+    return added
+
+
+def _grep_file(pattern: "re.Pattern[bytes]", path: str, out: List[bytes]) -> int:
+    """
+    Appends 'path:lineno:line' for each matching line of a text file and returns the bytes added (with newlines).
+    Unreadable files are skipped ('grep -s'). Small files cost open + fstat + read + close; no buffered file object.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return 0
+    try:
+        size = os.fstat(fd).st_size
+        if size > _GREP_WHOLE_FILE_MAX_BYTES:
+            # Large files are scanned line by line through a buffered reader (which takes over the fd)
+            with os.fdopen(fd, 'rb') as f:
+                fd = -1
+                if _looks_binary(f.read(_GREP_BINARY_SNIFF_BYTES)):
+                    return 0
+                f.seek(0)
+                lines = (line[:-1] if line.endswith(b'\n') else line for line in f)
+                return _grep_lines(pattern, os.fsencode(path) + b':', lines, out)
+        data = _read_small_file(fd, size)
+    except OSError:
+        return 0
+    finally:
+        if fd >= 0:
+            os.close(fd)
+    if _looks_binary(data[:_GREP_BINARY_SNIFF_BYTES]):
+        return 0
+    # One search over the whole file rejects most files without splitting them into lines
+    if not pattern.search(data):
+        return 0
+    lines = data[:-1].split(b'\n') if data.endswith(b'\n') else data.split(b'\n')
+    return _grep_lines(pattern, os.fsencode(path) + b':', lines, out)
+
+
+def _list_tree_files_sync(root: str) -> List[str]:
+    """Regular files under root, in 'grep -r' walk order: symlinks are not followed, unreadable dirs are skipped."""
+    files: List[str] = []
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        files.append(entry.path)
+                except OSError:
+                    continue
+    return files
+
+
+def _grep_batch_sync(pattern: "re.Pattern[bytes]", paths: List[str], progress: List[int], limit: int) -> List[bytes]:
+    """
+    Greps a batch of files in order. progress[0] is the output size shared by all batches of one search;
+    once it passes `limit` the remaining files are skipped. Updates race between threads, so the cut-off is
+    approximate; the caller truncates the joined output exactly.
+    """
+    out: List[bytes] = []
+    for path in paths:
+        if progress[0] > limit:
+            break
+        progress[0] += _grep_file(pattern, path, out)
+    return out
+
+
+async def _grep_tree(pattern: "re.Pattern[bytes]", root: str, limit: Optional[int]) -> Tuple[bytes, bool]:
+    """
+    Recursive search like 'grep -r -n -I -s', with file batches searched concurrently on the tool I/O pool so
+    one file's open/read overlaps matching in another. Stops once `limit` bytes (if given) are collected.
+    If cancelled, batches already running in the pool stop at their next file. Returns (output, truncated).
+    """
+    stop_at = sys.maxsize if limit is None else limit
+    files = await run_blocking(_list_tree_files_sync, root)
+    sem = asyncio.Semaphore(_GREP_MAX_CONCURRENCY)
+    progress = [0]
+
+    async def search(batch: List[str]) -> List[bytes]:
+        async with sem:
+            return await run_blocking(_grep_batch_sync, pattern, batch, progress, stop_at)
+
+    try:
+        results = await asyncio.gather(*(
+            search(files[i:i + _GREP_FILES_PER_TASK]) for i in range(0, len(files), _GREP_FILES_PER_TASK)
+        ))
+    except asyncio.CancelledError:
+        progress[0] = sys.maxsize # Pool threads can't be interrupted; this makes them skip their remaining files
+        raise
+    data = b'\n'.join(line for batch in results for line in batch)
+    return data[:stop_at], len(data) > stop_at
+
+
+def _find_tree_sync(root: str, name_match, max_depth: int) -> Tuple[List[str], List[str]]:
+    """
+    Lists root and everything below it to max_depth in 'find -P' pre-order (symlinks listed, not followed),
+    keeping entries whose name passes name_match (all if None). Returns (paths, find-style error lines).
+    """
+    paths: List[str] = []
+    errors: List[str] = []
+    if name_match is None or name_match(os.path.basename(root) or root):
+        paths.append(root)
+
+    def walk(directory: str, depth: int) -> None:
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            errors.append(f"find: '{directory}': {e.strerror}")
+            return
+        with entries:
+            for entry in entries:
+                if name_match is None or name_match(entry.name):
+                    paths.append(entry.path)
+                if depth < max_depth:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        walk(entry.path, depth + 1)
+
+    walk(root, 1)
+    return paths, errors
+
+
 @register_tool
 async def grep_files(pattern: str, path: str = ".") -> str:
     """
@@ -24,9 +226,9 @@ async def grep_files(pattern: str, path: str = ".") -> str:
         Formatted string result including status, stdout (matching lines), and stderr.
     """
     try:
-        # Resolve path synchronously (low block risk)
-        search_path = Path(path).resolve()
-        if not search_path.is_dir():
+        # Resolve and stat in a worker thread, off the event loop
+        search_path = await resolve_dir_async(path)
+        if search_path is None:
              return f"Error: Search path '{path}' is not a valid directory or is inaccessible."
     except Exception as e:
         return f"Error resolving search path '{path}': {e}"
@@ -38,6 +240,28 @@ async def grep_files(pattern: str, path: str = ".") -> str:
     # Use -r for recursive, -n for line numbers, -I to ignore binaries, -s to suppress file errors
     command = ["grep", "-E", "-r", "-n", "-I", "-s", "--", pattern, str(search_path)]
 
+    # Output is cut at MAX_TOOL_OUTPUT_BYTES (0 = no cap) on both paths instead of buffering it all
+    output_limit = settings.MAX_TOOL_OUTPUT_BYTES or None
+    # Fixed strings are searched in-process (no fork/exec or pipe); regexes go to grep's linear-time matcher
+    compiled = _compile_fixed(str(pattern))
+    if compiled is not None:
+        try:
+            # Bounded like the grep process would be
+            matches, truncated = await asyncio.wait_for(
+                _grep_tree(compiled, str(search_path), output_limit), settings.COMMAND_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logging.error(f"In-process search for '{pattern}' timed out after {settings.COMMAND_TIMEOUT} seconds.")
+            return format_tool_result(
+                "grep_files", "in-process", shlex.join(command), -1, b"",
+                f"Error: Command timed out after {settings.COMMAND_TIMEOUT} seconds.", success_rc=[0, 1]
+            )
+        stderr = f"[Output truncated at {output_limit} bytes; search stopped early.]" if truncated else ""
+        return format_tool_result(
+            "grep_files", "in-process", shlex.join(command), 0 if matches else 1, matches, stderr,
+            success_rc=[0, 1], failure_notes={1: "No lines matching the pattern were found."}
+        )
+
     # grep exit codes: 0 = found, 1 = not found, >1 = error
     return await run_tool_command_async(
         tool_name="grep_files",
@@ -46,7 +270,8 @@ async def grep_files(pattern: str, path: str = ".") -> str:
         failure_notes={
             1: "No lines matching the pattern were found.", # Provide specific note for RC=1
             # Other RCs (>1) indicate errors like bad regex or filesystem issues not suppressed by -s.
-        }
+        },
+        stream_limit=output_limit
     )
 
 
@@ -65,9 +290,9 @@ async def find_files(name_pattern: Optional[str] = None, path: str = ".") -> str
         Formatted string result including status, stdout (list of found paths), and stderr.
     """
     try:
-        # Resolve path synchronously
-        search_path = Path(path).resolve()
-        if not search_path.is_dir():
+        # Resolve and stat in a worker thread, off the event loop
+        search_path = await resolve_dir_async(path)
+        if search_path is None:
             return f"Error: Search path '{path}' is not a valid directory or is inaccessible."
     except Exception as e:
         return f"Error resolving search path '{path}': {e}"
@@ -75,7 +300,7 @@ async def find_files(name_pattern: Optional[str] = None, path: str = ".") -> str
     logging.info(f"Finding files matching '{name_pattern or '*'}' in directory: {search_path}")
 
     # Build base command
-    command = ["find", str(search_path), "-maxdepth", "5"] # Limit depth
+    command = ["find", str(search_path), "-maxdepth", str(_FIND_MAX_DEPTH)] # Limit depth
 
     # Add name pattern if provided
     if name_pattern:
@@ -88,6 +313,14 @@ async def find_files(name_pattern: Optional[str] = None, path: str = ".") -> str
             # Let find handle it, but log warning. Non-shell execution prevents direct injection.
         command.extend(["-name", name_pattern])
 
+    # List in-process (no fork/exec or pipe) unless the glob relies on find's own fnmatch dialect
+    name_match = _compile_glob(str(name_pattern)) if name_pattern else None
+    if not name_pattern or name_match is not None:
+        paths, errors = await run_blocking(_find_tree_sync, str(search_path), name_match, _FIND_MAX_DEPTH)
+        return format_tool_result(
+            "find_files", "in-process", shlex.join(command), 1 if errors else 0, "\n".join(paths), "\n".join(errors)
+        )
+
     # find exit code 0 = success (even if nothing found), >0 = error
     return await run_tool_command_async(
         tool_name="find_files",
@@ -97,6 +330,154 @@ async def find_files(name_pattern: Optional[str] = None, path: str = ".") -> str
     )
 
 
+def _bre_to_python(bre: str) -> Optional[str]:
+    """
+    Translates a POSIX/GNU basic regex (as used by sed) to Python re syntax. Returns None for constructs whose
+    meaning differs between the engines (alternation and quantified groups, which POSIX matches leftmost-longest;
+    character classes; GNU-only escapes), so the caller can fall back to sed.
+    """
+    out: List[str] = []
+    i, n = 0, len(bre)
+    at_start = True # Where BRE treats '*' as a literal and '^' as an anchor
+    while i < n:
+        c = bre[i]
+        if c == '\\':
+            if i + 1 >= n: return None
+            d = bre[i + 1]
+            i += 2
+            if d == '(':
+                out.append('('); at_start = True; continue
+            if d == ')':
+                if bre[i:i + 1] == '*' or bre[i:i + 2] in ('\\+', '\\?', '\\{'): return None
+                out.append(')')
+            elif d in '{}+?': out.append(d)
+            elif d in '123456789': out.append('\\' + d)
+            elif d == 'n': out.append('\\n')
+            elif d == 't': out.append('\\t')
+            elif d in '.*[]^$\\/': out.append(re.escape(d))
+            else: return None # \|, \w, \b, \<, \` ... left to sed
+            at_start = False
+        elif c == '[':
+            k = i + 1
+            if bre[k:k + 1] == '^': k += 1
+            if bre[k:k + 1] == ']': k += 1
+            end = bre.find(']', k)
+            if end == -1: return None
+            body = bre[i + 1:end]
+            if '[:' in body or '[=' in body or '[.' in body: return None
+            negate = body.startswith('^')
+            if negate: body = body[1:]
+            # Backslash and '[' are literal inside POSIX brackets
+            out.append('[' + ('^' if negate else '') + body.replace('\\', '\\\\').replace('[', '\\[') + ']')
+            i = end + 1
+            at_start = False
+        elif c == '*':
+            out.append('\\*' if at_start else '*')
+            i += 1
+            at_start = False
+        elif c == '^':
+            out.append('^' if at_start else '\\^')
+            i += 1
+        elif c == '$':
+            rest = bre[i + 1:]
+            out.append('$' if rest == '' or rest.startswith('\\)') else '\\$')
+            i += 1
+            at_start = False
+        elif c == '.':
+            out.append('.')
+            i += 1
+            at_start = False
+        else:
+            out.append(re.escape(c))
+            i += 1
+            at_start = False
+    return ''.join(out)
+
+
+def _sed_replacement(rep: str, groups: int):
+    """Builds a re.sub callable for a sed replacement ('&', '\\1'-'\\9', '\\n', '\\t', escaped literals), or None."""
+    parts: List[Union[str, int]] = []
+    i, n = 0, len(rep)
+    while i < n:
+        c = rep[i]
+        if c == '\\':
+            if i + 1 >= n: return None
+            d = rep[i + 1]
+            i += 2
+            if d.isdigit():
+                if int(d) > groups: return None # sed reports the invalid reference
+                parts.append(int(d))
+            elif d == 'n': parts.append('\n')
+            elif d == 't': parts.append('\t')
+            elif d in '&\\/': parts.append(d)
+            else: return None # \L, \U, \E ... case conversion is left to sed
+        else:
+            parts.append(0 if c == '&' else c)
+            i += 1
+    return lambda m: ''.join(p if isinstance(p, str) else (m.group(p) or '') for p in parts)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_sed(script: str) -> Optional[Tuple["re.Pattern[str]", Any, int]]:
+    """
+    Compiles a single 's/RE/REP/[gI]' or '/RE/d' sed script to (regex, replacement callable or None for delete,
+    re.sub count). Returns None when the script needs real sed.
+    """
+    script = script.strip()
+    subst = _SED_SUBST_RE.fullmatch(script)
+    delete = None if subst else _SED_DELETE_RE.fullmatch(script)
+    if not subst and not delete:
+        return None
+    flags = subst[3] if subst else ""
+    pattern = _bre_to_python(subst[1] if subst else delete[1])
+    if not pattern:
+        return None # Also covers the empty RE, which sed takes to mean "the last RE used"
+    try:
+        compiled = re.compile(pattern, re.IGNORECASE if ('I' in flags or 'i' in flags) else 0)
+    except re.error:
+        return None
+    if delete:
+        return compiled, None, 0
+    repl = _sed_replacement(subst[2], compiled.groups)
+    if repl is None:
+        return None
+    if 'g' in flags and compiled.search('') is not None and pattern not in ('^', '$'):
+        return None # Python and sed disagree on empty matches next to a previous match
+    return compiled, repl, 0 if 'g' in flags else 1
+
+
+def _try_inprocess_sed(script: str, text: str) -> Optional[str]:
+    """
+    Runs a simple sed script (see _compile_sed) on text with Python's re, line by line like sed.
+    Returns the output text, or None when the script needs real sed.
+    """
+    compiled_script = _compile_sed(str(script))
+    if compiled_script is None:
+        return None
+    compiled, repl, count = compiled_script
+    if text == "":
+        return ""
+    lines = text.split('\n')
+    trailing_newline = text.endswith('\n')
+    if trailing_newline: lines.pop()
+
+    if repl is None:
+        last = len(lines) - 1
+        return ''.join(
+            line + ('\n' if idx < last or trailing_newline else '')
+            for idx, line in enumerate(lines) if not compiled.search(line)
+        )
+    return '\n'.join(compiled.sub(repl, line, count=count) for line in lines) + ('\n' if trailing_newline else '')
+
+
+def _resolve_sed_input_sync(path: str) -> Optional[Tuple[str, int]]:
+    """Expands '~', resolves symlinks and stats once. Returns (real path, size), or None if missing/not a regular file."""
+    resolved = os.path.realpath(os.path.expanduser(path))
+    try: st = os.stat(resolved)
+    except FileNotFoundError: return None
+    return (resolved, st.st_size) if stat.S_ISREG(st.st_mode) else None
+
+
 @register_tool
 async def sed_command(script: str, file_path: Optional[str] = None, input_text: Optional[str] = None) -> str:
     """
@@ -120,33 +501,39 @@ async def sed_command(script: str, file_path: Optional[str] = None, input_text:
 
     command = ["sed", script]
     input_bytes: Optional[bytes] = None
-    cwd: Optional[Path] = None
     target_desc = "input text"
+    # sed output is usually about the size of its input: presize the stdout buffer to that
+    expected_out_size: int
 
     if file_path:
         if not isinstance(file_path, str): return "Error: file_path must be a string."
         try:
-             # Resolve file path synchronously
-             file_target_path = Path(file_path).resolve(strict=True) # Ensure exists
-             if not file_target_path.is_file():
-                  return f"Error: Input path is not a file: {file_path}"
+             # Resolve and stat in a worker thread, off the event loop
+             resolved_input = await run_blocking(_resolve_sed_input_sync, file_path)
+             if resolved_input is None:
+                  return f"Error: Input file not found or not a regular file: {file_path}"
+             file_target_path, expected_out_size = resolved_input
              # Pass absolute path to sed command for clarity
              command.append(str(file_target_path))
              target_desc = f"file '{file_path}'"
-             # Run from script's CWD, not necessarily file's CWD, for consistency
-             cwd = Path.cwd()
              logging.info(f"Running sed script on file: {file_target_path}")
-        except FileNotFoundError:
-             return f"Error: Input file not found: {file_path}"
         except Exception as e:
              return f"Error resolving file path '{file_path}': {e}"
     else: # Use input_text
          if not isinstance(input_text, str): return "Error: input_text must be a string."
+         # Simple substitute/delete scripts on short text run in-process: no fork/exec or pipe round-trip
+         if len(input_text) <= _SED_INPROC_MAX_CHARS:
+              output = _try_inprocess_sed(script, input_text)
+              if output is not None:
+                   logging.info("Ran sed script in-process on provided input text (length: %d chars).", len(input_text))
+                   return format_tool_result("sed_command", "in-process", shlex.join(command), 0, output, "")
          try:
-              # Encode input text to bytes for async helper
+              # Encode input text to bytes for async helper: the single encode on this path (the in-process
+              # fast path above never encodes). For ASCII-only text CPython already copies the stored bytes
+              # directly, so an isascii()/'ascii' split would not save a pass.
               input_bytes = input_text.encode('utf-8')
-              logging.info(f"Running sed script on provided input text (length: {len(input_bytes)} bytes).")
-              cwd = Path.cwd()
+              expected_out_size = len(input_bytes)
+              logging.info("Running sed script on provided input text (length: %d bytes).", expected_out_size)
          except Exception as e:
               return f"Error encoding input_text for sed: {e}"
 
@@ -155,6 +542,6 @@ async def sed_command(script: str, file_path: Optional[str] = None, input_text:
         tool_name="sed_command",
         command=command,
         input_data=input_bytes, # Pass encoded bytes if using input_text
-        cwd=cwd, # Run from consistent CWD
-        success_rc=0 # sed usually returns 0 on success
+        success_rc=0, # sed usually returns 0 on success
+        expected_out_size=expected_out_size
     )
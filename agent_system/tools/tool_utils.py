@@ -1,16 +1,200 @@
 import asyncio
+import atexit
+import concurrent.futures
+import os
+import re
 import shlex
 import logging
+import stat
 import sys
 import subprocess # Need this for CalledProcessError
+import threading
+import weakref
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple, Union
+from typing import Callable, Collection, List, Dict, Any, Optional, Tuple, Union
 
 # Import settings module - values will be accessed inside functions
 from agent_system.config import settings
 
+# Overrides for local tools whose output is plain ASCII (ps, grep, uname, kill...). Not used for
+# ssh/scp: the default 'SendEnv LANG LC_*' would carry them to the remote command.
+# The C locale skips multibyte-aware character handling in libc and keeps messages in English,
+# which the stderr heuristics in some tools rely on.
+_C_LOCALE_VARS = {"LC_ALL": "C", "LANG": "C"}
+# ERE metacharacters (and newline, which grep reads as a pattern separator). Only patterns without any
+# are matched in-process: Python's backtracking re holds the GIL and can run for minutes on patterns
+# like 'a*a*a*b' that grep -E's automaton handles in linear time.
+_ERE_METACHARS_RE = re.compile(r"[.\[\]()*+?{}|^$\\\n]")
+# Encodings for decoding tool output, looked up once rather than on every command
+_STDOUT_ENC = sys.stdout.encoding or 'utf-8'
+_STDERR_ENC = sys.stderr.encoding or 'utf-8'
+
+# --- Blocking I/O Offload ---
+
+# One bounded pool for the tools' blocking calls (path resolution, tree walks, file reads),
+# created up front and kept separate from the loop's default executor so they neither contend with
+# other to_thread users nor pay lazy executor start-up on the first call. Thread pools are not tied
+# to an event loop, so a single module-level pool serves every loop.
+_TOOL_IO_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 4) * 2), thread_name_prefix="tool-io"
+)
+atexit.register(_TOOL_IO_EXECUTOR.shutdown, wait=False)
+# Confirmation prompts block on stdin for as long as the user takes to answer, so they get their own
+# single thread: a burst of prompts queues there one at a time instead of pinning tool-io workers.
+_CONFIRM_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="confirm")
+atexit.register(_CONFIRM_EXECUTOR.shutdown, wait=False)
+
+def c_locale_env() -> Dict[str, str]:
+    """
+    The current environment with the C locale, for a child's env=. Built per call so children see
+    variables loaded after import (.env via load_dotenv) and any later changes.
+    """
+    return {**os.environ, **_C_LOCALE_VARS}
+
+def is_fixed_string(pattern: str) -> bool:
+    """True if `pattern` has no ERE metacharacters, i.e. 'grep -E' matches it literally."""
+    return not _ERE_METACHARS_RE.search(pattern)
+
+async def run_blocking(func: Callable[..., Any], *args: Any) -> Any:
+    """Runs a blocking callable in the shared tool I/O pool and awaits its result."""
+    return await asyncio.get_running_loop().run_in_executor(_TOOL_IO_EXECUTOR, func, *args)
+
+# --- Subprocess Concurrency Limit ---
+
+# One semaphore per event loop (asyncio primitives cannot be shared across loops,
+# and the web/CLI entry points may each run their own loop via asyncio.run).
+_SUBPROC_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def _get_subprocess_semaphore() -> asyncio.Semaphore:
+    """Returns the semaphore capping concurrent tool subprocesses for the running loop."""
+    loop = asyncio.get_running_loop()
+    sem = _SUBPROC_SEMAPHORES.get(loop)
+    if sem is None:
+        sem = asyncio.Semaphore(max(1, settings.MAX_CONCURRENT_SUBPROCS))
+        _SUBPROC_SEMAPHORES[loop] = sem
+    return sem
+
+def install_pidfd_child_watcher() -> bool:
+    """
+    Switches asyncio's subprocess reaping to PidfdChildWatcher (Linux 5.3+, Python 3.9-3.11),
+    so concurrent tool subprocesses are reaped via the event loop instead of a thread per child.
+    Only for entry points that run their loop in the main thread (CLI, cron): the watcher is
+    attached to the main thread's loop, so threaded servers (Flask) must keep the default.
+    Python 3.12+ already selects pidfd-based reaping when available. Returns True if installed.
+    """
+    if not sys.platform.startswith("linux") or sys.version_info >= (3, 12): return False
+    if threading.current_thread() is not threading.main_thread(): return False
+    watcher_cls = getattr(asyncio, "PidfdChildWatcher", None)
+    if watcher_cls is None or not hasattr(os, "pidfd_open"): return False
+    try: os.close(os.pidfd_open(os.getpid()))
+    except OSError: return False # Kernel without pidfd support
+    asyncio.set_child_watcher(watcher_cls())
+    logging.debug("Installed asyncio PidfdChildWatcher for subprocess reaping.")
+    return True
+
 # --- Async Command Execution ---
 
+# An argv joined with NULs (which no exec argument can contain) that matches this needs no quoting at all:
+# every argument is non-empty and made only of the characters shlex.quote leaves bare. One C-level match
+# replaces a quote() call per argument.
+_PLAIN_ARGV_MATCH = re.compile(r"[\w@%+=:,./-]+(?:\0[\w@%+=:,./-]+)*", re.ASCII).fullmatch
+
+def _quote_argv(parts: List[str]) -> str:
+    """Shell-quoted display form of an argv (same result as shlex.join)."""
+    if _PLAIN_ARGV_MATCH('\0'.join(parts)):
+        return ' '.join(parts)
+    return ' '.join(shlex.quote(arg) for arg in parts)
+
+def _as_str_args(command: List[Any]) -> List[str]:
+    """Returns command itself when every part is already a str (the usual case), else a converted copy."""
+    if all(type(arg) is str for arg in command):
+        return command
+    return [str(arg) for arg in command]
+
+class _LazyCmd:
+    """Shell-quoted display form of an argv, built only when a log record or error message formats it."""
+    __slots__ = ("parts", "_text")
+
+    def __init__(self, parts: List[str]):
+        self.parts = parts
+        self._text: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = _quote_argv(self.parts)
+        return self._text
+
+# StreamReader limit for subprocess pipes. communicate() drains stdout/stderr with read(-1), which
+# reads in blocks of `limit` and pauses the pipe once 2*limit bytes are buffered. asyncio's 64 KiB
+# default turns a multi-MB 'ps aux' or verbose scp log into dozens of pause/resume and join rounds.
+_SUBPROC_STREAM_LIMIT = 4 * 1024 * 1024
+# Read size for capped (streaming) output collection
+_STREAM_CHUNK_SIZE = 65536
+# Upper bound on a capped read's up-front allocation: a size hint (e.g. sed's input file size) is only a
+# guess at the output, so past this the buffer grows as data actually arrives
+_STREAM_PREALLOC_MAX = 1 << 20
+# Log previews show this many characters; they decode at most 4 bytes per character (the UTF-8 maximum)
+# so multibyte output is neither cut mid-character nor decoded past what is shown.
+_LOG_PREVIEW_CHARS = 200
+
+def _log_preview(data: bytes, encoding: str) -> str:
+    """Decodes just enough of `data` for a log preview of up to _LOG_PREVIEW_CHARS characters."""
+    return data[:_LOG_PREVIEW_CHARS * 4].decode(encoding, errors='replace')[:_LOG_PREVIEW_CHARS] if data else ""
+
+# How long a timed-out, killed process gets to be reaped. process.wait() also waits for the pipes to
+# close, which a surviving grandchild can hold open long after the kill.
+_KILL_REAP_TIMEOUT = 0.5
+
+async def _read_capped(
+    process: asyncio.subprocess.Process, stream: asyncio.StreamReader, limit: Optional[int], size_hint: int = 0
+) -> Tuple[bytearray, bool]:
+    """
+    Reads a pipe into a bytearray until EOF or `limit` bytes; on overflow the process is killed so both pipes reach EOF.
+    With `size_hint` the buffer (up to _STREAM_PREALLOC_MAX) is allocated up front and filled in place,
+    instead of reallocated as it grows.
+    """
+    buf = bytearray(min(size_hint, _STREAM_PREALLOC_MAX if limit is None else min(limit, _STREAM_PREALLOC_MAX)))
+    used = 0
+    while True:
+        chunk = await stream.read(_STREAM_CHUNK_SIZE)
+        if not chunk:
+            del buf[used:]
+            return buf, False
+        end = used + len(chunk)
+        buf[used:end] = chunk # In place within the preallocated size, grows the buffer past it
+        used = end
+        if limit is not None and used > limit:
+            del buf[limit:]
+            if process.returncode is None:
+                try: process.kill()
+                except ProcessLookupError: pass
+            return buf, True
+
+async def _communicate_capped(
+    process: asyncio.subprocess.Process, input_data: Optional[bytes], limit: Optional[int], out_size_hint: int = 0
+) -> Tuple[bytes, bytes, bool]:
+    """
+    Like process.communicate(), but keeps at most `limit` bytes (if given) of each stream and stops the
+    process once that is exceeded instead of buffering all of its output; stdout is collected into a buffer
+    presized to `out_size_hint`. Returns (stdout, stderr, truncated).
+    """
+    async def feed_stdin() -> None:
+        # Written alongside the readers (as communicate() does): draining all input first would
+        # deadlock once the child blocks writing output that nobody is reading yet
+        if input_data is None: return
+        assert process.stdin is not None
+        try:
+            process.stdin.write(input_data)
+            await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Child exited without reading all input; its output and RC tell the story
+        process.stdin.close()
+    _, (stdout_buf, out_truncated), (stderr_buf, err_truncated) = await asyncio.gather(
+        feed_stdin(), _read_capped(process, process.stdout, limit, out_size_hint), _read_capped(process, process.stderr, limit)
+    )
+    await process.wait()
+    return bytes(stdout_buf), bytes(stderr_buf), out_truncated or err_truncated
+
 async def _run_command_async(
     command: Union[List[str], str],
     timeout: Optional[int] = None, # Use None as default
@@ -18,22 +202,28 @@ async def _run_command_async(
     input_data: Optional[bytes] = None, # Use bytes for input/output with subprocess
     check: bool = False, # If True, raises exception on non-zero exit
     use_shell: bool = False, # Explicit flag for using shell=True (HIGH RISK)
-    env: Optional[Dict[str, str]] = None # Optional environment variables
+    env: Optional[Dict[str, str]] = None, # Optional environment variables
+    stream_limit: Optional[int] = None, # Cap on stdout/stderr bytes kept; the process is stopped past it
+    expected_out_size: Optional[int] = None # Known/estimated stdout size, to presize the collection buffer
 ) -> Tuple[bool, bytes, bytes, int]:
     """
     Asynchronous internal helper to run a command using asyncio.create_subprocess_exec/shell.
     WARNING: PATH SAFETY REMOVED. `cwd` can be anywhere. `use_shell=True` is EXTREMELY DANGEROUS.
     Requires command to be List[str] if use_shell=False.
-    Returns stdout/stderr as bytes.
+    Returns stdout/stderr as bytes. With `stream_limit`, output is collected incrementally and a process
+    stopped for exceeding the cap is reported as RC 0 with a truncation note appended to stderr.
+    With `expected_out_size`, stdout is read into a buffer allocated at that size (up to 1 MiB) up front.
     """
     # Get timeout from settings if not provided explicitly
     effective_timeout = timeout if timeout is not None else settings.COMMAND_TIMEOUT
 
-    cmd_display: str
-    effective_cwd: Optional[Path] = Path(cwd).resolve() if cwd else Path.cwd()
-    # Check if effective_cwd is a valid directory *before* proceeding
-    if not effective_cwd or not effective_cwd.is_dir():
-         err_msg = f"Working directory '{cwd or 'CWD'}' not found or not a directory (Resolved: {effective_cwd})."
+    cmd_display: Union[str, _LazyCmd]
+    # No cwd means the child simply inherits ours: no getcwd/resolve/stat here and no chdir in the
+    # child between fork and exec, keeping the spawn on CPython's vfork/posix_spawn fast path.
+    # An explicit cwd is resolved and checked in a worker thread *before* proceeding.
+    effective_cwd: Optional[str] = await resolve_dir_async(cwd) if cwd else None
+    if cwd and effective_cwd is None:
+         err_msg = f"Working directory '{cwd}' not found or not a directory."
          logging.error(err_msg)
          return False, b"", err_msg.encode('utf-8', errors='replace'), -1
 
@@ -44,9 +234,16 @@ async def _run_command_async(
             logging.error(err_msg)
             return False, b"", err_msg.encode('utf-8', errors='replace'), -1
         cmd_display = command # Keep raw string for display
-        program = command
-        args = () # No separate args when using shell=True with a string command
-        creator_func = asyncio.create_subprocess_shell
+        if os.name == "posix":
+            # Exec the shell directly: the same argv create_subprocess_shell would build,
+            # without the extra shell-mode layer in subprocess
+            program = "/bin/sh"
+            args = ("-c", command)
+            creator_func = asyncio.create_subprocess_exec
+        else:
+            program = command
+            args = () # No separate args when using shell=True with a string command (cmd.exe on Windows)
+            creator_func = asyncio.create_subprocess_shell
     else:
         if not isinstance(command, list) or not command:
             err_msg = f"Internal Error: Command must be a non-empty list of strings when use_shell=False. Received: {type(command)}"
@@ -54,86 +251,99 @@ async def _run_command_async(
             return False, b"", err_msg.encode('utf-8', errors='replace'), -1
         # Ensure all parts are strings for subprocess
         try:
-            command_str_list = [str(arg) for arg in command]
+            command_str_list = _as_str_args(command)
         except Exception as e:
             err_msg = f"Internal Error: Could not convert all command parts to strings: {e}"
             logging.error(err_msg)
             return False, b"", err_msg.encode('utf-8', errors='replace'), -1
 
         program = command_str_list[0]
-        args = tuple(command_str_list[1:])
-        cmd_display = ' '.join(shlex.quote(str(arg)) for arg in command_str_list) # Safe display string
+        args = command_str_list[1:] # Only unpacked into the exec call below
+        cmd_display = _LazyCmd(command_str_list) # Safe display string, quoted only if emitted
         creator_func = asyncio.create_subprocess_exec
 
 
-    logging.info(f"Executing Async: {cmd_display} | CWD: {effective_cwd} | Shell={use_shell} | Timeout: {effective_timeout}")
+    logging.info("Executing Async: %s | CWD: %s | Shell=%s | Timeout: %s", cmd_display, effective_cwd or 'inherited', use_shell, effective_timeout)
 
     process = None # Ensure process is defined in outer scope
     try:
-        process = await creator_func(
-            program, *args, # Unpack args only for exec
-            stdin=asyncio.subprocess.PIPE if input_data is not None else None,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=str(effective_cwd), # Pass CWD as string
-            env=env, # Pass custom environment if provided
-        )
+        # Bound the number of live subprocesses (held for the process lifetime, not just the spawn)
+        async with _get_subprocess_semaphore():
+            process = await creator_func(
+                program, *args, # Unpack args only for exec
+                stdin=asyncio.subprocess.PIPE if input_data is not None else None,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=effective_cwd, # Resolved real path, or None to inherit
+                env=env, # Pass custom environment if provided
+                limit=_SUBPROC_STREAM_LIMIT,
+            )
 
-        stdout_bytes, stderr_bytes = await asyncio.wait_for(
-            process.communicate(input=input_data),
-            timeout=effective_timeout # Use effective_timeout here
-        )
-        rc = process.returncode
-        assert rc is not None # Should be set after communicate
+            if stream_limit is None and expected_out_size is None:
+                stdout_bytes, stderr_bytes = await asyncio.wait_for(
+                    process.communicate(input=input_data),
+                    timeout=effective_timeout # Use effective_timeout here
+                )
+                truncated = False
+            else:
+                stdout_bytes, stderr_bytes, truncated = await asyncio.wait_for(
+                    _communicate_capped(process, input_data, stream_limit, expected_out_size or 0), timeout=effective_timeout
+                )
+        rc = process.returncode # Always set once communicate()/process.wait() has returned
+        if truncated:
+            logging.warning("Output of %s exceeded %d bytes; process stopped early.", cmd_display, stream_limit)
+            # rc stays whatever the process really exited with (-SIGKILL if it was still writing when stopped)
+            stderr_bytes += f"\n[Output truncated at {stream_limit} bytes; command stopped early.]".encode('utf-8')
 
         success = rc == 0
-        stdout_str = stdout_bytes.decode(sys.stdout.encoding or 'utf-8', errors='replace') if stdout_bytes else ""
-        stderr_str = stderr_bytes.decode(sys.stderr.encoding or 'utf-8', errors='replace') if stderr_bytes else ""
-
-        # Log details based on success/output/level
-        log_level = logging.getLogger().level
-        if log_level <= logging.DEBUG or not success or stderr_bytes:
-            logging.log(logging.INFO if success else logging.WARNING,
-                        f"Async Finished (RC={rc}). Success: {success}. "
-                        f"Stdout: {stdout_str[:200]}... Stderr: {stderr_str[:200]}...")
-        else:
-             logging.info(f"Async Finished (RC={rc}). Success: {success}.")
+
+        # Log details based on success/output/level. Previews are decoded only for a record that will be
+        # emitted, and only their prefix; callers decode the full buffers once (run_tool_command_async).
+        finish_level = logging.INFO if success else logging.WARNING
+        if logging.root.isEnabledFor(finish_level):
+            if not success or stderr_bytes or logging.root.isEnabledFor(logging.DEBUG):
+                logging.log(finish_level, "Async Finished (RC=%s). Success: %s. Stdout: %s... Stderr: %s...",
+                            rc, success, _log_preview(stdout_bytes, _STDOUT_ENC), _log_preview(stderr_bytes, _STDERR_ENC))
+            else:
+                logging.info("Async Finished (RC=%s). Success: %s.", rc, success)
 
         if check and not success:
-            raise subprocess.CalledProcessError(rc, cmd_display, output=stdout_bytes, stderr=stderr_bytes)
+            raise subprocess.CalledProcessError(rc, str(cmd_display), output=stdout_bytes, stderr=stderr_bytes)
 
         return success, stdout_bytes, stderr_bytes, rc
 
     except FileNotFoundError:
         cmd_name = program # Use the program/string directly
-        logging.error(f"Error: Command not found: {cmd_name}")
+        logging.error("Error: Command not found: %s", cmd_name)
         return False, b"", f"Error: Command not found: {cmd_name}".encode('utf-8', errors='replace'), -1
     except asyncio.TimeoutError:
-        logging.error(f"Error: Command timed out after {effective_timeout} seconds: {cmd_display}") # Use effective_timeout
+        logging.error("Error: Command timed out after %s seconds: %s", effective_timeout, cmd_display) # Use effective_timeout
         # Attempt to kill the timed-out process
         if process and process.returncode is None:
             try:
                 process.kill()
-                await process.wait() # Wait briefly for cleanup
-                logging.warning(f"Killed timed-out process (PID: {process.pid})")
+                logging.warning("Killed timed-out process (PID: %s)", process.pid)
+                await asyncio.wait_for(process.wait(), _KILL_REAP_TIMEOUT) # Bounded: don't hold the caller on a stuck reap
+            except asyncio.TimeoutError:
+                logging.warning("Timed-out process (PID: %s) not reaped within %ss; leaving it to the child watcher.", process.pid, _KILL_REAP_TIMEOUT)
             except ProcessLookupError:
                  # Process already finished, ignore error
-                 logging.warning(f"Timed-out process (PID: {process.pid}) already gone.")
+                 logging.warning("Timed-out process (PID: %s) already gone.", process.pid)
             except Exception as kill_err:
                  # Log error trying to kill, but proceed with timeout result
-                 logging.error(f"Error killing PID {process.pid}: {kill_err}")
+                 logging.error("Error killing PID %s: %s", process.pid, kill_err)
         return False, b"", f"Error: Command timed out after {effective_timeout} seconds.".encode('utf-8', errors='replace'), -1
     except subprocess.CalledProcessError as e:
          # Raised only if check=True
-         logging.error(f"Async command failed (RC {e.returncode}, check=True): {cmd_display}")
+         logging.error("Async command failed (RC %s, check=True): %s", e.returncode, cmd_display)
          return False, e.output or b"", e.stderr or b"", e.returncode
     except PermissionError as e:
         # Often related to CWD or executable permissions
-        logging.error(f"Permission error running async: {cmd_display} in {effective_cwd}. Error: {e}")
-        err_msg = f"Error: Permission denied ({effective_cwd}). Details: {e}"
+        logging.error("Permission error running async: %s in %s. Error: %s", cmd_display, effective_cwd or 'inherited cwd', e)
+        err_msg = f"Error: Permission denied ({effective_cwd or 'inherited cwd'}). Details: {e}"
         return False, b"", err_msg.encode('utf-8', errors='replace'), -1
     except Exception as e:
-        logging.exception(f"Unexpected error running async command: {cmd_display}")
+        logging.exception("Unexpected error running async command: %s", cmd_display)
         return False, b"", f"Unexpected async error: {e}".encode('utf-8', errors='replace'), -1
 
 
@@ -143,18 +353,21 @@ def _run_command_sync_helper(
     command: Union[List[str], str],
     timeout: Optional[int] = None, # Use None as default
     cwd: Optional[Union[str, Path]] = None,
-    input_data: Optional[str] = None, # Takes string for subprocess.run text mode
+    input_data: Optional[str] = None, # Text input, encoded as UTF-8 for the child
     check: bool = False,
     use_shell: bool = False,
     env: Optional[Dict[str, str]] = None
 ) -> Tuple[bool, str, str, int]:
-    """Synchronous internal helper to run a command in a subprocess."""
+    """
+    Synchronous internal helper to run a command in a subprocess. Output is captured as bytes and decoded once
+    at the end (like the async helper), rather than through subprocess's text-mode wrappers.
+    """
     effective_timeout = timeout if timeout is not None else settings.COMMAND_TIMEOUT
 
-    cmd_display: str
-    effective_cwd: Optional[Path] = Path(cwd).resolve() if cwd else Path.cwd()
-    if not effective_cwd or not effective_cwd.is_dir():
-         err_msg = f"Working directory '{cwd or 'CWD'}' invalid (Resolved: {effective_cwd})."
+    cmd_display: Union[str, _LazyCmd]
+    effective_cwd: Optional[str] = _resolve_dir_sync(cwd) if cwd else None # None: inherit (see async helper)
+    if cwd and effective_cwd is None:
+         err_msg = f"Working directory '{cwd}' invalid."
          logging.error(err_msg); return False, "", err_msg, -1
 
     if use_shell:
@@ -162,28 +375,88 @@ def _run_command_sync_helper(
         cmd_display = command
     else:
         if not isinstance(command, list) or not command: err_msg = "Internal Error: Command must be list if use_shell=False."; logging.error(err_msg); return False, "", err_msg, -1
-        try: command_str_list = [str(arg) for arg in command]
+        try: command_str_list = _as_str_args(command)
         except Exception as e: err_msg = f"Internal Error: Bad command parts: {e}"; logging.error(err_msg); return False, "", err_msg, -1
-        cmd_display = ' '.join(shlex.quote(arg) for arg in command_str_list); command = command_str_list
+        cmd_display = _LazyCmd(command_str_list); command = command_str_list
 
-    logging.info(f"Executing Sync: {cmd_display} | CWD: {effective_cwd} | Shell={use_shell} | Timeout: {effective_timeout}")
+    logging.info("Executing Sync: %s | CWD: %s | Shell=%s | Timeout: %s", cmd_display, effective_cwd or 'inherited', use_shell, effective_timeout)
     try:
         process = subprocess.run(
-            command, capture_output=True, text=True,
+            command, capture_output=True,
             timeout=effective_timeout, # Use effective_timeout
-            cwd=str(effective_cwd), input=input_data, check=check,
-            errors='replace', shell=use_shell, env=env
+            cwd=effective_cwd, input=input_data.encode('utf-8') if input_data is not None else None, check=check,
+            shell=use_shell, env=env
         )
-        success = process.returncode == 0; stdout_str = process.stdout or ""; stderr_str = process.stderr or ""
-        log_level = logging.getLogger().level
-        if log_level <= logging.DEBUG or not success or stderr_str: logging.log(logging.INFO if success else logging.WARNING, f"Sync Finished (RC={process.returncode}). Success: {success}. Stdout: {stdout_str[:200]}... Stderr: {stderr_str[:200]}...")
-        else: logging.info(f"Sync Finished (RC={process.returncode}). Success: {success}.")
+        success = process.returncode == 0
+        stdout_str = process.stdout.decode(_STDOUT_ENC, 'replace') if process.stdout else ""
+        stderr_str = process.stderr.decode(_STDERR_ENC, 'replace') if process.stderr else ""
+        if not success or stderr_str or logging.root.isEnabledFor(logging.DEBUG): logging.log(logging.INFO if success else logging.WARNING, "Sync Finished (RC=%s). Success: %s. Stdout: %s... Stderr: %s...", process.returncode, success, stdout_str[:_LOG_PREVIEW_CHARS], stderr_str[:_LOG_PREVIEW_CHARS])
+        else: logging.info("Sync Finished (RC=%s). Success: %s.", process.returncode, success)
         return success, stdout_str, stderr_str, process.returncode
-    except FileNotFoundError: cmd_name = command.split()[0] if use_shell and isinstance(command, str) else (command[0] if isinstance(command, list) else "Unknown"); logging.error(f"Error: Command not found: {cmd_name}"); return False, "", f"Error: Command not found: {cmd_name}", -1
-    except subprocess.TimeoutExpired: logging.error(f"Error: Command timed out after {effective_timeout}s: {cmd_display}"); return False, "", f"Error: Command timed out after {effective_timeout}s.", -1
-    except subprocess.CalledProcessError as e: logging.error(f"Sync command failed (RC {e.returncode}, check=True): {cmd_display}"); return False, e.stdout or "", e.stderr or "", e.returncode
-    except PermissionError as e: logging.error(f"Permission error running sync: {cmd_display} in {effective_cwd}. Error: {e}"); err_msg = f"Error: Permission denied ({effective_cwd}). Details: {e}"; return False, "", err_msg, -1
-    except Exception as e: logging.exception(f"Unexpected error running sync command: {cmd_display}"); return False, "", f"Unexpected sync error: {e}", -1
+    except FileNotFoundError: cmd_name = command.split()[0] if use_shell and isinstance(command, str) else (command[0] if isinstance(command, list) else "Unknown"); logging.error("Error: Command not found: %s", cmd_name); return False, "", f"Error: Command not found: {cmd_name}", -1
+    except subprocess.TimeoutExpired: logging.error("Error: Command timed out after %ss: %s", effective_timeout, cmd_display); return False, "", f"Error: Command timed out after {effective_timeout}s.", -1
+    except subprocess.CalledProcessError as e: logging.error("Sync command failed (RC %s, check=True): %s", e.returncode, cmd_display); return False, (e.stdout or b"").decode(_STDOUT_ENC, 'replace'), (e.stderr or b"").decode(_STDERR_ENC, 'replace'), e.returncode
+    except PermissionError as e: logging.error("Permission error running sync: %s in %s. Error: %s", cmd_display, effective_cwd or 'inherited cwd', e); err_msg = f"Error: Permission denied ({effective_cwd or 'inherited cwd'}). Details: {e}"; return False, "", err_msg, -1
+    except Exception as e: logging.exception("Unexpected error running sync command: %s", cmd_display); return False, "", f"Unexpected sync error: {e}", -1
+
+
+# --- Tool Result Formatting ---
+
+def _decode_output(data: bytes, encoding: str, limit: int) -> str:
+    """Decodes command output, only the first `limit` bytes (limit > 0) plus a truncation marker; empty stays ''."""
+    if not data:
+        return ""
+    if limit <= 0 or len(data) <= limit:
+        return data.decode(encoding, 'replace')
+    # str() over a memoryview slice decodes the prefix without copying it out first
+    return str(memoryview(data)[:limit], encoding, 'replace') + f"\n...[truncated {len(data) - limit} bytes]"
+
+def _embed_output(output: Union[str, bytes], encoding: str) -> str:
+    """
+    Output as embedded in a tool result, capped at settings.MAX_TOOL_OUTPUT_BYTES: raw bytes are decoded
+    through _decode_output; text produced in-process is cut at the same number of characters.
+    """
+    limit = settings.MAX_TOOL_OUTPUT_BYTES
+    if not isinstance(output, str):
+        return _decode_output(output, encoding, limit)
+    if limit <= 0 or len(output) <= limit:
+        return output
+    return output[:limit] + f"\n...[truncated {len(output) - limit} chars]"
+
+def format_tool_result(
+    tool_name: str,
+    mode: str,
+    cmd_display: str,
+    rc: int,
+    stdout: Union[str, bytes],
+    stderr: Union[str, bytes],
+    success_rc: Union[int, Collection[int]] = 0,
+    failure_notes: Optional[Dict[int, str]] = None
+) -> str:
+    """
+    Builds the standard tool result string (status, stdout, stderr) shared by the command wrappers.
+    stdout/stderr may be raw bytes (decoded here) or text; either way they are capped at MAX_TOOL_OUTPUT_BYTES.
+    """
+    stdout = _embed_output(stdout, _STDOUT_ENC)
+    stderr = _embed_output(stderr, _STDERR_ENC)
+    # A single code (the common case) is compared directly; lists/tuples/sets are used as given
+    is_successful = rc == success_rc if isinstance(success_rc, int) else rc in success_rc
+    if is_successful and stdout and not stderr:
+        # Most common shape: built in one pass, with no list or final strip() copying stdout again
+        return f"Tool '{tool_name}' {mode} execution finished (RC={rc}). Command: `{cmd_display}`\nStatus: Success\nStdout:\n```\n{stdout}\n```"
+    # Pieces are joined once at the end: stdout/stderr may be megabytes, and each '+=' would copy them again
+    parts: List[str] = [f"Tool '{tool_name}' {mode} execution finished (RC={rc}). Command: `{cmd_display}`\n"]
+    if is_successful:
+        parts.append("Status: Success\n")
+        parts.extend(("Stdout:\n```\n", stdout, "\n```\n") if stdout else ("Stdout: (empty)\n",))
+        if stderr: parts.extend(("Stderr (Non-fatal):\n```\n", stderr, "\n```\n"))
+    else:
+        parts.append("Status: Failed\n")
+        if failure_notes and rc in failure_notes: parts.append(f"Note: {failure_notes[rc]}\n")
+        if stdout: parts.extend(("Stdout:\n```\n", stdout, "\n```\n"))
+        if stderr: parts.extend(("Stderr:\n```\n", stderr, "\n```\n"))
+        elif not stdout and not stderr: parts.append("(No output on stdout or stderr)\n")
+    return ''.join(parts).strip()
 
 
 # --- Async Tool Wrapper ---
@@ -196,34 +469,24 @@ async def run_tool_command_async(
     timeout: Optional[int] = None, # Default None
     input_data: Optional[bytes] = None,
     check: bool = False,
-    success_rc: Union[int, List[int]] = 0,
+    success_rc: Union[int, Collection[int]] = 0,
     failure_notes: Optional[Dict[int, str]] = None,
-    env: Optional[Dict[str, str]] = None
+    env: Optional[Dict[str, str]] = None,
+    stream_limit: Optional[int] = None,
+    expected_out_size: Optional[int] = None
 ) -> str:
-    """Async wrapper for running external commands for tools."""
-    effective_timeout = timeout if timeout is not None else settings.COMMAND_TIMEOUT # Get setting inside
+    """
+    Async wrapper for running external commands for tools. `stream_limit` caps the output kept per stream;
+    `expected_out_size` presizes the stdout buffer when the output size is known in advance.
+    """
     try:
         success, stdout_bytes, stderr_bytes, rc = await _run_command_async(
-            command=command, timeout=effective_timeout, cwd=cwd, input_data=input_data,
-            check=check, use_shell=use_shell, env=env
+            command=command, timeout=timeout, cwd=cwd, input_data=input_data, # None -> helper applies COMMAND_TIMEOUT
+            check=check, use_shell=use_shell, env=env, stream_limit=stream_limit, expected_out_size=expected_out_size
         )
-        stdout = stdout_bytes.decode(sys.stdout.encoding or 'utf-8', 'replace')
-        stderr = stderr_bytes.decode(sys.stderr.encoding or 'utf-8', 'replace')
-        success_codes = success_rc if isinstance(success_rc, list) else [success_rc]
-        is_successful = rc in success_codes
-        cmd_display = command if use_shell and isinstance(command, str) else ' '.join(shlex.quote(str(c)) for c in command)
-        result_str = f"Tool '{tool_name}' async execution finished (RC={rc}). Command: `{cmd_display}`\n"
-        if is_successful:
-            result_str += "Status: Success\n"; result_str += f"Stdout:\n```\n{stdout}\n```\n" if stdout else "Stdout: (empty)\n"
-            if stderr: result_str += f"Stderr (Non-fatal):\n```\n{stderr}\n```\n"
-        else:
-            result_str += "Status: Failed\n"
-            if failure_notes and rc in failure_notes: result_str += f"Note: {failure_notes[rc]}\n"
-            if stdout: result_str += f"Stdout:\n```\n{stdout}\n```\n"
-            if stderr: result_str += f"Stderr:\n```\n{stderr}\n```\n"
-            elif not stdout and not stderr: result_str += "(No output on stdout or stderr)\n"
-        return result_str.strip()
-    except Exception as e: logging.exception(f"Unexpected error in run_tool_command_async for '{tool_name}': {e}"); return f"Tool '{tool_name}' failed: internal async wrapper error: {e}"
+        cmd_display = command if use_shell and isinstance(command, str) else _quote_argv(_as_str_args(command))
+        return format_tool_result(tool_name, "async", cmd_display, rc, stdout_bytes, stderr_bytes, success_rc, failure_notes)
+    except Exception as e: logging.exception("Unexpected error in run_tool_command_async for '%s': %s", tool_name, e); return f"Tool '{tool_name}' failed: internal async wrapper error: {e}"
 
 
 # --- Sync Tool Wrapper ---
@@ -236,48 +499,102 @@ def run_tool_command_sync(
     timeout: Optional[int] = None, # Default None
     input_data: Optional[str] = None,
     check: bool = False,
-    success_rc: Union[int, List[int]] = 0,
+    success_rc: Union[int, Collection[int]] = 0,
     failure_notes: Optional[Dict[int, str]] = None,
     env: Optional[Dict[str, str]] = None
 ) -> str:
     """Synchronous wrapper for running external commands for tools."""
-    effective_timeout = timeout if timeout is not None else settings.COMMAND_TIMEOUT # Get setting inside
     try:
         success, stdout, stderr, rc = _run_command_sync_helper(
-            command=command, timeout=effective_timeout, cwd=cwd, input_data=input_data,
+            command=command, timeout=timeout, cwd=cwd, input_data=input_data, # None -> helper applies COMMAND_TIMEOUT
             check=check, use_shell=use_shell, env=env
         )
-        success_codes = success_rc if isinstance(success_rc, list) else [success_rc]
-        is_successful = rc in success_codes
-        cmd_display = command if use_shell and isinstance(command, str) else ' '.join(shlex.quote(str(c)) for c in command)
-        result_str = f"Tool '{tool_name}' sync execution finished (RC={rc}). Command: `{cmd_display}`\n"
-        if is_successful:
-            result_str += "Status: Success\n"; result_str += f"Stdout:\n```\n{stdout}\n```\n" if stdout else "Stdout: (empty)\n"
-            if stderr: result_str += f"Stderr (Non-fatal):\n```\n{stderr}\n```\n"
-        else:
-            result_str += "Status: Failed\n"
-            if failure_notes and rc in failure_notes: result_str += f"Note: {failure_notes[rc]}\n"
-            if stdout: result_str += f"Stdout:\n```\n{stdout}\n```\n"
-            if stderr: result_str += f"Stderr:\n```\n{stderr}\n```\n"
-            elif not stdout and not stderr: result_str += "(No output on stdout or stderr)\n"
-        return result_str.strip()
-    except Exception as e: logging.exception(f"Unexpected error in run_tool_command_sync for '{tool_name}': {e}"); return f"Tool '{tool_name}' failed: internal sync wrapper error: {e}"
+        cmd_display = command if use_shell and isinstance(command, str) else _quote_argv(_as_str_args(command))
+        return format_tool_result(tool_name, "sync", cmd_display, rc, stdout, stderr, success_rc, failure_notes)
+    except Exception as e: logging.exception("Unexpected error in run_tool_command_sync for '%s': %s", tool_name, e); return f"Tool '{tool_name}' failed: internal sync wrapper error: {e}"
+
+
+# --- Option Validation ---
+
+# Shell metacharacters refused in user-supplied tool options. Commands run as argv without a shell;
+# this keeps options from smuggling shell syntax into tools that may re-interpret them.
+_UNSAFE_CHARS_RE = re.compile(r"[;|&`$()<>]")
+
+# The same check as whole-string matchers, usable directly as C-level filter() predicates
+_SAFE_ARG_MATCH = re.compile(r"[^;|&`$()<>]*").fullmatch
+_SAFE_FLAG_MATCH = re.compile(r"-[^;|&`$()<>]*").fullmatch
+
+def _select_options(options: Optional[List[Any]], tool_name: str, keep: Callable[[str], Any]) -> Tuple[Optional[List[str]], Optional[str]]:
+    if not options: return [], None
+    if not isinstance(options, list): return None, f"Error: {tool_name} 'options' must be a list of strings."
+    opts = list(map(str, options))
+    safe = list(filter(keep, opts))
+    if len(safe) != len(opts) and logging.getLogger().isEnabledFor(logging.WARNING):
+        skipped = [o for o in opts if o not in safe]
+        logging.warning("Skipping potentially unsafe or invalid %s option(s): %s", tool_name, skipped)
+    return safe, None
+
+def validate_tool_options(
+    options: Optional[List[Any]],
+    tool_name: str,
+    allow: Optional[Callable[[str], bool]] = None
+) -> Tuple[Optional[List[str]], Optional[str]]:
+    """
+    Filters a tool's 'options' list down to strings free of shell metacharacters that also pass `allow`.
+    Returns (safe_options, None), or (None, error string) if options is not a list. Skipped options are logged.
+    """
+    if allow is None: return _select_options(options, tool_name, _SAFE_ARG_MATCH)
+    return _select_options(options, tool_name, lambda o: _SAFE_ARG_MATCH(o) and allow(o))
+
+def validate_flag_options(options: Optional[List[Any]], tool_name: str) -> Tuple[Optional[List[str]], Optional[str]]:
+    """`validate_tool_options` accepting only flags (options starting with '-'); a single regex match per option."""
+    return _select_options(options, tool_name, _SAFE_FLAG_MATCH)
+
+
+# --- Path Helpers ---
+
+def _resolve_regular_file_sync(path: str, require_readable: bool = False) -> Optional[str]:
+    """Expands '~', resolves symlinks and stats once. Returns the real path, or None if missing/not a regular file."""
+    resolved = os.path.realpath(os.path.expanduser(path))
+    try: st = os.stat(resolved)
+    except FileNotFoundError: return None
+    if not stat.S_ISREG(st.st_mode): return None
+    if require_readable and not os.access(resolved, os.R_OK): raise PermissionError(f"File not readable: {path}")
+    return resolved
+
+async def resolve_regular_file_async(path: str, require_readable: bool = False) -> Optional[str]:
+    """Async wrapper for `_resolve_regular_file_sync`; the filesystem syscalls run in a worker thread."""
+    return await run_blocking(_resolve_regular_file_sync, path, require_readable)
+
+def _resolve_dir_sync(path: Union[str, Path]) -> Optional[str]:
+    """Resolves symlinks and stats once. Returns the real path, or None if missing/not a directory."""
+    resolved = os.path.realpath(path)
+    try: st = os.stat(resolved)
+    except OSError: return None
+    return resolved if stat.S_ISDIR(st.st_mode) else None
+
+async def resolve_dir_async(path: Union[str, Path]) -> Optional[str]:
+    """Async wrapper for `_resolve_dir_sync`; keeps realpath/stat (slow on cold caches or network FS) off the loop."""
+    return await run_blocking(_resolve_dir_sync, path)
 
 
 # --- User Confirmation ---
 
+_CONFIRM_RETRY_PROMPT = "Proceed? (yes/no): "
+
 async def ask_confirmation_async(tool_name: str, args: Dict[str, Any]) -> bool:
     """Asynchronously asks the user for confirmation via stdin."""
     # (Implementation remains the same)
-    if tool_name not in settings.HIGH_RISK_TOOLS: return True
+    if tool_name not in settings.HIGH_RISK_TOOLS_SET: return True
     args_str = "\n".join([f"  {key}: {repr(value)}" for key, value in args.items()])
-    prompt_message = (f"\n🚨 CONFIRMATION REQUIRED FOR HIGH-RISK TOOL 🚨\n" f"Tool: {tool_name}\n" f"Arguments:\n{args_str}\n" f"WARNING: High-risk operation ('{tool_name}' in HIGH_RISK_TOOLS).\n" f"Proceed? (yes/no): ")
+    prompt_message = (f"\n🚨 CONFIRMATION REQUIRED FOR HIGH-RISK TOOL 🚨\n" f"Tool: {tool_name}\n" f"Arguments:\n{args_str}\n" f"WARNING: High-risk operation ('{tool_name}' in HIGH_RISK_TOOLS).\n" f"{_CONFIRM_RETRY_PROMPT}")
+    loop = asyncio.get_running_loop()
     while True:
         try:
-            confirm = await asyncio.to_thread(input, prompt_message)
+            confirm = await loop.run_in_executor(_CONFIRM_EXECUTOR, input, prompt_message)
             confirm = confirm.lower().strip()
             if confirm == "yes": print("Proceeding..."); return True
             elif confirm == "no": print("Operation cancelled by user."); return False
-            else: print("Invalid input. Please enter 'yes' or 'no'."); prompt_message = "Proceed? (yes/no): "
+            else: print("Invalid input. Please enter 'yes' or 'no'."); prompt_message = _CONFIRM_RETRY_PROMPT
         except EOFError: print("\nEOF received, cancelling."); return False
-        except Exception as e: logging.error(f"Error during confirmation prompt: {e}"); print(f"\nConfirmation error: {e}. Cancelling."); return False
+        except Exception as e: logging.error("Error during confirmation prompt: %s", e); print(f"\nConfirmation error: {e}. Cancelling."); return False
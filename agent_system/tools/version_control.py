@@ -1,19 +1,130 @@
 import asyncio
 import logging
 import shlex
+import weakref
+from collections import OrderedDict
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple, Union
 
 # Import the registration decorator and utility functions/settings
 from . import register_tool
-from .tool_utils import run_tool_command_async, ask_confirmation_async
+from .tool_utils import run_tool_command_async, ask_confirmation_async, format_tool_result, _get_subprocess_semaphore
 from agent_system.config import settings
 
+# Object lookups ('cat-file -t/-s/-e/-p <obj>', 'rev-parse --verify <obj>') are answered by a long-lived
+# 'git cat-file --batch-check' (object info only) or, for -p, 'git cat-file --batch' (with content) per
+# repository, so each is a pipe round trip rather than a git fork+exec, and only -p pulls an object's
+# content through the pipe. Anything these can't answer exactly (missing objects, tree listings) runs git as usual.
+_GIT_BATCH_CAT_FILE_FLAGS = frozenset({"-t", "-s", "-e", "-p"})
+# Batch processes kept per event loop (least recently used idle one is closed first), and the per-lookup timeout.
+# There is no explicit shutdown: each process exits at EOF on its stdin, i.e. when the agent process does.
+_GIT_BATCH_MAX_WORKERS = 4
+_GIT_BATCH_TIMEOUT = 30
+# Read-only subcommands whose output can run to many MB (log -p, blame, ...): read straight into one
+# buffer per stream and stopped once MAX_TOOL_OUTPUT_BYTES is exceeded, since the rest is cut anyway
+_GIT_STREAMED_SUBCOMMANDS = frozenset({"log", "show", "diff", "blame", "grep", "ls-files", "ls-tree", "cat-file", "shortlog", "reflog"})
+
+class _GitCatFileWorker:
+    """
+    A 'git cat-file --batch' or '--batch-check' process for one directory, answering one object lookup at a time.
+    Each lookup holds a subprocess semaphore slot, like any other git call; an idle worker holds none.
+    """
+    __slots__ = ("cwd", "mode", "process", "lock")
+
+    def __init__(self, cwd: str, mode: str):
+        self.cwd = cwd
+        self.mode = mode # "--batch" or "--batch-check"
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.lock = asyncio.Lock()
+
+    async def lookup(self, obj: str) -> Optional[Tuple[str, str, int, Optional[bytes]]]:
+        """
+        Returns (oid, type, size, content) for `obj` (content is None in --batch-check mode),
+        or None if git can't resolve it or the process failed.
+        """
+        async with self.lock, _get_subprocess_semaphore():
+            try:
+                if self.process is None or self.process.returncode is not None:
+                    self.process = await asyncio.create_subprocess_exec(
+                        "git", "cat-file", self.mode, cwd=self.cwd,
+                        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+                    )
+                return await asyncio.wait_for(self._request(obj), _GIT_BATCH_TIMEOUT)
+            except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                logging.warning("git cat-file %s in %s failed (%s); falling back to a git process.", self.mode, self.cwd, e)
+                self.close()
+                return None
+
+    async def _request(self, obj: str) -> Optional[Tuple[str, str, int, Optional[bytes]]]:
+        assert self.process is not None and self.process.stdin is not None and self.process.stdout is not None
+        self.process.stdin.write(obj.encode("utf-8") + b"\n")
+        await self.process.stdin.drain()
+        header = await self.process.stdout.readline()
+        if not header: # Exited, e.g. not inside a repository
+            self.close()
+            return None
+        fields = header.split()
+        if len(fields) != 3: return None # "<obj> missing" / "<obj> ambiguous"
+        oid, obj_type, size = fields[0].decode("ascii"), fields[1].decode("ascii"), int(fields[2])
+        if self.mode != "--batch": return oid, obj_type, size, None
+        content = await self.process.stdout.readexactly(size + 1) # Content plus its trailing LF
+        return oid, obj_type, size, content[:-1]
+
+    def close(self) -> None:
+        """Closes stdin so git exits; the next lookup starts a new process."""
+        if self.process is not None and self.process.returncode is None and self.process.stdin is not None:
+            self.process.stdin.close()
+        self.process = None
+
+_GIT_BATCH_WORKERS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OrderedDict[Tuple[str, str], _GitCatFileWorker]]" = weakref.WeakKeyDictionary()
+
+def _get_git_batch_worker(cwd: str, mode: str) -> _GitCatFileWorker:
+    """Returns the running loop's `mode` batch worker for `cwd`, creating it (and evicting the oldest) as needed."""
+    loop = asyncio.get_running_loop()
+    workers = _GIT_BATCH_WORKERS.get(loop)
+    if workers is None:
+        workers = _GIT_BATCH_WORKERS[loop] = OrderedDict()
+    key = (cwd, mode)
+    worker = workers.get(key)
+    if worker is None:
+        worker = workers[key] = _GitCatFileWorker(cwd, mode)
+        while len(workers) > _GIT_BATCH_MAX_WORKERS:
+            # Only idle workers are closed; one mid-lookup keeps its process until a later call trims it
+            idle = next((k for k, w in workers.items() if k != key and not w.lock.locked()), None)
+            if idle is None: break
+            workers.pop(idle).close()
+    else:
+        workers.move_to_end(key)
+    return worker
+
+async def _git_batch_result(args: List[str], cwd: str) -> Optional[str]:
+    """Answers an object lookup from the batch worker as git_command would, or returns None to run git instead."""
+    if len(args) != 3: return None
+    if args[0] == "cat-file" and args[1] in _GIT_BATCH_CAT_FILE_FLAGS: flag = args[1]
+    elif args[:2] == ["rev-parse", "--verify"]: flag = None
+    else: return None
+    obj = args[2]
+    if not obj or obj.startswith("-") or "\n" in obj: return None
+    # Only -p needs the content; everything else is answered from object info alone
+    found = await _get_git_batch_worker(cwd, "--batch" if flag == "-p" else "--batch-check").lookup(obj)
+    if found is None: return None
+    oid, obj_type, size, content = found
+    stdout: Union[str, bytes]
+    if flag is None: stdout = f"{oid}\n"
+    elif flag == "-t": stdout = f"{obj_type}\n"
+    elif flag == "-s": stdout = f"{size}\n"
+    elif flag == "-e": stdout = ""
+    elif obj_type == "tree" or content is None: return None # -p lists trees in a format the raw object doesn't have
+    else: stdout = content # Raw object bytes: decoded and capped by format_tool_result
+    logging.info("Answered git %s from the cat-file batch process in: %s", " ".join(args), cwd)
+    return format_tool_result("git_command", "batched", shlex.join(["git", *args]), 0, stdout, "")
+
 @register_tool
 async def git_command(args: List[str], working_dir: str = ".") -> str:
     """
     Executes a 'git' command with specified arguments in a given directory.
     Handles 'clone' specifically by running in the parent directory.
+    Object lookups ('cat-file -t/-s/-e/-p <obj>', 'rev-parse --verify <obj>') reuse a persistent 'git cat-file --batch'.
     WARNING: Can modify files anywhere if not restricted. Confirmation may be required for risky subcommands if configured.
 
     Args:
@@ -59,6 +170,10 @@ async def git_command(args: List[str], working_dir: str = ".") -> str:
              #     logging.warning(f"Directory '{cwd_for_run}' does not appear to be a git repository root.")
              logging.info(f"Running git {' '.join(safe_args)} in: {cwd_for_run}")
 
+        if safe_args[0] != 'clone':
+            batch_result = await _git_batch_result(safe_args, str(cwd_for_run))
+            if batch_result is not None: return batch_result
+
         command = ["git"] + safe_args
 
         # Check if the specific git command requires confirmation
@@ -77,6 +192,7 @@ async def git_command(args: List[str], working_dir: str = ".") -> str:
             command=command,
             cwd=cwd_for_run,
             timeout=600, # Allow time for clones, pushes etc.
+            stream_limit=(settings.MAX_TOOL_OUTPUT_BYTES or None) if safe_args[0] in _GIT_STREAMED_SUBCOMMANDS else None,
             success_rc=0, # Git usually returns 0 on success
             failure_notes={
                 # Common git exit codes (can vary slightly)
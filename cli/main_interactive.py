@@ -25,6 +25,7 @@ from agent_system.agents.cybersecurity import CybersecurityAgent
 from agent_system.agents.build import BuildAgent
 from agent_system.agents.network import NetworkAgent
 from agent_system.tools import discover_tools, TOOL_REGISTRY # Tool discovery runs upon import
+from agent_system.tools.tool_utils import install_pidfd_child_watcher
 from agent_system.config.schemas import translate_schema_for_provider
 
 
@@ -35,6 +36,11 @@ orchestrator = Orchestrator() # Instantiate orchestrator
 async def _get_provider(provider_name: str, config: Dict[str, Any]) -> LLMProvider:
     # (Implementation is correct, uses factory which uses initialized settings)
     global provider_cache; provider_name_lower = provider_name.lower()
+    # Agents on the same provider and endpoint/key share one instance: found by config, before building a client
+    prelim_cache_key = (provider_name_lower, config.get("base_url") or config.get("api_key") or "default_or_env")
+    if prelim_cache_key in provider_cache:
+        cached_provider = provider_cache[prelim_cache_key]; cached_provider.model_name = config.get("model", cached_provider.model_name)
+        return cached_provider
     try:
         temp_provider_instance = get_llm_provider(provider_name, config)
         instance_identifier = temp_provider_instance.get_identifier(); cache_key = (provider_name_lower, instance_identifier)
@@ -43,8 +49,8 @@ async def _get_provider(provider_name: str, config: Dict[str, Any]) -> LLMProvid
             if temp_provider_instance is not cached_provider and hasattr(temp_provider_instance, 'close'):
                  if asyncio.iscoroutinefunction(temp_provider_instance.close): await temp_provider_instance.close()
                  else: temp_provider_instance.close()
-            return cached_provider
-        else: provider_cache[cache_key] = temp_provider_instance; return temp_provider_instance
+            provider_cache[prelim_cache_key] = cached_provider; return cached_provider
+        else: provider_cache[cache_key] = provider_cache[prelim_cache_key] = temp_provider_instance; return temp_provider_instance
     except (ImportError, ValueError, ConnectionError, RuntimeError) as e: logging.error(f"Failed provider '{provider_name}': {e}"); raise
 
 async def instantiate_agents() -> Tuple[Optional[ControllerAgent], Dict[str, BaseAgent]]:
@@ -154,7 +160,7 @@ async def close_providers():
     # (Implementation is correct)
     global provider_cache; logging.info("Shutting down provider connections...")
     close_tasks = []
-    for provider in provider_cache.values():
+    for provider in {id(p): p for p in provider_cache.values()}.values(): # Instances are cached under several keys
         if hasattr(provider, 'close') and asyncio.iscoroutinefunction(provider.close):
             close_tasks.append(asyncio.create_task(provider.close(), name=f"close_{type(provider).__name__}"))
     if close_tasks:
@@ -167,6 +173,7 @@ if __name__ == "__main__":
     # Initialize settings and logging FIRST
     try:
         settings.initialize_settings()
+        install_pidfd_child_watcher() # Main-thread loop: pidfd-based subprocess reaping is safe here
         asyncio.run(async_main())
     except Exception as e:
          # Catch errors during initialization or asyncio.run
@@ -35,6 +35,7 @@ from agent_system.agents.cybersecurity import CybersecurityAgent
 from agent_system.agents.build import BuildAgent
 from agent_system.agents.network import NetworkAgent
 from agent_system.core.controller import ControllerAgent
+from agent_system.tools.tool_utils import install_pidfd_child_watcher
 
 # --- Script Configuration & Argument Parsing ---
 def parse_arguments():
@@ -119,6 +120,7 @@ if __name__ == "__main__":
     # Settings are initialized at the top import level
     script_args, agents_map = parse_arguments()
     exit_code = 0
+    install_pidfd_child_watcher() # Main-thread loop: pidfd-based subprocess reaping is safe here
     try: asyncio.run(main_script(script_args, agents_map))
     except KeyboardInterrupt: print("\nScript interrupted.", file=sys.stderr); exit_code = 1
     except Exception as e: logging.critical(f"Critical script error: {e}", exc_info=True); print(f"\nFATAL SCRIPT ERROR: {e}", file=sys.stderr); traceback.print_exc(file=sys.stderr); exit_code = 1
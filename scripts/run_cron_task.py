@@ -28,6 +28,7 @@ settings.initialize_settings() # Explicitly initialize settings and logging
 from agent_system.core.agent import BaseAgent
 from agent_system.llm_providers import get_llm_provider, LLMProvider, provider_cache
 from agent_system.agents.sysadmin import SysAdminAgent
+from agent_system.tools.tool_utils import install_pidfd_child_watcher
 # Add other agent imports here if this script needs them
 # from agent_system.agents.coding import CodingAgent
 
@@ -102,6 +103,7 @@ if __name__ == "__main__":
     # Settings are initialized at the top import level
     script_args, agents_map = parse_arguments()
     exit_code = 0
+    install_pidfd_child_watcher() # Main-thread loop: pidfd-based subprocess reaping is safe here
     try: asyncio.run(main_script(script_args, agents_map))
     except KeyboardInterrupt: print("\nScript interrupted.", file=sys.stderr); exit_code = 1
     except Exception as e: logging.critical(f"Critical script error: {e}", exc_info=True); print(f"\nFATAL SCRIPT ERROR: {e}", file=sys.stderr); traceback.print_exc(file=sys.stderr); exit_code = 1
@@ -0,0 +1,199 @@
+import unittest
+import asyncio
+import subprocess
+import signal
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Import the specific tool functions to test
+# Ensure the path is correct relative to the project structure when running tests
+try:
+    from agent_system.config import settings
+    from agent_system.tools.process import kill_process, kill_processes, list_processes, python_run_script, _compile_filter, _read_linux_info, _format_kib, _split_info_batch, _INFO_BATCH_SEP
+except ImportError:
+    # If running tests from a different structure, adjust path temporarily
+    import sys
+    SCRIPT_DIR = Path(__file__).parent.parent.parent.resolve()
+    sys.path.insert(0, str(SCRIPT_DIR))
+    from agent_system.config import settings
+    from agent_system.tools.process import kill_process, kill_processes, list_processes, python_run_script, _compile_filter, _read_linux_info, _format_kib, _split_info_batch, _INFO_BATCH_SEP
+
+
+class TestProcessTools(unittest.TestCase):
+    """Tests for functions in agent_system.tools.process."""
+
+    def setUp(self):
+        """Start a couple of throwaway child processes to signal."""
+        self.children = [subprocess.Popen(["sleep", "30"]) for _ in range(2)]
+
+    def tearDown(self):
+        """Make sure no child outlives the test."""
+        for child in self.children:
+            if child.poll() is None:
+                child.kill()
+            child.wait()
+
+    def run_async(self, coro):
+        """Helper method to run an async function within a sync test."""
+        return asyncio.run(coro)
+
+    def test_kill_process_waits_for_exit(self):
+        """kill_process signals directly and can wait for the target to exit."""
+        child = self.children[0]
+        result = self.run_async(kill_process(child.pid, signal.SIGTERM, wait_seconds=5))
+
+        self.assertIn(f"sent successfully to PID {child.pid}", result)
+        self.assertIn("Process exited.", result)
+
+    def test_kill_processes_batch(self):
+        """All PIDs are signalled in one call."""
+        pids = [child.pid for child in self.children]
+        result = self.run_async(kill_processes(pids, signal.SIGTERM))
+
+        self.assertIn("sent to 2/2 PID(s)", result)
+        for child in self.children:
+            self.assertEqual(child.wait(timeout=5), -signal.SIGTERM)
+
+    def test_kill_processes_reports_missing_pid(self):
+        """A PID that no longer exists is reported without aborting the rest."""
+        gone = subprocess.Popen(["true"])
+        gone.wait()
+        result = self.run_async(kill_processes([gone.pid, self.children[0].pid]))
+
+        self.assertIn(f"Failed PID {gone.pid}: No such process", result)
+        self.assertIn("sent to 1/2 PID(s)", result)
+
+    def test_kill_processes_invalid_input(self):
+        """Empty or non-integer PID lists are rejected."""
+        self.assertTrue(self.run_async(kill_processes([])).startswith("Error"))
+        self.assertTrue(self.run_async(kill_processes(["abc"])).startswith("Error"))
+
+    def test_list_processes_filter(self):
+        """A filtered listing keeps the ps header and only the matching rows."""
+        pid = self.children[0].pid
+        result = self.run_async(list_processes(f"^\\S+ +{pid} "))
+
+        self.assertIn("PID", result)
+        self.assertEqual(result.count("sleep 30"), 1)
+        self.assertTrue(self.run_async(list_processes("(")).startswith("Error filtering processes with grep"))
+
+    def test_list_processes_regex_uses_grep(self):
+        """Only fixed strings are matched in-process; regexes (POSIX classes, nested repeats) go to grep -E."""
+        pid = self.children[0].pid
+        self.assertIsNone(_compile_filter("sleep [[:digit:]]+"))
+        self.assertIsNone(_compile_filter("a*a*a*a*a*b"))
+        result = self.run_async(list_processes(f"^[^ ]+ +{pid} .*sleep [[:digit:]]+"))
+        self.assertEqual(result.count("sleep 30"), 1)
+
+    def test_list_processes_columns(self):
+        """Narrow/custom column selections run 'ps -eo'; unsafe column strings are rejected."""
+        pid = self.children[0].pid
+        narrow = self.run_async(list_processes(f"^\\S+ +{pid} ", columns="narrow"))
+        self.assertIn("sleep", narrow)
+        self.assertNotIn("sleep 30", narrow) # comm has no arguments
+        self.assertIn("sleep 30", self.run_async(list_processes(f"^ *{pid} ", columns="pid,args")))
+        self.assertTrue(self.run_async(list_processes(columns="pid;rm")).startswith("Error: Invalid columns"))
+
+    def test_python_run_script_runner(self):
+        """Scripts run via the warm runner keep per-script argv, CWD, output streams and exit codes."""
+        tmp_dir = Path(tempfile.mkdtemp(prefix="agent_test_runner_"))
+        try:
+            script = tmp_dir / "script.py"
+            script.write_text("import os, sys\nprint(sys.argv[1:], os.getcwd())\nprint('warn', file=sys.stderr)\nsys.exit(int(sys.argv[1]))\n")
+
+            async def run_twice():
+                return (await python_run_script(str(script), ["0", "a b"]),
+                        await python_run_script(str(script), ["3"]))
+            ok, failed = self.run_async(run_twice())
+
+            self.assertIn("(RC=0)", ok)
+            self.assertIn(f"['0', 'a b'] {tmp_dir.resolve()}", ok)
+            self.assertIn("warn", ok)
+            self.assertIn("(RC=3)", failed)
+            self.assertIn("Status: Failed", failed)
+
+            script.write_text("print('x' * 100000)\n")
+            with mock.patch.object(settings, "MAX_TOOL_OUTPUT_BYTES", 1000):
+                capped = self.run_async(python_run_script(str(script)))
+            self.assertIn("...[truncated 99001 bytes]", capped)
+            self.assertLess(len(capped), 2000)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_python_run_script_runner_timeout_and_cancel(self):
+        """A timed-out or cancelled script is killed and the runner discarded, so the next call starts clean."""
+        from agent_system.tools import process
+        tmp_dir = Path(tempfile.mkdtemp(prefix="agent_test_runner_"))
+        try:
+            script = tmp_dir / "script.py"
+            pid_file = tmp_dir / "pid"
+            script.write_text(f"import os, time\nopen({str(pid_file)!r}, 'w').write(str(os.getpid()))\nprint('started', flush=True)\ntime.sleep(30)\n")
+
+            def assert_script_killed():
+                pid = int(pid_file.read_text())
+                for _ in range(50): # Killed, then reaped by whoever inherited it
+                    try:
+                        with open(f"/proc/{pid}/stat") as f:
+                            if f.read().rsplit(")", 1)[1].split()[0] == "Z": return
+                    except FileNotFoundError: return
+                    subprocess.run(["sleep", "0.1"])
+                self.fail(f"script process {pid} still running")
+
+            async def timeout_then_rerun():
+                with mock.patch.object(settings, "COMMAND_TIMEOUT", 1):
+                    timed_out = await python_run_script(str(script))
+                state = process._SCRIPT_RUNNERS[asyncio.get_running_loop()]
+                self.assertIsNone(state.process)
+                script.write_text("print('again')\n")
+                return timed_out, await python_run_script(str(script))
+            timed_out, rerun = self.run_async(timeout_then_rerun())
+            self.assertIn("timed out after 1 seconds", timed_out)
+            self.assertIn("started", timed_out)
+            self.assertIn("again", rerun)
+            assert_script_killed()
+
+            script.write_text(f"import os, time\nopen({str(pid_file)!r}, 'w').write(str(os.getpid()))\ntime.sleep(30)\n")
+            pid_file.unlink()
+            async def cancel_midway():
+                task = asyncio.ensure_future(process._run_python_via_runner(str(script), [], str(tmp_dir), 30))
+                while not pid_file.exists() or not pid_file.read_text(): await asyncio.sleep(0.05)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError): await task
+                self.assertIsNone(process._SCRIPT_RUNNERS[asyncio.get_running_loop()].process)
+            self.run_async(cancel_midway())
+            assert_script_killed()
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_compile_filter_cached(self):
+        """Fixed-string filters compile once to a bytes regex and are reused on repeated calls."""
+        _compile_filter.cache_clear()
+        first = _compile_filter("sleep 30")
+        self.assertIs(_compile_filter("sleep 30"), first)
+        self.assertTrue(first.search(b"user  123  0.0  0.0 sleep 30"))
+        self.assertEqual(_compile_filter.cache_info().hits, 1)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "reads /proc")
+    def test_read_linux_info(self):
+        """System info sections are read from uname(2) and /proc without spawning commands."""
+        info = _read_linux_info()
+        for name in ("OS", "Hostname", "Uptime", "Memory Info"):
+            self.assertIn(name, info)
+        self.assertTrue(info["Memory Info"].startswith("Mem: total "))
+        self.assertEqual(_format_kib(0), "0B")
+        self.assertEqual(_format_kib(2 * 1024 * 1024), "2.0Gi")
+
+    def test_split_info_batch(self):
+        """Batched system-info output is split by marker lines, or one line per section."""
+        marked = f"Caption : X\r\nVersion : 1\r\n{_INFO_BATCH_SEP}\r\nName : CPU\r\n{_INFO_BATCH_SEP}\r\n42\r\n"
+        self.assertEqual(_split_info_batch(marked, ("OS", "CPU", "Mem")),
+                         {"OS": "Caption : X\nVersion : 1", "CPU": "Name : CPU", "Mem": "42"})
+        self.assertEqual(_split_info_batch("Apple M1\n17179869184\n", ("CPU", "Mem")),
+                         {"CPU": "Apple M1", "Mem": "17179869184"})
+
+
+if __name__ == '__main__':
+    unittest.main()
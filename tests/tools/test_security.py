@@ -0,0 +1,145 @@
+import unittest
+import asyncio
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Import the specific tool functions to test
+# Ensure the path is correct relative to the project structure when running tests
+try:
+    from agent_system.tools import security
+except ImportError:
+    # If running tests from a different structure, adjust path temporarily
+    import sys
+    SCRIPT_DIR = Path(__file__).parent.parent.parent.resolve()
+    sys.path.insert(0, str(SCRIPT_DIR))
+    from agent_system.tools import security
+
+
+class TestSecurityTools(unittest.TestCase):
+    """Tests for argv construction in agent_system.tools.security (scanners are never executed)."""
+
+    def run_async(self, coro):
+        """Helper method to run an async function within a sync test."""
+        return asyncio.run(coro)
+
+    def nmap_argv(self, *args, **kwargs):
+        """Runs nmap_scan with confirmation accepted and returns the argv it would execute."""
+        seen = {}
+        async def fake_run(**kw):
+            seen["command"] = kw["command"]
+            # Capture the -iL file contents before nmap_scan removes it
+            if "-iL" in kw["command"]:
+                seen["list"] = Path(kw["command"][kw["command"].index("-iL") + 1]).read_text().split()
+            return "Status: Success"
+        async def confirm(*_):
+            return True
+        with mock.patch.object(security, "run_tool_command_async", fake_run), \
+             mock.patch.object(security, "ask_confirmation_async", confirm), \
+             mock.patch.object(security.shutil, "which", lambda exe: f"/usr/bin/{exe}"):
+            result = self.run_async(security.nmap_scan(*args, **kwargs))
+        return result, seen
+
+    def test_nmap_multiple_targets_single_process(self):
+        """Whitespace-separated or list targets are all passed to one nmap invocation."""
+        _, seen = self.nmap_argv("10.0.0.1 10.0.0.2", "-sS -O")
+        self.assertEqual(seen["command"], ["sudo", "--", "nmap", "-sS", "-O", "10.0.0.1", "10.0.0.2"])
+        _, seen = self.nmap_argv(["10.0.0.3", "host.example"])
+        self.assertEqual(seen["command"][-2:], ["10.0.0.3", "host.example"])
+
+    def test_nmap_large_target_set_uses_input_list(self):
+        """More targets than the argv cap go through a temporary '-iL' file that is removed afterwards."""
+        targets = [f"10.0.{i // 256}.{i % 256}" for i in range(security._NMAP_MAX_ARGV_TARGETS + 1)]
+        _, seen = self.nmap_argv(targets)
+        self.assertIn("-iL", seen["command"])
+        self.assertEqual(seen["list"], targets)
+        self.assertFalse(Path(seen["command"][-1]).exists())
+
+    def test_nmap_rejects_option_like_target(self):
+        """A target that looks like an option is refused before anything runs."""
+        result, seen = self.nmap_argv("10.0.0.1 -oN/tmp/x")
+        self.assertTrue(result.startswith("Error: Invalid target"))
+        self.assertNotIn("command", seen)
+
+    def test_parallel_scan_bounds_concurrency(self):
+        """parallel_scan runs every target, never more than max_concurrent at once, and keeps target order."""
+        state = {"running": 0, "peak": 0}
+        async def fake_nikto(host, options=None):
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            await asyncio.sleep(0.01)
+            state["running"] -= 1
+            if host == "bad":
+                raise RuntimeError("boom")
+            return f"scanned {host}"
+        hosts = ["h1", "h2", "bad", "h4", "h5"]
+        with mock.patch.object(security, "nikto_scan", fake_nikto):
+            result = self.run_async(security.parallel_scan("nikto", hosts, max_concurrent=2))
+        self.assertEqual(state["peak"], 2)
+        self.assertLess(result.index("scanned h1"), result.index("scanned h5"))
+        self.assertIn("=== nikto bad ===\nError: nikto scan raised RuntimeError: boom", result)
+
+    def test_option_filtering(self):
+        """Options with shell metacharacters are dropped; blocked sqlmap options refuse the whole call."""
+        _, seen = self.nmap_argv("10.0.0.1", options=["-p-", "--script=vuln", "http-title.useHEAD=true", "-oN;id", "plain"])
+        self.assertEqual(seen["command"][4:-1], ["-p-", "--script=vuln", "http-title.useHEAD=true"])
+        with mock.patch.object(security, "run_tool_command_async") as run:
+            result = self.run_async(security.sqlmap_scan("http://t/?id=1", options=["--dbs", "--os-shell"]))
+        self.assertIn("Dangerous sqlmap option blocked: --os-shell", result)
+        run.assert_not_called()
+
+    def test_msfvenom_options(self):
+        """Only VAR=value options with safe values reach msfvenom, after LHOST/LPORT."""
+        seen = {}
+        async def fake_run(**kw):
+            seen["command"] = kw["command"]
+            return "Status: Success"
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(security, "run_tool_command_async", fake_run):
+            self.run_async(security.msfvenom_generate(
+                "linux/x64/shell_reverse_tcp", str(Path(tmp) / "out" / "p.elf"), lhost="10.0.0.1", lport=4444,
+                options=["EXITFUNC=thread", "NOEQUALS", "BAD NAME=x", "CMD=$(id)", "PrependSetuid=true"]
+            ))
+        self.assertEqual(seen["command"][7:], ["LHOST=10.0.0.1", "LPORT=4444", "EXITFUNC=thread", "PrependSetuid=true"])
+
+    def test_gobuster_wordlist_resolved_per_call(self):
+        """A relative wordlist follows the current directory, and a deleted one is reported, not served stale."""
+        async def fake_run(**kw):
+            return kw["command"][kw["command"].index("-w") + 1]
+        dirs = [Path(tempfile.mkdtemp(prefix="agent_test_wl_")) for _ in range(2)]
+        cwd = os.getcwd()
+        try:
+            for d in dirs: (d / "words.txt").write_text("admin\n")
+            with mock.patch.object(security, "run_tool_command_async", fake_run):
+                for d in dirs:
+                    os.chdir(d)
+                    self.assertEqual(self.run_async(security.gobuster_scan("http://x", "words.txt")), str((d / "words.txt").resolve()))
+                (dirs[1] / "words.txt").unlink()
+                result = self.run_async(security.gobuster_scan("http://x", "words.txt"))
+            self.assertEqual(result, "Error: Wordlist file not found or not a file: words.txt")
+        finally:
+            os.chdir(cwd)
+            for d in dirs: shutil.rmtree(d)
+
+    def test_nmap_reports_missing_sudo(self):
+        """After confirmation, a missing sudo is reported instead of launching; nmap is left to sudo's own PATH."""
+        async def confirm(*_):
+            return True
+        with mock.patch.object(security, "run_tool_command_async") as run, \
+             mock.patch.object(security, "ask_confirmation_async", confirm), \
+             mock.patch.object(security.shutil, "which", lambda exe: None):
+            result = self.run_async(security.nmap_scan("10.0.0.1"))
+        self.assertEqual(result, "Error: Required executable(s) not found in PATH: sudo")
+        run.assert_not_called()
+
+        async def ran(**kwargs):
+            return "ran"
+        with mock.patch.object(security, "run_tool_command_async", side_effect=ran) as run, \
+             mock.patch.object(security, "ask_confirmation_async", confirm), \
+             mock.patch.object(security.shutil, "which", lambda exe: None if exe == "nmap" else f"/usr/bin/{exe}"):
+            self.assertEqual(self.run_async(security.nmap_scan("10.0.0.1")), "ran")
+        run.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
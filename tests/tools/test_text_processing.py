@@ -0,0 +1,110 @@
+import unittest
+import asyncio
+import tempfile
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from unittest import mock
+
+# Import the specific tool functions to test
+# Ensure the path is correct relative to the project structure when running tests
+try:
+    from agent_system.tools import text_processing
+except ImportError:
+    # If running tests from a different structure, adjust path temporarily
+    import sys
+    SCRIPT_DIR = Path(__file__).parent.parent.parent.resolve()
+    sys.path.insert(0, str(SCRIPT_DIR))
+    from agent_system.tools import text_processing
+
+
+class TestTextProcessingTools(unittest.TestCase):
+    """Tests for functions in agent_system.tools.text_processing."""
+
+    def setUp(self):
+        """Builds a small tree with text, binary, nested and symlinked files."""
+        self.test_dir = Path(tempfile.mkdtemp(prefix="agent_test_text_"))
+        (self.test_dir / "sub" / "deeper").mkdir(parents=True)
+        (self.test_dir / "a.txt").write_text("alpha\nbeta 42\ngamma\n")
+        (self.test_dir / "sub" / "b.py").write_text("def beta():\n    return 'beta'")
+        (self.test_dir / "sub" / "deeper" / "c.txt").write_text("\nbeta at line 2\n\n")
+        (self.test_dir / "blob.bin").write_bytes(b"beta\x00beta\n")
+        (self.test_dir / "link.txt").symlink_to(self.test_dir / "a.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_async(self, coro):
+        """Helper method to run an async function within a sync test."""
+        return asyncio.run(coro)
+
+    def grep_lines(self, pattern):
+        """Matching lines from grep_files, as a sorted list (fixed strings must be searched in-process)."""
+        result = self.run_async(text_processing.grep_files(pattern, str(self.test_dir)))
+        self.assertEqual("in-process execution" in result, pattern in ("beta", "42", "line 2", ""), pattern)
+        body = result.split("```\n", 1)[1].rsplit("\n```", 1)[0] if "```" in result else ""
+        return sorted(body.splitlines())
+
+    def test_grep_files_matches_grep(self):
+        """Fixed strings are searched in-process, regexes by grep, both reporting what 'grep -E -r -n -I -s' does."""
+        for pattern in ["beta", "42", "line 2", "", "^$", "[0-9]+", "a$", "(alpha|gamma)"]:
+            expected = subprocess.run(
+                ["grep", "-E", "-r", "-n", "-I", "-s", "--", pattern, str(self.test_dir)],
+                capture_output=True, text=True
+            ).stdout.splitlines()
+            self.assertEqual(self.grep_lines(pattern), sorted(expected), pattern)
+
+    def test_grep_files_no_match(self):
+        """No match is still a successful run, reported with RC=1."""
+        result = self.run_async(text_processing.grep_files("nomatch-zz", str(self.test_dir)))
+        self.assertIn("(RC=1)", result)
+        self.assertIn("Status: Success", result)
+
+    def test_grep_files_leaves_regexes_to_grep(self):
+        """Regexes run through grep's linear-time matcher; an over-long in-process search times out once."""
+        (self.test_dir / "a.txt").write_text("a" * 400 + "\n")
+        started = time.monotonic()
+        result = self.run_async(text_processing.grep_files("a*a*a*a*a*a*a*a*a*a*a*b", str(self.test_dir)))
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertNotIn("in-process execution", result)
+        self.assertNotIn("a.txt", result)
+        def slow_batch(*args):
+            time.sleep(1)
+            return []
+        with mock.patch.object(text_processing, "_grep_batch_sync", slow_batch), \
+             mock.patch.object(text_processing.settings, "COMMAND_TIMEOUT", 0.3):
+            result = self.run_async(text_processing.grep_files("beta", str(self.test_dir)))
+        self.assertIn("in-process execution", result)
+        self.assertIn("Error: Command timed out after 0.3 seconds.", result)
+
+    def test_find_files_matches_find(self):
+        """The in-process listing reports the same paths as 'find -maxdepth 5 [-name ...]'."""
+        (self.test_dir / "d1" / "d2" / "d3" / "d4" / "d5" / "d6").mkdir(parents=True)
+        (self.test_dir / "d1" / "d2" / "d3" / "d4" / "deep.txt").write_text("x")
+        (self.test_dir / "d1" / "d2" / "d3" / "d4" / "d5" / "too_deep.txt").write_text("x")
+        (self.test_dir / ".hidden.txt").write_text("x")
+        for name_pattern in [None, "*.txt", "[ab].*", "d?", self.test_dir.name]:
+            command = ["find", str(self.test_dir), "-maxdepth", "5"] + (["-name", name_pattern] if name_pattern else [])
+            expected = subprocess.run(command, capture_output=True, text=True).stdout.splitlines()
+            result = self.run_async(text_processing.find_files(name_pattern, str(self.test_dir)))
+            self.assertIn("in-process execution", result)
+            body = result.split("```\n", 1)[1].rsplit("\n```", 1)[0] if "```" in result else ""
+            self.assertEqual(sorted(body.splitlines()), sorted(expected), name_pattern)
+
+    def test_sed_command_matches_sed(self):
+        """Simple substitute/delete scripts run in-process with the same output as sed; others still use sed."""
+        inputs = ["alpha\nbeta 42\n\ngamma", "a.b.c\n", "aaa baa\n", ""]
+        for script in [r"s/a/b/", r"s/a/b/g", r"s/\(b\)\(e\)/\2\1/g", r"s/[0-9]\+/<&>/", r"/^$/d", r"s/^/> /", r"s/\./!/g"]:
+            for text in inputs:
+                expected = subprocess.run(["sed", script], input=text, capture_output=True, text=True).stdout
+                result = self.run_async(text_processing.sed_command(script, input_text=text))
+                self.assertIn("in-process execution", result)
+                self.assertEqual(text_processing._try_inprocess_sed(script, text), expected, (script, text))
+        result = self.run_async(text_processing.sed_command(r"s/a/\U&/", input_text="abc\n"))
+        self.assertNotIn("in-process execution", result)
+        self.assertIn("Abc", result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import unittest
+import os
+import shlex
+import signal
+import asyncio
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+
+# Import the helpers under test
+# Ensure the path is correct relative to the project structure when running tests
+try:
+    from agent_system.tools import tool_utils
+    from agent_system.config import settings
+except ImportError:
+    # If running tests from a different structure, adjust path temporarily
+    import sys
+    SCRIPT_DIR = Path(__file__).parent.parent.parent.resolve()
+    sys.path.insert(0, str(SCRIPT_DIR))
+    from agent_system.tools import tool_utils
+    from agent_system.config import settings
+
+
+class TestToolUtils(unittest.TestCase):
+    """Tests for shared command helpers in agent_system.tools.tool_utils."""
+
+    def run_async(self, coro):
+        """Helper method to run an async function within a sync test."""
+        return asyncio.run(coro)
+
+    def test_subprocess_semaphore_uses_setting(self):
+        """The per-loop semaphore is sized from settings.MAX_CONCURRENT_SUBPROCS."""
+        async def get_sem():
+            return tool_utils._get_subprocess_semaphore()
+
+        with mock.patch.object(settings, "MAX_CONCURRENT_SUBPROCS", 3):
+            sem = self.run_async(get_sem())
+        self.assertEqual(sem._value, 3)
+
+    def test_subprocess_semaphore_is_per_loop(self):
+        """Each event loop gets its own semaphore; the same loop reuses it."""
+        async def get_twice():
+            return tool_utils._get_subprocess_semaphore(), tool_utils._get_subprocess_semaphore()
+
+        first_a, first_b = self.run_async(get_twice())
+        second_a, _ = self.run_async(get_twice())
+        self.assertIs(first_a, first_b)
+        self.assertIsNot(first_a, second_a)
+
+    def test_run_command_async_success(self):
+        """A simple command runs and returns its stdout bytes."""
+        success, stdout, stderr, rc = self.run_async(tool_utils._run_command_async(["echo", "hello"]))
+        self.assertTrue(success)
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.strip(), b"hello")
+
+    def test_run_command_async_stream_limit(self):
+        """With stream_limit, output is capped and an endless producer is stopped (and not reported as a success); input_data still reaches stdin."""
+        success, stdout, stderr, rc = self.run_async(tool_utils._run_command_async(["yes"], timeout=10, stream_limit=100000))
+        self.assertEqual((success, rc), (False, -signal.SIGKILL))
+        self.assertEqual(len(stdout), 100000)
+        self.assertIn(b"truncated at 100000 bytes", stderr)
+        success, stdout, _, rc = self.run_async(tool_utils._run_command_async(["cat"], input_data=b"abc", stream_limit=10))
+        self.assertEqual((success, stdout, rc), (True, b"abc", 0))
+
+    def test_run_command_async_timeout_bounded_cleanup(self):
+        """A timeout returns promptly even when a grandchild keeps the killed process's pipes open."""
+        async def scenario(pid_file):
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            result = await tool_utils._run_command_async(
+                ["sh", "-c", f"sleep 30 & echo $! > {pid_file}; exec sleep 30"], timeout=1
+            )
+            elapsed = loop.time() - start
+            os.kill(int(Path(pid_file).read_text()), signal.SIGKILL) # Release the pipes so the transport can close
+            await asyncio.sleep(0.2)
+            return result, elapsed
+        with tempfile.TemporaryDirectory() as tmp:
+            (success, _, stderr, rc), elapsed = self.run_async(scenario(str(Path(tmp) / "pid")))
+        self.assertEqual((success, rc), (False, -1))
+        self.assertIn(b"timed out after 1 seconds", stderr)
+        self.assertLess(elapsed, 1 + tool_utils._KILL_REAP_TIMEOUT + 1)
+
+    def test_run_command_async_expected_out_size(self):
+        """A stdout size hint only presizes the buffer: output is the same whether it under- or overestimates."""
+        for hint in (0, 5, 1 << 20):
+            success, stdout, stderr, rc = self.run_async(
+                tool_utils._run_command_async(["seq", "1000"], expected_out_size=hint)
+            )
+            self.assertEqual((success, rc, stderr), (True, 0, b""))
+            self.assertEqual(stdout, "".join(f"{i}\n" for i in range(1, 1001)).encode())
+
+    def test_format_tool_result(self):
+        """Success with stdout only, and the other shapes, keep the standard layout."""
+        head = "Tool 't' async execution finished (RC=0). Command: `c`\n"
+        self.assertEqual(tool_utils.format_tool_result("t", "async", "c", 0, "out\n", ""),
+                         head + "Status: Success\nStdout:\n```\nout\n\n```")
+        self.assertEqual(tool_utils.format_tool_result("t", "async", "c", 0, "out", "warn"),
+                         head + "Status: Success\nStdout:\n```\nout\n```\nStderr (Non-fatal):\n```\nwarn\n```")
+        self.assertEqual(tool_utils.format_tool_result("t", "async", "c", 0, "", ""), head + "Status: Success\nStdout: (empty)")
+        self.assertEqual(tool_utils.format_tool_result("t", "async", "c", 0, "out", "", success_rc=(1,)),
+                         head + "Status: Failed\nStdout:\n```\nout\n```")
+
+    def test_format_tool_result_caps_output(self):
+        """Bytes and in-process text are both capped at MAX_TOOL_OUTPUT_BYTES where the result is built."""
+        with mock.patch.object(tool_utils.settings, "MAX_TOOL_OUTPUT_BYTES", 4):
+            self.assertIn("```\nabcd\n...[truncated 2 bytes]\n```", tool_utils.format_tool_result("t", "async", "c", 0, b"abcdef", b""))
+            self.assertIn("```\nabcd\n...[truncated 2 chars]\n```", tool_utils.format_tool_result("t", "async", "c", 0, "abcdef", ""))
+            self.assertIn("Stderr:\n```\nerr\n```", tool_utils.format_tool_result("t", "async", "c", 1, b"", b"err"))
+
+    def test_run_command_async_large_input_and_output(self):
+        """Input larger than the pipe buffers is fed while output is read, so a filter can't deadlock."""
+        data = b"abc\n" * (tool_utils._SUBPROC_STREAM_LIMIT * 3 // 4) # Past the reader's pause threshold (2x limit)
+        for kwargs in ({"expected_out_size": len(data)}, {"stream_limit": len(data) + 1}):
+            success, stdout, stderr, rc = self.run_async(
+                tool_utils._run_command_async(["sed", "s/a/b/"], input_data=data, timeout=20, **kwargs)
+            )
+            self.assertEqual((success, rc, stderr), (True, 0, b""), kwargs)
+            self.assertEqual(stdout, data.replace(b"a", b"b"), kwargs)
+
+    def test_run_command_async_size_hint_is_bounded(self):
+        """A size hint far beyond the real output (a huge sed input file) is not allocated up front."""
+        success, stdout, _, rc = self.run_async(
+            tool_utils._run_command_async(["echo", "hi"], expected_out_size=1 << 50)
+        )
+        self.assertEqual((success, rc, stdout), (True, 0, b"hi\n"))
+
+    def test_c_locale_env_reads_current_environment(self):
+        """Variables set after import (e.g. from .env) reach children run under the C locale."""
+        with mock.patch.dict(os.environ, {"T5000_TEST_VAR": "x", "LC_ALL": "en_US.UTF-8"}):
+            env = tool_utils.c_locale_env()
+        self.assertEqual((env["T5000_TEST_VAR"], env["LC_ALL"], env["LANG"]), ("x", "C", "C"))
+
+    def test_decode_output_limit(self):
+        """Output is decoded whole up to the limit, cut with a marker past it, and never cut when the limit is 0."""
+        self.assertEqual(tool_utils._decode_output(b"", "utf-8", 4), "")
+        self.assertEqual(tool_utils._decode_output(b"abcd", "utf-8", 4), "abcd")
+        self.assertEqual(tool_utils._decode_output(b"abcdef", "utf-8", 4), "abcd\n...[truncated 2 bytes]")
+        self.assertEqual(tool_utils._decode_output(b"abcdef", "utf-8", 0), "abcdef")
+
+    def test_quote_argv_matches_shlex_join(self):
+        """The display string equals shlex.join, on the unquoted fast path and the per-argument fallback."""
+        for argv in (["ls", "-la", "/tmp"], ["grep", "-E", "a b", "x"], ["echo", ""], [], ["ssh", "-o", "ControlPath=/tmp/%r@%h:%p", "h", "ls; id"], ["é"]):
+            self.assertEqual(tool_utils._quote_argv(argv), shlex.join(argv), argv)
+
+    def test_resolve_regular_file_async(self):
+        """Regular files resolve to their real path; dirs and missing paths give None."""
+        tmp_dir = Path(tempfile.mkdtemp(prefix="agent_test_utils_"))
+        try:
+            key_file = tmp_dir / "id_test"
+            key_file.write_text("key")
+            self.assertEqual(self.run_async(tool_utils.resolve_regular_file_async(str(key_file))), str(key_file.resolve()))
+            self.assertIsNone(self.run_async(tool_utils.resolve_regular_file_async(str(tmp_dir))))
+            self.assertIsNone(self.run_async(tool_utils.resolve_regular_file_async(str(tmp_dir / "missing"))))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_validate_tool_options(self):
+        """Options are stringified and filtered; non-lists are rejected; None short-circuits."""
+        self.assertEqual(tool_utils.validate_tool_options(None, "t"), ([], None))
+        safe, error = tool_utils.validate_tool_options(["-a", 5, "x;y", "plain"], "t")
+        self.assertEqual((safe, error), (["-a", "5", "plain"], None))
+        self.assertEqual(tool_utils.validate_flag_options(["-a", "plain", "--b=$(c)"], "t"), (["-a"], None))
+        safe, error = tool_utils.validate_flag_options("-a", "t")
+        self.assertIsNone(safe)
+        self.assertTrue(error.startswith("Error:"))
+
+
+if __name__ == '__main__':
+    unittest.main()
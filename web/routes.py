@@ -1,7 +1,9 @@
 from flask import render_template, request, jsonify, current_app, session as flask_session # Renamed to avoid conflict
 import logging
 import asyncio
+import threading
 import uuid # For generating session IDs
+from collections import OrderedDict
 from typing import Dict, Any, Optional, Tuple, Type # Added Type
 
 # Import the app instance created in web/__init__.py
@@ -32,7 +34,40 @@ from agent_system.agents.network import NetworkAgent
 # storing agent instances in memory like this is NOT scalable or robust.
 # Consider using external storage (Redis, DB) or background task queues (Celery)
 # to manage agent state and execution across requests/workers.
-active_sessions: Dict[str, ControllerAgent] = {}
+# The map is an LRU capped at settings.SESSION_LRU_CAP: an evicted session's history is still on disk
+# (prompts run with load_state/save_state) and is reloaded when it next sends a prompt. Flask runs each
+# async view on its own event loop in a worker thread, so the map is guarded by a threading lock; an
+# asyncio lock would belong to a single request's loop.
+active_sessions: "OrderedDict[str, ControllerAgent]" = OrderedDict()
+_active_sessions_lock = threading.Lock()
+
+def _cached_session_controller(session_id: str) -> Optional[ControllerAgent]:
+    """Returns the session's cached controller (marking it most recently used), or None."""
+    with _active_sessions_lock:
+        controller = active_sessions.get(session_id)
+        if controller is not None: active_sessions.move_to_end(session_id)
+        return controller
+
+def _store_session_controller(session_id: str, controller: ControllerAgent) -> ControllerAgent:
+    """
+    Caches a newly built controller, dropping least recently used sessions beyond the cap.
+    If a concurrent request for the same session stored one first, that one is kept and returned.
+    """
+    with _active_sessions_lock:
+        existing = active_sessions.get(session_id)
+        if existing is not None:
+            active_sessions.move_to_end(session_id)
+            return existing
+        active_sessions[session_id] = controller
+        while len(active_sessions) > settings.SESSION_LRU_CAP:
+            evicted_id, _ = active_sessions.popitem(last=False)
+            logging.info(f"Dropped cached agent controller for least recently used session: {evicted_id}")
+        return controller
+
+# Guards provider_cache: request threads each run their own event loop, so a threading lock is what
+# serializes them. Construction is synchronous, so holding it also keeps two requests from both
+# building a provider for the same key.
+_provider_cache_lock = threading.Lock()
 
 async def get_or_create_cached_provider(provider_name: str, config: Dict[str, Any]) -> LLMProvider:
     """
@@ -42,30 +77,38 @@ async def get_or_create_cached_provider(provider_name: str, config: Dict[str, An
     global provider_cache
     prelim_key_detail = config.get("base_url") or config.get("api_key") or "default_or_env"
     prelim_cache_key = (provider_name.lower(), prelim_key_detail)
-    if prelim_cache_key in provider_cache:
-        provider = provider_cache[prelim_cache_key]
-        provider.model_name = config.get("model", provider.model_name)
-        return provider
-    else:
+    discarded_instance: Optional[LLMProvider] = None
+    with _provider_cache_lock:
+        if prelim_cache_key in provider_cache:
+            provider = provider_cache[prelim_cache_key]
+            provider.model_name = config.get("model", provider.model_name)
+            return provider
         provider_instance = get_llm_provider(provider_name, config) # Factory handles creation
         instance_cache_key = (provider_name.lower(), provider_instance.get_identifier())
         if instance_cache_key != prelim_cache_key and instance_cache_key in provider_cache:
-           provider_instance = provider_cache[instance_cache_key]
+           # Same client under another key: keep the cached one and release the one just built
+           discarded_instance, provider_instance = provider_instance, provider_cache[instance_cache_key]
            provider_instance.model_name = config.get("model", provider_instance.model_name)
         else:
            provider_cache[instance_cache_key] = provider_instance
-           if instance_cache_key != prelim_cache_key: provider_cache[prelim_cache_key] = provider_instance # Cache under simple key too
-        return provider_instance
+        if instance_cache_key != prelim_cache_key: provider_cache[prelim_cache_key] = provider_instance # Cache under simple key too
+    if discarded_instance is not None and hasattr(discarded_instance, 'close'):
+        try:
+            if asyncio.iscoroutinefunction(discarded_instance.close): await discarded_instance.close()
+            else: discarded_instance.close()
+        except Exception as e:
+            logging.warning(f"Failed to close duplicate {type(discarded_instance).__name__} instance: {e}")
+    return provider_instance
 
 async def get_session_controller(session_id: str) -> ControllerAgent:
     """
     Gets the ControllerAgent instance for the given session ID from memory cache.
     If not found, initializes the agent system (controller + specialists) for this session.
     """
-    global active_sessions
-    if session_id in active_sessions:
+    cached_controller = _cached_session_controller(session_id)
+    if cached_controller is not None:
         logging.debug(f"Found active controller for session: {session_id}")
-        return active_sessions[session_id]
+        return cached_controller
     else:
         logging.info(f"Initializing new agent system for session: {session_id}")
         # --- Instantiate Agents for this Session ---
@@ -107,7 +150,7 @@ async def get_session_controller(session_id: str) -> ControllerAgent:
                          llm_provider=controller_provider
                          # session_id=session_id # Optional for Controller
                      )
-                     active_sessions[session_id] = controller_agent # Store the new controller instance
+                     controller_agent = _store_session_controller(session_id, controller_agent) # Store the new controller instance
                      logging.info(f"Successfully initialized controller and {len(specialist_agents)} specialists for session {session_id}.")
                  except Exception as e:
                       logging.exception(f"Failed to initialize Controller for session '{session_id}': {e}")